@@ -7,16 +7,29 @@ Async Processing:
 - Worker processes images → CLIP embedding → Qdrant indexing
 - API returns immediately (fast response)
 """
+import asyncio
+import base64
+import binascii
 import logging
 import uuid
 import json
 import tempfile
-from fastapi import APIRouter, HTTPException, Query, UploadFile, File, Form
-from typing import Optional, List
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, UploadFile, File, Form
+from fastapi.responses import JSONResponse
+from PIL import Image
+from typing import Any, Dict, Optional, List
 from pydantic import BaseModel
+from app.config import get_settings
 from app.services.embedding_service import EmbeddingService
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services.embedding_cache import get_image_embedding_cache
+from app.services.inference_executor import get_inference_executor, InferenceQueueFull
+from app.services.model_registry import get_model_registry
+from app.services.startup import get_startup_tracker
 from app.services.image_embedding import get_image_embedding_service
+from app.services.image_preprocessing import ImageTooLarge
 from app.services.integrated_qdrant import get_qdrant_service
+from app.services.async_qdrant import get_async_qdrant_service, ProductNotFound
 from app.services.qdrant_monitoring import QdrantMonitor
 from app.services.redis_queue import (
     get_redis_queue_service,
@@ -24,7 +37,12 @@ from app.services.redis_queue import (
 )
 from app.services.voice_service import get_voice_service
 from app.services.search_service import SearchService
+from app.services.payload_store import get_payload_stats
+from app.services.resilience import get_guard, request_deadline
+from app.services.similar_products import get_similar_products_store
 from app.services.text_preprocessing import TextPreprocessor
+from app.services.search_filters import InvalidSearchRequest, build_search_filter
+from app.services.search_params import build_search_params
 from app.services.bm25_search import BM25SearchService
 from app.services.hybrid_search import HybridSearchService
 
@@ -39,6 +57,13 @@ _monitor = None
 class SearchRequest(BaseModel):
     query: str
     limit: int = 10
+    category: Optional[str] = None
+    price_min: Optional[float] = None
+    price_max: Optional[float] = None
+    filters: Optional[Dict[str, Any]] = None  # Other payload fields: value, [values] or {gte/lte...}
+    tier: Optional[str] = None  # Latency tier: fast, balanced or precise
+    hnsw_ef: Optional[int] = None  # Explicit HNSW ef (overrides the tier, at most HNSW_EF_MAX)
+    exact: bool = False  # Exact search (slow, for evaluation)
 
 
 class SearchResponse(BaseModel):
@@ -47,6 +72,66 @@ class SearchResponse(BaseModel):
     count: int
 
 
+class BatchSearchQuery(BaseModel):
+    text: Optional[str] = None
+    image_base64: Optional[str] = None  # Either text or image
+    limit: int = 10
+    score_threshold: Optional[float] = None  # Default 0.3 for text, 0.2 for images
+    category: Optional[str] = None
+    price_min: Optional[float] = None
+    price_max: Optional[float] = None
+    filters: Optional[Dict[str, Any]] = None
+    tier: Optional[str] = None
+
+
+class BatchSearchRequest(BaseModel):
+    queries: List[BatchSearchQuery]
+
+
+class RecommendRequest(BaseModel):
+    positive: List[str]  # Product IDs to move towards
+    negative: List[str] = []  # Product IDs to move away from
+    strategy: str = "average_vector"  # or "best_score"
+    limit: int = 10
+    offset: int = 0
+    score_threshold: Optional[float] = None
+    category: Optional[str] = None
+    price_min: Optional[float] = None
+    price_max: Optional[float] = None
+    filters: Optional[Dict[str, Any]] = None
+    tier: Optional[str] = None
+
+
+class ContextPairRequest(BaseModel):
+    positive: str
+    negative: str
+
+
+class DiscoverRequest(BaseModel):
+    target: Optional[str] = None  # Product to search around (None: explore the context region)
+    context: List[ContextPairRequest]
+    limit: int = 10
+    offset: int = 0
+    category: Optional[str] = None
+    price_min: Optional[float] = None
+    price_max: Optional[float] = None
+    filters: Optional[Dict[str, Any]] = None
+    tier: Optional[str] = None
+
+
+class BulkProduct(BaseModel):
+    product_id: str
+    name: str
+    description: str = ""
+    metadata: Dict[str, Any] = {}
+    embedding: Optional[List[float]] = None  # Precomputed (otherwise CLIP text embedding of name + description)
+
+
+class BulkIndexRequest(BaseModel):
+    products: List[BulkProduct]
+    wait: bool = False  # Wait for the upserts (otherwise return once queued; see /index/flush)
+
+
 class EmbedRequest(BaseModel):
     text: str
 
@@ -57,12 +142,99 @@ class EmbedResponse(BaseModel):
     dimension: int
 
 
-# Services
-embedding_service = EmbeddingService()
-image_embedding_service = get_image_embedding_service()
-qdrant_service = get_qdrant_service()
-bm25_service = BM25SearchService()
-hybrid_search_service = HybridSearchService(bm25_service)
+# Services - nothing heavy is built at import time: CLIP/Whisper load on first
+# use or in the background warmup (see app/services/startup.py)
+qdrant_service = get_qdrant_service()  # Connects lazily
+async_qdrant_service = get_async_qdrant_service()  # Search/index path: never blocks the event loop
+_embedding_service: Optional[EmbeddingService] = None
+_hybrid_search_service: Optional[HybridSearchService] = None
+
+# Inference runs on per-model thread pools, never on the event loop
+inference_executor = get_inference_executor()
+
+
+def _get_embedding_service() -> EmbeddingService:
+    """CLIP text embedding service (loads the model on first call)."""
+    global _embedding_service
+    if _embedding_service is None:
+        _embedding_service = EmbeddingService()
+    return _embedding_service
+
+
+def _get_hybrid_search() -> HybridSearchService:
+    """BM25 + semantic hybrid search service (lazy)."""
+    global _hybrid_search_service
+    if _hybrid_search_service is None:
+        _hybrid_search_service = HybridSearchService(BM25SearchService())
+    return _hybrid_search_service
+
+
+# Micro-batchers: concurrent requests share one CLIP forward pass
+_settings = get_settings()
+text_batcher = EmbeddingBatcher(
+    lambda texts: _get_embedding_service().embed_texts(texts),
+    name="clip_text",
+    max_batch_size=_settings.embedding_batch_max_size,
+    max_wait_ms=_settings.embedding_batch_window_ms,
+    executor=inference_executor.get("clip_text"),
+    max_queue=_settings.inference_max_queue
+)
+image_batcher = EmbeddingBatcher(
+    lambda images: get_image_embedding_service().embed_images(images).tolist(),
+    name="clip_image",
+    max_batch_size=_settings.embedding_batch_max_size,
+    max_wait_ms=_settings.embedding_batch_window_ms,
+    executor=inference_executor.get("clip_image"),
+    max_queue=_settings.inference_max_queue
+)
+
+# Background warmup: load each model and run a dummy forward pass before /ready
+startup_tracker = get_startup_tracker()
+if _settings.startup_warmup:
+    startup_tracker.register_warmup(
+        "clip_text",
+        lambda: _get_embedding_service().embed_texts(["warmup"]),
+        executor_model="clip_text"
+    )
+    startup_tracker.register_warmup(
+        "clip_image",
+        lambda: get_image_embedding_service().embed_images([Image.new("RGB", (224, 224))]),
+        executor_model="clip_image"
+    )
+    if _settings.startup_warmup_whisper:
+        # Voice search is optional: readiness doesn't wait for Whisper
+        startup_tracker.register_warmup(
+            "whisper",
+            lambda: get_voice_service(model_size="base"),
+            executor_model="whisper",
+            required=False
+        )
+
+
+def _overloaded(e: InferenceQueueFull) -> HTTPException:
+    """Map a saturated inference queue to 503 so clients back off and retry."""
+    logger.warning(f"Inference overloaded: {e}")
+    return HTTPException(status_code=503, detail=f"Inference overloaded, retry later: {str(e)}")
+
+
+async def request_budget(x_request_budget_ms: Optional[float] = Header(None)):
+    """Time budget of a search request: bounds its Qdrant calls (see resilience)."""
+    budget_ms = x_request_budget_ms or get_settings().request_budget_ms
+    if budget_ms <= 0:
+        yield
+        return
+    with request_deadline(budget_ms / 1000.0):
+        yield
+
+
+def _page(results: List[dict], limit: int, offset: int) -> Dict[str, Any]:
+    """Results plus pagination info (next_offset is None on the last page)."""
+    return {
+        "results": results,
+        "count": len(results),
+        "offset": offset,
+        "next_offset": offset + len(results) if len(results) == limit else None
+    }
 
 
 def _get_monitor() -> QdrantMonitor:
@@ -77,8 +249,8 @@ def _get_monitor() -> QdrantMonitor:
 async def health_check():
     """Health check endpoint."""
     try:
-        qdrant_ok = get_qdrant_service().health_check()
-        stats = get_qdrant_service().get_collection_stats()
+        qdrant_ok = await async_qdrant_service.health_check()
+        stats = await async_qdrant_service.get_collection_stats()
         
         return {
             "status": "healthy" if qdrant_ok else "degraded",
@@ -86,6 +258,7 @@ async def health_check():
             "version": "3.0",
             "qdrant": {
                 "connected": qdrant_ok,
+                "circuit": get_guard().breaker.state,
                 "stats": stats
             }
         }
@@ -96,7 +269,25 @@ async def health_check():
             "error": str(e)
         }
 
-@router.post("/search", response_model=SearchResponse)
+@router.get("/live")
+async def liveness():
+    """Liveness probe: the process is up and the event loop responds (no dependency checks)."""
+    return {"status": "alive"}
+
+@router.get("/ready")
+async def readiness():
+    """
+    Readiness probe: 200 once startup completed and the CLIP models are warm, 503 before.
+
+    Route traffic to this replica only when ready; /live is the liveness probe.
+    """
+    report = startup_tracker.get_report()
+    return JSONResponse(
+        status_code=200 if report["ready"] else 503,
+        content={"status": "ready" if report["ready"] else "starting", **report}
+    )
+
+@router.post("/search", response_model=SearchResponse, dependencies=[Depends(request_budget)])
 async def search(request: SearchRequest):
     """
     Search for products by text query with improved precision.
@@ -104,12 +295,15 @@ async def search(request: SearchRequest):
     Features:
     - Enhanced text preprocessing (cleaning, normalization)
     - Intelligent score threshold (0.3 default for better precision)
-    - Optional category filtering
+    - Optional category, price and metadata filtering (applied inside Qdrant)
     
-    Query Parameters:
+    Body Parameters:
     - limit: Max results (default 10)
-    - score_threshold: Minimum similarity (default 0.3)
-    - category: Filter by category (optional)
+    - category: Filter by category words (optional)
+    - price_min / price_max: Price range, inclusive (optional)
+    - filters: Other payload fields (optional)
+    - tier: fast, balanced or precise (optional, HNSW ef per tier)
+    - hnsw_ef / exact: Explicit search hints (optional, hnsw_ef up to HNSW_EF_MAX)
     """
     try:
         if not request.query or len(request.query.strip()) == 0:
@@ -120,16 +314,23 @@ async def search(request: SearchRequest):
         logger.info(f"Searching for: '{request.query}' (processed: '{processed_query}')")
         
         # Generate CLIP text embedding
-        embedding = embedding_service.embed_text(processed_query)
+        embedding = await text_batcher.submit(processed_query)
         
         if not embedding:
             raise HTTPException(status_code=500, detail="Failed to generate embedding")
         
         # Search in Qdrant with improved parameters
-        search_results = qdrant_service.search(
+        search_results = await async_qdrant_service.search(
             query_vector=embedding,
             limit=request.limit,
-            score_threshold=0.3  # Intelligent threshold for better precision
+            score_threshold=0.3,  # Intelligent threshold for better precision
+            category_filter=request.category,
+            price_min=request.price_min,
+            price_max=request.price_max,
+            filters=request.filters,
+            tier=request.tier,
+            hnsw_ef=request.hnsw_ef,
+            exact=request.exact
         )
         
         response = SearchResponse(
@@ -141,6 +342,10 @@ async def search(request: SearchRequest):
         logger.info(f"Search returned {len(search_results)} results (threshold=0.3)")
         return response
         
+    except InferenceQueueFull as e:
+        raise _overloaded(e)
+    except InvalidSearchRequest as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
@@ -148,7 +353,7 @@ async def search(request: SearchRequest):
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
 
-@router.post("/search-hybrid")
+@router.post("/search-hybrid", dependencies=[Depends(request_budget)])
 async def search_hybrid(
     request: SearchRequest,
     semantic_weight: float = Query(0.7, ge=0.0, le=1.0, description="Weight for semantic search (0-1)"),
@@ -195,14 +400,22 @@ async def search_hybrid(
         logger.info(f"Hybrid search for: '{request.query}' (semantic={semantic_weight:.1%}, keyword={keyword_weight:.1%})")
         
         # Get semantic results from CLIP
-        embedding = embedding_service.embed_text(processed_query)
+        embedding = await text_batcher.submit(processed_query)
         if not embedding:
             raise HTTPException(status_code=500, detail="Failed to generate embedding")
         
-        semantic_results = get_qdrant_service().search(
+        semantic_results = await async_qdrant_service.search(
             query_vector=embedding,
             limit=request.limit * 2,  # Get more for fusion
-            score_threshold=0.2  # Lower threshold for fusion
+            score_threshold=0.2,  # Lower threshold for fusion
+            category_filter=request.category,
+            price_min=request.price_min,
+            price_max=request.price_max,
+            filters=request.filters,
+            tier=request.tier,
+            hnsw_ef=request.hnsw_ef,
+            exact=request.exact,
+            hydrate=False  # Fusion only needs IDs and scores
         )
         
         # Perform hybrid fusion
@@ -214,6 +427,7 @@ async def search_hybrid(
             keyword_weight=keyword_weight,
             min_keyword_score=0.1
         )
+        fused_results = await async_qdrant_service.hydrate(fused_results)  # Final top-k only
         
         response = {
             "query": request.query,
@@ -229,24 +443,292 @@ async def search_hybrid(
         logger.info(f"Hybrid search returned {len(fused_results)} results")
         return response
         
+    except InferenceQueueFull as e:
+        raise _overloaded(e)
+    except InvalidSearchRequest as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Hybrid search error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Hybrid search failed: {str(e)}")
+
+
+@router.post("/search/batch", dependencies=[Depends(request_budget)])
+async def search_batch(request: BatchSearchRequest):
+    """
+    Run many text and/or image searches in one call.
+    
+    Meant for pages rendering several result widgets: all text queries are
+    embedded in shared CLIP forward passes (same for images), and all
+    searches go to Qdrant in a single batch request. Each query takes the
+    same filters and tier as /search.
+    
+    Body:
+    - queries: List of {text | image_base64, limit, score_threshold,
+      category, price_min, price_max, filters, tier}
+    
+    Returns:
+        One entry per query, in request order. A query with invalid filters
+        or hints, or whose input could not be embedded, gets an "error" and
+        no results; the others still run.
+    """
+    try:
+        queries = request.queries
+        if not queries:
+            raise HTTPException(status_code=400, detail="At least one query is required")
+        max_queries = get_settings().search_batch_max_queries
+        if len(queries) > max_queries:
+            raise HTTPException(status_code=400, detail=f"At most {max_queries} queries per batch")
+        
+        # Split inputs by model, remembering each query's position
+        texts, text_slots, images, image_slots = [], [], [], []
+        errors: Dict[int, str] = {}
+        for i, query in enumerate(queries):
+            has_text = bool(query.text and query.text.strip())
+            if has_text == bool(query.image_base64):
+                raise HTTPException(status_code=400, detail=f"Query {i}: provide exactly one of text or image_base64")
+            try:
+                # Checked per query: one bad filter must not fail the whole Qdrant batch
+                build_search_filter(query.category, query.price_min, query.price_max, query.filters)
+                build_search_params(query.tier)
+            except InvalidSearchRequest as e:
+                errors[i] = str(e)
+                continue
+            if has_text:
+                texts.append(TextPreprocessor.preprocess_query(query.text))
+                text_slots.append(i)
+            else:
+                try:
+                    images.append(base64.b64decode(query.image_base64, validate=True))
+                except (binascii.Error, ValueError):
+                    raise HTTPException(status_code=400, detail=f"Query {i}: image_base64 is not valid base64")
+                image_slots.append(i)
+        
+        # One batched forward pass per model (both models run concurrently)
+        text_embeddings, image_embeddings = await asyncio.gather(
+            text_batcher.submit_many(texts, return_exceptions=True),
+            image_batcher.submit_many(images, return_exceptions=True)
+        )
+        embeddings: List[Any] = [None] * len(queries)
+        for slot, embedding in zip(text_slots + image_slots, list(text_embeddings) + list(image_embeddings)):
+            embeddings[slot] = embedding
+        
+        # One Qdrant request for every query that has an embedding
+        searchable = [i for i, embedding in enumerate(embeddings)
+                      if embedding and not isinstance(embedding, BaseException)]
+        searches = [
+            {
+                "query_vector": embeddings[i],
+                "limit": queries[i].limit,
+                "score_threshold": queries[i].score_threshold if queries[i].score_threshold is not None
+                else (0.3 if i in text_slots else 0.2),
+                "category_filter": queries[i].category,
+                "price_min": queries[i].price_min,
+                "price_max": queries[i].price_max,
+                "filters": queries[i].filters,
+                "tier": queries[i].tier
+            }
+            for i in searchable
+        ]
+        batch_results = dict(zip(searchable, await async_qdrant_service.search_batch(searches)))
+        
+        results = []
+        for i, query in enumerate(queries):
+            entry = {"query": "image" if query.image_base64 else query.text}
+            if i in batch_results:
+                entry.update(results=batch_results[i], count=len(batch_results[i]))
+            elif i in errors:
+                entry.update(results=[], count=0, error=errors[i])
+            else:
+                error = embeddings[i]
+                entry.update(results=[], count=0,
+                             error=str(error) if isinstance(error, BaseException) else "Failed to generate embedding")
+            results.append(entry)
+        
+        logger.info(f"Batch search: {len(queries)} queries ({len(texts)} text, {len(images)} image)")
+        return {"results": results, "count": len(results)}
+        
+    except InferenceQueueFull as e:
+        raise _overloaded(e)
+    except InvalidSearchRequest as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch search error: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Batch search failed: {str(e)}")
+
+
+@router.get("/products/{product_id}/similar/precomputed", dependencies=[Depends(request_budget)])
+async def similar_products_precomputed(
+    product_id: str,
+    limit: int = Query(10, ge=1, le=100),
+    fallback: bool = Query(True, description="Run a live query when the product has no precomputed entry")
+):
+    """
+    Similar products from the precomputed table (one Redis HGET, no ANN query).
+    
+    The table is built offline by `python -m app.tools.build_similar_products`
+    (top SIMILAR_PRODUCTS_K neighbours per product, refreshed incrementally
+    after ingestion). Products indexed since the last refresh fall back to a
+    live query unless fallback=false.
+    
+    Returns:
+        Similar products (id, score, metadata) best first, like /products/{id}/similar,
+        and the source ("precomputed" or "live")
+    """
+    try:
+        neighbours = await asyncio.to_thread(get_similar_products_store().get, product_id)
+    except Exception as e:
+        logger.warning(f"Similar-products table unavailable: {e}")
+        neighbours = None
+    
+    if neighbours is not None:
+        # The table stores IDs and scores only: display fields come from the payload store
+        results = [{**neighbour, "metadata": {}} for neighbour in neighbours[:limit]]
+        await async_qdrant_service.hydrate(results, force=True)
+        return {"product_id": product_id, "results": results, "count": len(results), "source": "precomputed"}
+    if not fallback:
+        raise HTTPException(status_code=404, detail=f"No precomputed neighbours for product: {product_id}")
+    
+    try:
+        results = await async_qdrant_service.recommend(positive_ids=[product_id], limit=limit)
+        return {"product_id": product_id, "results": results, "count": len(results), "source": "live"}
+    except ProductNotFound:
+        raise HTTPException(status_code=404, detail=f"Product not indexed: {product_id}")
+    except Exception as e:
+        logger.error(f"Similar products error: {e}")
+        raise HTTPException(status_code=500, detail=f"Similar products failed: {str(e)}")
+
+
+@router.get("/products/{product_id}/similar", dependencies=[Depends(request_budget)])
+async def similar_products(
+    product_id: str,
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    category: Optional[str] = Query(None, description="Filter by category words"),
+    price_min: Optional[float] = Query(None, description="Minimum price (inclusive)"),
+    price_max: Optional[float] = Query(None, description="Maximum price (inclusive)"),
+    tier: Optional[str] = Query(None, description="Latency tier: fast, balanced or precise")
+):
+    """
+    "More like this": products similar to an indexed product.
+    
+    Uses the product's stored vector directly (no image upload, no CLIP
+    inference), so the cost is a single index lookup.
+    
+    Returns:
+        Similar products (the product itself excluded), paginated with offset
+    """
+    try:
+        results = await async_qdrant_service.recommend(
+            positive_ids=[product_id],
+            limit=limit,
+            offset=offset,
+            category_filter=category,
+            price_min=price_min,
+            price_max=price_max,
+            tier=tier
+        )
+        return {"product_id": product_id, **_page(results, limit, offset)}
+        
+    except ProductNotFound:
+        raise HTTPException(status_code=404, detail=f"Product not indexed: {product_id}")
+    except InvalidSearchRequest as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Similar products error: {e}")
+        raise HTTPException(status_code=500, detail=f"Similar products failed: {str(e)}")
+
+
+@router.post("/recommend", dependencies=[Depends(request_budget)])
+async def recommend(request: RecommendRequest):
+    """
+    Recommendations from positive and negative example products.
+    
+    Runs Qdrant's recommend query on the stored vectors (no inference):
+    - average_vector: searches around the average of the positives minus the negatives
+    - best_score: scores each candidate against every example (works with negatives only)
+    
+    Accepts the same filters and tier as /search, plus offset pagination.
+    """
+    try:
+        results = await async_qdrant_service.recommend(
+            positive_ids=request.positive,
+            negative_ids=request.negative,
+            limit=request.limit,
+            offset=request.offset,
+            strategy=request.strategy,
+            score_threshold=request.score_threshold,
+            category_filter=request.category,
+            price_min=request.price_min,
+            price_max=request.price_max,
+            filters=request.filters,
+            tier=request.tier
+        )
+        return {
+            "positive": request.positive,
+            "negative": request.negative,
+            "strategy": request.strategy,
+            **_page(results, request.limit, request.offset)
+        }
+        
+    except ProductNotFound as e:
+        raise HTTPException(status_code=404, detail=f"Example product not indexed: {str(e)}")
+    except InvalidSearchRequest as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Recommend error: {e}")
+        raise HTTPException(status_code=500, detail=f"Recommend failed: {str(e)}")
+
+
+@router.post("/discover", dependencies=[Depends(request_budget)])
+async def discover(request: DiscoverRequest):
+    """
+    Discovery search from stored vectors.
+    
+    Returns products close to the target product while staying on the
+    positive side of every (positive, negative) context pair, e.g. "like
+    this dress, but more like A than B". Without a target, explores the
+    region the context pairs describe.
+    """
+    try:
+        results = await async_qdrant_service.discover(
+            target_id=request.target,
+            context=[(pair.positive, pair.negative) for pair in request.context],
+            limit=request.limit,
+            offset=request.offset,
+            category_filter=request.category,
+            price_min=request.price_min,
+            price_max=request.price_max,
+            filters=request.filters,
+            tier=request.tier
+        )
+        return {"target": request.target, **_page(results, request.limit, request.offset)}
+        
+    except ProductNotFound as e:
+        raise HTTPException(status_code=404, detail=f"Example product not indexed: {str(e)}")
+    except InvalidSearchRequest as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Discover error: {e}")
+        raise HTTPException(status_code=500, detail=f"Discover failed: {str(e)}")
 async def get_embedding(request: EmbedRequest):
     """Get CLIP text embedding vector."""
     try:
         if not request.text or len(request.text.strip()) == 0:
             raise HTTPException(status_code=400, detail="Text cannot be empty")
         
-        embedding = embedding_service.embed_text(request.text)
+        embedding = await text_batcher.submit(request.text)
         
         return {
             "text": request.text,
             "embedding": embedding,
             "dimension": len(embedding)
         }
+    except InferenceQueueFull as e:
+        raise _overloaded(e)
     except HTTPException:
         raise
     except Exception as e:
@@ -279,7 +761,7 @@ async def embed_image(file: UploadFile = File(...)):
         logger.info(f"Processing image: {file.filename} ({len(image_data)} bytes)")
         
         # Generate image embedding using CLIP
-        embedding = image_embedding_service.embed_image(image_data)
+        embedding = await image_batcher.submit(image_data)
         
         if not embedding:
             raise HTTPException(status_code=500, detail="Failed to process image")
@@ -290,6 +772,10 @@ async def embed_image(file: UploadFile = File(...)):
             "dimension": len(embedding),
             "model": "CLIP"
         }
+    except InferenceQueueFull as e:
+        raise _overloaded(e)
+    except ImageTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
@@ -310,7 +796,7 @@ async def index_product(
     try:
         # Generate embedding for full text
         full_text = f"{name} {description}"
-        embedding = embedding_service.embed_text(full_text)
+        embedding = await text_batcher.submit(full_text)
         
         if not embedding:
             raise HTTPException(status_code=500, detail="Failed to generate embedding")
@@ -323,7 +809,7 @@ async def index_product(
             metadata_dict = {}
         
         # Index in Qdrant
-        success, qdrant_id = get_qdrant_service().index_product(
+        success, qdrant_id = await async_qdrant_service.index_product(
             product_id=product_id,
             name=name,
             description=description,
@@ -342,31 +828,100 @@ async def index_product(
             "embedding_dimension": len(embedding)
         }
         
+    except InferenceQueueFull as e:
+        raise _overloaded(e)
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Indexing error: {e}")
         raise HTTPException(status_code=500, detail=f"Indexing failed: {str(e)}")
 
+MAX_BULK_PRODUCTS = 1000
+
+
+@router.post("/index-products/bulk")
+async def index_products_bulk(request: BulkIndexRequest):
+    """
+    Index many products in one request (catalogue loads).
+
+    Products without an embedding are embedded in shared CLIP passes. The
+    points go through the ingest buffer: batched upserts, several in flight.
+    Without wait the call returns once the products are queued; call
+    /index/flush at the end of the load to wait for every upsert.
+    """
+    if len(request.products) > MAX_BULK_PRODUCTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_PRODUCTS} products per request")
+    try:
+        to_embed = [product for product in request.products if not product.embedding]
+        embeddings = await text_batcher.submit_many(
+            [f"{product.name} {product.description}" for product in to_embed], return_exceptions=True
+        )
+        embedded = {id(product): embedding for product, embedding in zip(to_embed, embeddings)}
+
+        dimension = get_settings().embedding_dim
+        products, failed = [], []
+        for product in request.products:
+            embedding = product.embedding or embedded.get(id(product))
+            if not embedding or isinstance(embedding, BaseException) or len(embedding) != dimension:
+                failed.append(product.product_id)  # A wrong-size vector would fail its whole upsert
+                continue
+            products.append({
+                "product_id": product.product_id,
+                "name": product.name,
+                "description": product.description,
+                "embedding": embedding,
+                "metadata": product.metadata
+            })
+
+        queued = await async_qdrant_service.index_products(products, wait=request.wait)
+        return {
+            "status": "success" if not failed else "partial",
+            "queued": queued,
+            "acknowledged": request.wait,
+            "failed": failed,
+            "ingest": async_qdrant_service.ingest.get_stats()
+        }
+
+    except InferenceQueueFull as e:
+        raise _overloaded(e)
+    except Exception as e:
+        logger.error(f"Bulk indexing error: {e}")
+        raise HTTPException(status_code=500, detail=f"Bulk indexing failed: {str(e)}")
+
+@router.post("/index/flush")
+async def flush_index():
+    """Wait until every queued product is upserted; returns ingest throughput and failures."""
+    return await async_qdrant_service.ingest.flush()
+
 @router.get("/stats")
 async def get_stats():
     """Get collection statistics."""
     try:
-        stats = qdrant_service.get_collection_stats()
+        stats = await async_qdrant_service.get_collection_stats()
         return {
             "collection": stats,
+            "payloads": get_payload_stats(),
+            "qdrant_calls": get_guard().snapshot(),
+            "ingest": async_qdrant_service.ingest.get_stats(),
             "embedding_service": {
                 "type": "TF-IDF",
                 "model": "scikit-learn",
-                "dimension": embedding_service.get_dimension()
+                "dimension": get_settings().embedding_dim  # Not the service: building it loads CLIP
             }
         }
     except Exception as e:
         logger.error(f"Stats error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/search-image")
-async def search_by_image(file: UploadFile = File(...), limit: int = Query(10)):
+@router.post("/search-image", dependencies=[Depends(request_budget)])
+async def search_by_image(
+    file: UploadFile = File(...),
+    limit: int = Query(10),
+    category: Optional[str] = Query(None, description="Filter by category words"),
+    price_min: Optional[float] = Query(None, description="Minimum price (inclusive)"),
+    price_max: Optional[float] = Query(None, description="Maximum price (inclusive)"),
+    tier: Optional[str] = Query(None, description="Latency tier: fast, balanced or precise")
+):
     """
     Search for similar products by uploading an image.
     Uses CLIP model to extract image embeddings.
@@ -374,6 +929,10 @@ async def search_by_image(file: UploadFile = File(...), limit: int = Query(10)):
     Args:
         file: Image file (JPEG, PNG, etc.)
         limit: Maximum number of results to return
+        category: Optional category filter
+        price_min: Optional minimum price
+        price_max: Optional maximum price
+        tier: Optional latency tier
     
     Returns:
         List of similar products from database
@@ -396,17 +955,21 @@ async def search_by_image(file: UploadFile = File(...), limit: int = Query(10)):
         logger.info(f"Processing image: {file.filename} ({len(image_data)} bytes)")
         
         # Generate image embedding using CLIP
-        embedding = image_embedding_service.embed_image(image_data)
+        embedding = await image_batcher.submit(image_data)
         
         if not embedding:
             raise HTTPException(status_code=500, detail="Failed to process image")
         
         # Search similar products in Qdrant
         # For image search, use lower threshold (0.2) because image embeddings are different from text
-        search_results = qdrant_service.search(
+        search_results = await async_qdrant_service.search(
             query_vector=embedding,
             limit=limit,
-            score_threshold=0.2  # Lower threshold for image similarity
+            score_threshold=0.2,  # Lower threshold for image similarity
+            category_filter=category,
+            price_min=price_min,
+            price_max=price_max,
+            tier=tier
         )
         
         response = {
@@ -420,6 +983,12 @@ async def search_by_image(file: UploadFile = File(...), limit: int = Query(10)):
         logger.info(f"Image search returned {len(search_results)} results")
         return response
         
+    except InferenceQueueFull as e:
+        raise _overloaded(e)
+    except ImageTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except InvalidSearchRequest as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
@@ -500,15 +1069,12 @@ async def index_product_with_image(
         if not success:
             logger.warning("Redis queue unavailable - falling back to sync processing")
             # Fallback: process synchronously if Redis not available
-            image_embedding_service = get_image_embedding_service()
-            qdrant_service = get_qdrant_service()
-            
-            image_embedding = image_embedding_service.embed_image(image_data)
+            image_embedding = await image_batcher.submit(image_data)
             if not image_embedding:
                 raise HTTPException(status_code=500, detail="Failed to process image")
             
             metadata_dict["has_image"] = True
-            qdrant_success, qdrant_id = get_qdrant_service().index_product(
+            qdrant_success, qdrant_id = await async_qdrant_service.index_product(
                 product_id=product_id,
                 name=name,
                 description=description,
@@ -537,6 +1103,10 @@ async def index_product_with_image(
             "status_url": f"/api/v1/queue/status/{job_id}"
         }
         
+    except InferenceQueueFull as e:
+        raise _overloaded(e)
+    except ImageTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
@@ -702,6 +1272,73 @@ async def record_query_performance(
         logger.warning(f"Could not record query performance: {e}")
 
 
+@router.get("/performance/inference")
+async def inference_stats():
+    """
+    Get inference executor statistics per model (clip_text, clip_image, whisper).
+
+    Shows concurrency limit, calls in flight and queued, completed/failed/rejected
+    counts and average latency.
+    """
+    return inference_executor.get_stats()
+
+
+@router.get("/performance/models")
+async def model_stats():
+    """
+    Get model registry statistics.
+
+    Shows, per loaded model: refcount (services sharing it), memory used,
+    device, number of loads and idle time.
+    """
+    registry = get_model_registry()
+    return {
+        "models": registry.get_stats(),
+        "total_memory_mb": round(registry.total_memory_bytes() / 1024 / 1024, 1)
+    }
+
+
+@router.get("/performance/batching")
+async def batching_stats():
+    """
+    Get embedding micro-batching statistics.
+
+    Shows, per batcher (text and image):
+    - Number of batches and items embedded
+    - Average batch size and fill ratio (batch size / max batch size)
+    - Average queue wait and inference time
+    - Batch size histogram
+    """
+    return {
+        "text": text_batcher.get_stats(),
+        "image": image_batcher.get_stats()
+    }
+
+
+@router.get("/performance/startup")
+async def startup_stats():
+    """
+    Get the startup time breakdown.
+
+    Shows, per component (routes import, services init, model warmups):
+    status, duration and start offset since process start, plus the time
+    it took to become ready.
+    """
+    return startup_tracker.get_report()
+
+
+@router.get("/performance/cache")
+async def embedding_cache_stats():
+    """
+    Get embedding cache statistics.
+
+    Shows LRU entries, LRU/Redis hits, misses, hit rate and Redis errors.
+    """
+    return {
+        "image": get_image_embedding_cache().get_stats()
+    }
+
+
 # ============================================================================
 # VOICE SEARCH ENDPOINTS
 # ============================================================================
@@ -735,8 +1372,8 @@ async def voice_search(
         }
     """
     try:
-        # Get voice service
-        voice_service = get_voice_service(model_size="base")
+        # Get voice service (first call loads Whisper - keep it off the event loop)
+        voice_service = await inference_executor.run("whisper", get_voice_service, model_size="base")
         
         # Save audio file temporarily
         logger.info(f"Received voice search request: filename={audio_file.filename}, content_type={audio_file.content_type}")
@@ -749,7 +1386,9 @@ async def voice_search(
         logger.info(f"Saved to temp file: {tmp_audio_path}")
         
         # Transcribe audio
-        transcription_result = voice_service.transcribe(
+        transcription_result = await inference_executor.run(
+            "whisper",
+            voice_service.transcribe,
             tmp_audio_path,
             language=language,
         )
@@ -763,12 +1402,12 @@ async def voice_search(
         # Preprocess transcribed text for better search
         processed_text = TextPreprocessor.preprocess_query(transcript_text)
         
-        # Search using transcribed text (use global embedding_service and qdrant_service)
-        embedding = embedding_service.embed_text(processed_text)
+        # Search using transcribed text (shared text batcher and global qdrant_service)
+        embedding = await text_batcher.submit(processed_text)
         if not embedding:
             raise HTTPException(status_code=500, detail="Failed to generate embedding from transcribed text")
         
-        search_results = qdrant_service.search(
+        search_results = await async_qdrant_service.search(
             query_vector=embedding,
             limit=limit,
             score_threshold=0.3  # Intelligent threshold
@@ -805,6 +1444,10 @@ async def voice_search(
             "search_type": "voice",
         }
     
+    except InferenceQueueFull as e:
+        raise _overloaded(e)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Voice search error: {str(e)}", exc_info=True)
         raise HTTPException(
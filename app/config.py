@@ -16,6 +16,41 @@ class Settings(BaseSettings):
     qdrant_port: int = 6333
     qdrant_api_key: str = "your-api-key-here"
     qdrant_collection_name: str = "products"
+    qdrant_grpc_port: int = 6334
+    qdrant_prefer_grpc: bool = True  # Async search path: gRPC (protobuf) instead of HTTP/JSON
+    qdrant_pool_size: int = 4  # gRPC channels or HTTP keep-alive connections
+    qdrant_timeout: int = 10
+    qdrant_quantization: str = "scalar"  # none, scalar (int8) or binary; applied when a collection is created
+    qdrant_vectors_on_disk: bool = True  # float32 originals on disk when quantized (quantized copies stay in RAM)
+    qdrant_oversampling: float = 0.0  # Candidates per result before rescoring; 0 = per-mode default
+    qdrant_rescore: bool = True
+    search_tier: str = "balanced"  # Default latency tier: fast, balanced or precise
+    hnsw_ef: int = 0  # Balanced tier ef, written by app.tools.tune_hnsw_ef; 0 = server default
+    hnsw_ef_fast: int = 32
+    hnsw_ef_precise: int = 256
+    hnsw_ef_max: int = 1024  # Largest ef a request may ask for (hnsw_ef hint)
+    qdrant_collection_spec: str = "qdrant_config.yaml"  # Declarative collection spec (see provisioning)
+    qdrant_provision_update: bool = False  # Apply fixable spec drift at startup (else only reported)
+    qdrant_mode: str = "remote"  # remote (server), embedded (local mode on disk) or memory; see local_qdrant
+    qdrant_data_path: str = "/app/data/qdrant"  # Embedded mode storage directory
+    vector_index_route: str = "fallback"  # In-process index: off, fallback (Qdrant down) or auto; see vector_index
+    vector_index_path: str = "/app/data/vector_index"  # Built by app.tools.build_vector_index
+    vector_index_max_points: int = 200000  # auto route: largest catalogue served in-process
+    bm25_index_path: str = "/app/data/bm25_index"  # Keyword index of hybrid search, built by app.tools.build_bm25_index
+    payload_hydration: bool = True  # ID-only searches, display fields hydrated from the payload store
+    search_payload_fields: str = ""  # Extra payload fields returned with search hits (comma-separated)
+    payload_cache_size: int = 10000  # In-process LRU of product payloads
+    payload_cache_ttl: int = 300
+    request_budget_ms: int = 3000  # Search request time budget bounding its Qdrant calls (X-Request-Budget-Ms)
+    qdrant_breaker_failures: int = 5  # Consecutive failures that open the circuit breaker
+    qdrant_breaker_reset_s: float = 30.0  # Open time before a half-open probe
+    qdrant_hedge_delay_ms: int = 250  # Re-issue a slow read on another client after this; 0 = no hedging
+    ingest_batch_size: int = 256  # Points per buffered upsert
+    ingest_flush_ms: int = 200  # Max wait of a partial ingest batch
+    ingest_streams: int = 4  # Buffered upserts in flight
+    ingest_max_pending: int = 20000  # Queued points before producers wait
+    ingest_wait: bool = False  # Upsert acknowledged once durable (WAL), before indexing
+    payload_indexes: str = "category:text,price:float,product_id:keyword"  # field:type, indexed at provisioning
     
     # Redis
     redis_host: str = "redis"
@@ -28,6 +63,45 @@ class Settings(BaseSettings):
     embedding_dim: int = 512
     top_k: int = 10
     
+    # CLIP inference backend: "torch" (PyTorch eager) or "onnx" (ONNX Runtime, CPU)
+    clip_backend: str = "torch"
+    onnx_model_dir: str = "/app/data/onnx"
+    onnx_quantize: bool = True  # Dynamic int8 quantized graphs
+    onnx_num_threads: int = 0  # 0 = ONNX Runtime default
+    
+    # Embedding micro-batching
+    embedding_batch_max_size: int = 32
+    embedding_batch_window_ms: float = 5.0
+    search_batch_max_queries: int = 64  # Queries per /search/batch call
+    image_embedding_batch_size: int = 16
+    image_decode_workers: int = 4
+    image_max_pixels: int = 40_000_000  # Decoded pixel cap (after JPEG draft reduction)
+    
+    # Precomputed similar products (app.tools.build_similar_products)
+    similar_products_k: int = 20
+    similar_products_track_changes: bool = True  # Indexing flags products for incremental refresh
+    
+    # Embedding cache (content-addressed: in-process LRU + shared Redis)
+    embedding_cache_max_entries: int = 10000
+    embedding_cache_lru_ttl_seconds: float = 3600
+    embedding_cache_ttl_seconds: int = 604800  # 7 days (Redis)
+    embedding_cache_version: str = "1"  # Bump to invalidate every cached embedding
+    embedding_cache_dtype: str = "float16"  # Redis storage: float16 or float32
+    embedding_cache_redis: bool = True
+    
+    # Inference executor (per-model concurrency limits, bounded queues)
+    clip_text_inference_concurrency: int = 1
+    clip_image_inference_concurrency: int = 1
+    whisper_inference_concurrency: int = 1
+    inference_max_queue: int = 64
+    
+    # Model registry: unload models idle for this many seconds (0 = never)
+    model_idle_unload_seconds: int = 0
+    
+    # Startup: warm models up in the background before reporting ready
+    startup_warmup: bool = True
+    startup_warmup_whisper: bool = False  # Whisper is optional for readiness
+    
     # Cache
     cache_ttl: int = 3600
     
@@ -1,36 +1,73 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from pathlib import Path
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
-from fastapi.staticfiles import StaticFiles
-from app.config import get_settings
-from app.api.routes import router
-from app.dependencies import initialize_services
-from app.utils.logger import setup_logger
+from app.services.startup import get_startup_tracker
+
+# Created first so the startup report covers the imports below
+startup_tracker = get_startup_tracker()
+
+with startup_tracker.stage("framework_import"):
+    from fastapi import FastAPI
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import JSONResponse, FileResponse
+    from fastapi.staticfiles import StaticFiles
+    from app.config import get_settings
+    from app.utils.logger import setup_logger
+
+with startup_tracker.stage("routes_import"):
+    from app.api.routes import router
+    from app.dependencies import initialize_services
+    from app.services.async_qdrant import get_async_qdrant_service
+    from app.services.inference_executor import get_inference_executor
+    from app.services.model_registry import get_model_registry
 
 # Setup logger
 logger = setup_logger(__name__)
 
 settings = get_settings()
 
+async def _unload_idle_models_periodically(max_idle_seconds: int):
+    """Background task: free memory of models nobody used recently."""
+    while True:
+        await asyncio.sleep(max(30, max_idle_seconds // 4))
+        # Off the event loop: unload_idle waits for models being loaded
+        unloaded = await asyncio.to_thread(get_model_registry().unload_idle, max_idle_seconds)
+        if unloaded:
+            logger.info(f"Unloaded idle models: {', '.join(unloaded)}")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown"""
     # Startup
     logger.info("Starting up application...")
     try:
-        initialize_services()
+        with startup_tracker.stage("services_init"):
+            initialize_services()
         logger.info("Application started successfully")
     except Exception as e:
         logger.error(f"Startup error: {e}")
         raise
     
+    # Live now; ready once the background warmups finish (see /api/v1/ready)
+    startup_tracker.mark_startup_complete()
+    warmup = asyncio.create_task(startup_tracker.run_warmups())
+    
+    idle_unloader = None
+    if settings.model_idle_unload_seconds > 0:
+        idle_unloader = asyncio.create_task(
+            _unload_idle_models_periodically(settings.model_idle_unload_seconds)
+        )
+    
     yield
     
     # Shutdown
     logger.info("Shutting down application...")
+    warmup.cancel()
+    if idle_unloader is not None:
+        idle_unloader.cancel()
+    get_inference_executor().shutdown()
+    await get_async_qdrant_service().close()
 
 # Create FastAPI app
 app = FastAPI(
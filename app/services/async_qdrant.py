@@ -0,0 +1,629 @@
+"""
+Async Qdrant service for the API routes.
+
+Same operations and result format as IntegratedQdrantService (the request
+and response builders are shared), but built on AsyncQdrantClient so a
+vector search never blocks the event loop. Transport is configurable:
+- gRPC (default): vectors travel as packed protobuf floats instead of JSON
+  text, over persistent HTTP/2 channels (QDRANT_POOL_SIZE channels,
+  round-robin, with keepalive)
+- HTTP: one keep-alive connection pool of QDRANT_POOL_SIZE connections
+
+Usage:
+    qdrant = get_async_qdrant_service()
+    results = await qdrant.search(query_vector, limit=10)
+"""
+import asyncio
+import itertools
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import (
+    ContextPair,
+    ContextQuery,
+    DiscoverInput,
+    DiscoverQuery,
+    QueryRequest,
+    RecommendInput,
+    RecommendQuery,
+    RecommendStrategy,
+)
+
+from app.services.collection_migration import mark_migration_changes
+from app.services.ingest_buffer import IngestBuffer
+from app.services.integrated_qdrant import (
+    build_product_point,
+    format_search_results,
+)
+from app.services.local_qdrant import ThreadedAsyncClient, get_local_client, qdrant_mode
+from app.services.payload_store import (
+    DISPLAY_FIELDS,
+    async_hydrate_results,
+    get_payload_store,
+    hydration_enabled,
+    payload_traffic,
+    search_payload_bytes,
+    search_payload_selector,
+)
+from app.services.point_ids import product_point_id
+from app.services.provisioning import async_provision_serving_collection, load_collection_spec, serving_alias
+from app.services.resilience import get_guard, is_not_found
+from app.services.search_filters import InvalidSearchRequest, build_search_filter
+from app.services.search_params import build_search_params
+from app.services.similar_products import mark_products_changed
+from app.services.vector_index import (
+    fallback_vector_index,
+    primary_vector_index,
+    search_vector_index,
+    vector_index_route,
+)
+
+logger = logging.getLogger(__name__)
+
+RECOMMEND_STRATEGIES = {
+    "average_vector": RecommendStrategy.AVERAGE_VECTOR,
+    "best_score": RecommendStrategy.BEST_SCORE,
+}
+
+# Keep idle gRPC channels open through proxies/NAT
+GRPC_KEEPALIVE_OPTIONS = {
+    "grpc.keepalive_time_ms": 30000,
+    "grpc.keepalive_timeout_ms": 10000,
+    "grpc.keepalive_permit_without_calls": 1,
+    "grpc.http2.max_pings_without_data": 0,
+}
+
+
+class ProductNotFound(LookupError):
+    """An example product of a recommendation query is not indexed."""
+
+
+def create_async_client(host: str, port: int, grpc_port: int, prefer_grpc: bool,
+                        pool_size: int, timeout: int) -> AsyncQdrantClient:
+    """Build an AsyncQdrantClient for one transport (gRPC channel or HTTP pool)."""
+    if prefer_grpc:
+        return AsyncQdrantClient(
+            host=host,
+            port=port,
+            grpc_port=grpc_port,
+            prefer_grpc=True,
+            https=False,
+            timeout=timeout,
+            grpc_options=dict(GRPC_KEEPALIVE_OPTIONS),
+            check_compatibility=False  # Would do a blocking request at construction
+        )
+    return AsyncQdrantClient(
+        host=host,
+        port=port,
+        prefer_grpc=False,
+        https=False,
+        timeout=timeout,
+        limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        check_compatibility=False
+    )
+
+
+class AsyncIntegratedQdrantService:
+    """Non-blocking Qdrant access with a persistent gRPC/HTTP transport."""
+
+    def __init__(self, host: str, port: int, grpc_port: int, collection_name: str,
+                 prefer_grpc: bool = True, pool_size: int = 4, timeout: int = 10,
+                 mode: str = "remote"):
+        """
+        Initialize the service (clients are created lazily on the running event loop).
+
+        Args:
+            host: Qdrant host
+            port: Qdrant HTTP port
+            grpc_port: Qdrant gRPC port
+            collection_name: Products collection (addressed through its serving alias)
+            prefer_grpc: Use gRPC instead of HTTP/JSON
+            pool_size: gRPC channels (round-robin) or HTTP keep-alive connections
+            timeout: Request timeout in seconds
+            mode: remote, or embedded/memory to use the in-process local client
+        """
+        self.host = host
+        self.port = port
+        self.grpc_port = grpc_port
+        self.spec_name = collection_name
+        self.collection_name = serving_alias(collection_name)
+        self.prefer_grpc = prefer_grpc
+        self.pool_size = max(1, pool_size)
+        self.timeout = timeout
+        self.mode = mode
+
+        self._clients: List[AsyncQdrantClient] = []
+        self._next_client = None
+        self._initialized = False
+        self._init_lock: Optional[asyncio.Lock] = None
+        self._ingest: Optional[IngestBuffer] = None
+
+    @property
+    def transport(self) -> str:
+        if self.mode != "remote":
+            return self.mode
+        return "grpc" if self.prefer_grpc else "http"
+
+    def _client(self) -> AsyncQdrantClient:
+        """Next client of the pool (one HTTP client, or round-robin gRPC channels)."""
+        return next(self._next_client)
+
+    async def _ensure_initialized(self) -> None:
+        """Create the clients and the collection on first use."""
+        if self._initialized:
+            return
+        if self._init_lock is None:
+            self._init_lock = asyncio.Lock()
+
+        async with self._init_lock:
+            if self._initialized:
+                return
+
+            if self._clients:
+                pass  # A previous initialization failed after creating them
+            elif self.mode != "remote":
+                self._clients = [ThreadedAsyncClient(get_local_client())]
+            else:
+                channels = self.pool_size if self.prefer_grpc else 1
+                self._clients = [
+                    create_async_client(self.host, self.port, self.grpc_port, self.prefer_grpc,
+                                        self.pool_size, self.timeout)
+                    for _ in range(channels)
+                ]
+            self._next_client = itertools.cycle(self._clients)
+
+            # Create the collection from its spec, or reconcile it (see provisioning)
+            from app.config import get_settings
+            await get_guard().call("provision", lambda: async_provision_serving_collection(
+                self._clients[0],
+                load_collection_spec(self.spec_name),
+                update=get_settings().qdrant_provision_update
+            ), use_budget=False)
+
+            self._initialized = True
+            logger.info(
+                f"✅ Async Qdrant ready at {self.host} "
+                f"({self.transport}, pool={self.pool_size}, collection={self.collection_name})"
+            )
+
+    @property
+    def ingest(self) -> IngestBuffer:
+        """Buffer turning index_product calls into batched upserts (configured from settings)."""
+        if self._ingest is None:
+            from app.config import get_settings
+            settings = get_settings()
+            self._ingest = IngestBuffer(
+                self.upsert_points,
+                name=self.collection_name,
+                max_batch_size=settings.ingest_batch_size,
+                max_wait_ms=settings.ingest_flush_ms,
+                streams=settings.ingest_streams,
+                max_pending=settings.ingest_max_pending
+            )
+        return self._ingest
+
+    async def upsert_points(self, points: List[Any]) -> None:
+        """
+        Upsert a batch of product points (the ingest buffer's flush).
+
+        Each call takes the next client of the pool, so batches in flight are
+        spread over the gRPC channels. With INGEST_WAIT off, Qdrant answers
+        once the points are durable and indexes them in the background.
+        """
+        await self._ensure_initialized()
+        from app.config import get_settings
+        wait = get_settings().ingest_wait
+        await get_guard().call("upsert", lambda: self._client().upsert(
+            collection_name=self.collection_name, points=points, wait=wait
+        ), use_budget=False)
+        product_ids = [point.payload["product_id"] for point in points]
+        await asyncio.to_thread(mark_products_changed, product_ids)  # Similar-products refresh
+        await asyncio.to_thread(mark_migration_changes, product_ids)  # Re-embedding catch-up
+        await asyncio.to_thread(get_payload_store().set_many, {point.payload["product_id"]: point.payload for point in points})
+
+    async def index_product(self, product_id: str, name: str, description: str,
+                            embedding: List[float], metadata: Dict = None,
+                            wait: bool = True) -> Tuple[bool, Optional[str]]:
+        """
+        Index a product with embedding. Returns (success: bool, qdrant_id: str or None)
+
+        The point goes through the ingest buffer: concurrent calls share one
+        upsert, and the call returns once that upsert is acknowledged (or,
+        without wait, once queued: flush the ingest buffer after a batch).
+        """
+        try:
+            point = build_product_point(product_id, name, description, embedding, metadata)
+            await self.ingest.submit(point, wait=wait)
+
+            logger.info(f"{'Indexed' if wait else 'Queued'} product: {product_id} with Qdrant ID: {point.id}")
+            return True, point.id
+
+        except Exception as e:
+            logger.error(f"Failed to index product {product_id}: {e}")
+            return False, None
+
+    async def index_products(self, products: List[Dict[str, Any]], wait: bool = False) -> int:
+        """
+        Queue many products for indexing (bulk loads).
+
+        Args:
+            products: Dicts with product_id, name, description, embedding and optional metadata
+            wait: Return once every batch is acknowledged (otherwise once queued;
+                the ingest buffer's flush waits for them)
+
+        Returns:
+            Number of products queued
+
+        Raises:
+            Exception: The first upsert error (wait only)
+        """
+        points = [
+            build_product_point(product["product_id"], product.get("name", ""), product.get("description", ""),
+                                product["embedding"], product.get("metadata"))
+            for product in products
+        ]
+        await self.ingest.submit_many(points, wait=wait)
+        return len(points)
+
+    async def search(self, query_vector: List[float], limit: int = 10,
+                     score_threshold: float = 0.3,
+                     category_filter: str = None,
+                     min_score: float = None,
+                     price_min: float = None,
+                     price_max: float = None,
+                     filters: Dict[str, Any] = None,
+                     tier: str = None,
+                     hnsw_ef: int = None,
+                     exact: bool = False,
+                     hydrate: bool = True) -> List[Dict]:
+        """
+        Search for similar products (same arguments and results as IntegratedQdrantService.search).
+
+        With hydrate=False and payload hydration on, results only carry IDs,
+        scores and SEARCH_PAYLOAD_FIELDS: call hydrate() on the final ones.
+
+        Returns:
+            List of search results sorted by score
+
+        Raises:
+            InvalidSearchRequest: If a filter or search hint is invalid
+        """
+        query_filter = build_search_filter(category_filter, price_min, price_max, filters)
+        search_params = build_search_params(tier, hnsw_ef, exact)
+
+        # Use min_score if provided (backward compatibility)
+        if min_score is not None:
+            score_threshold = min_score
+
+        # Small catalogue: exact search in-process, no network round trip (see vector_index).
+        # Resolving the index may reload a build from disk: done in the thread too
+        local_args = (query_vector, limit, score_threshold, category_filter, price_min, price_max)
+        if vector_index_route() == "auto":
+            local_results = await asyncio.to_thread(search_vector_index, primary_vector_index, filters, *local_args)
+            if local_results is not None:
+                return local_results
+
+        try:
+            await self._ensure_initialized()
+
+            response = await get_guard().call("search", lambda: self._client().query_points(
+                collection_name=self.collection_name,
+                query=query_vector,
+                query_filter=query_filter,
+                limit=limit,
+                score_threshold=score_threshold,
+                search_params=search_params,
+                with_payload=search_payload_selector()
+            ), hedge=True)
+
+            search_results = await self._results(response.points, hydrate)
+            logger.info(f"Search returned {len(search_results)} results (threshold={score_threshold})")
+            return search_results
+
+        except Exception as e:
+            logger.error(f"Search failed: {e}")
+            if vector_index_route() != "off":
+                local_results = await asyncio.to_thread(
+                    search_vector_index, fallback_vector_index, filters, *local_args
+                )
+                if local_results is not None:
+                    logger.warning(f"Served {len(local_results)} results from the local vector index")
+                    return local_results
+            return []
+
+    async def _fetch_payloads(self, product_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Full payloads of products from Qdrant (payload store misses)."""
+        points = await get_guard().call("retrieve", lambda: self._client().retrieve(
+            collection_name=self.collection_name,
+            ids=[product_point_id(product_id) for product_id in product_ids],
+            with_payload=["product_id", *DISPLAY_FIELDS]
+        ), hedge=True)
+        return {str(point.payload["product_id"]): point.payload for point in points if point.payload}
+
+    async def _hydrate(self, results: List[Dict], force: bool = False) -> int:
+        """Fill display fields of results (see payload_store). Returns bytes fetched from Qdrant."""
+        if not results or not (force or hydration_enabled()):
+            return 0
+        try:
+            return await async_hydrate_results(results, self._fetch_payloads)
+        except Exception as e:
+            logger.warning(f"Could not hydrate search results: {e}")
+            return 0
+
+    async def _results(self, points, hydrate: bool = True) -> List[Dict]:
+        """API results of search hits, hydrated; counts the payload bytes moved."""
+        results = format_search_results(points)
+        fetched = await self._hydrate(results) if hydrate else 0
+        payload_traffic.record(search_payload_bytes(points), fetched)
+        return results
+
+    async def hydrate(self, results: List[Dict], force: bool = False) -> List[Dict]:
+        """
+        Fill the display fields of results from search(hydrate=False).
+
+        Args:
+            results: Final results (e.g. after hybrid fusion)
+            force: Also with PAYLOAD_HYDRATION off (results that never had a payload)
+
+        Returns:
+            The same results, hydrated in place
+        """
+        try:
+            await self._ensure_initialized()
+        except Exception as e:
+            logger.warning(f"Could not hydrate search results: {e}")
+            return results
+        payload_traffic.record(hydration_bytes=await self._hydrate(results, force), queries=0)
+        return results
+
+    async def search_batch(self, searches: List[Dict[str, Any]]) -> List[List[Dict]]:
+        """
+        Run several searches in one Qdrant request (query_batch_points).
+
+        Args:
+            searches: One dict per search with the keyword arguments of search()
+                (query_vector required; limit, score_threshold, category_filter,
+                price_min, price_max, filters, tier, hnsw_ef, exact optional)
+
+        Returns:
+            One result list per search, in the same order
+
+        Raises:
+            InvalidSearchRequest: If a filter or search hint is invalid
+        """
+        requests = [
+            QueryRequest(
+                query=search["query_vector"],
+                filter=build_search_filter(search.get("category_filter"), search.get("price_min"),
+                                           search.get("price_max"), search.get("filters")),
+                params=build_search_params(search.get("tier"), search.get("hnsw_ef"), search.get("exact", False)),
+                limit=search.get("limit", 10),
+                score_threshold=search.get("score_threshold", 0.3),
+                with_payload=search_payload_selector()
+            )
+            for search in searches
+        ]
+        if not requests:
+            return []
+
+        try:
+            await self._ensure_initialized()
+            responses = await get_guard().call("search_batch", lambda: self._client().query_batch_points(
+                collection_name=self.collection_name,
+                requests=requests
+            ), hedge=True)
+            results = [format_search_results(response.points) for response in responses]
+            fetched = await self._hydrate([result for items in results for result in items])
+            payload_traffic.record(sum(search_payload_bytes(response.points) for response in responses),
+                                   fetched, queries=len(requests))
+            logger.info(f"Batch search: {len(requests)} queries, {sum(len(r) for r in results)} results")
+            return results
+
+        except Exception as e:
+            logger.error(f"Batch search failed: {e}")
+            return [[] for _ in requests]
+
+    async def _missing_products(self, product_ids: List[str]) -> List[str]:
+        """Products of the list that are not indexed."""
+        points = await get_guard().call("retrieve", lambda: self._client().retrieve(
+            collection_name=self.collection_name,
+            ids=[product_point_id(product_id) for product_id in product_ids],
+            with_payload=False
+        ))
+        found = {str(point.id) for point in points}
+        return [product_id for product_id in product_ids if str(product_point_id(product_id)) not in found]
+
+    async def _query_by_examples(self, query, example_ids: List[str], limit: int, offset: int,
+                                 score_threshold: Optional[float], category_filter: str, price_min: float,
+                                 price_max: float, filters: Optional[Dict[str, Any]], tier: str) -> List[Dict]:
+        """Run a recommend/discover query on stored vectors (no embedding involved)."""
+        query_filter = build_search_filter(category_filter, price_min, price_max, filters)
+        search_params = build_search_params(tier)
+        if offset < 0:
+            raise InvalidSearchRequest(f"offset must be >= 0, got {offset}")
+
+        try:
+            await self._ensure_initialized()
+            response = await get_guard().call("recommend", lambda: self._client().query_points(
+                collection_name=self.collection_name,
+                query=query,
+                query_filter=query_filter,
+                limit=limit,
+                offset=offset,
+                score_threshold=score_threshold,
+                search_params=search_params,
+                with_payload=search_payload_selector()
+            ), hedge=True)
+            return await self._results(response.points)
+
+        except Exception as e:
+            if is_not_found(e):
+                raise ProductNotFound(str(e)) from e
+            if isinstance(e, ValueError) and self.mode != "remote":
+                # The local client rejects unknown example points with a ValueError
+                missing = await self._missing_products(example_ids)
+                if missing:
+                    raise ProductNotFound(f"Products not indexed: {', '.join(missing)}") from e
+            logger.error(f"Recommendation query failed: {e}")
+            return []
+
+    async def recommend(self, positive_ids: List[str], negative_ids: List[str] = None,
+                        limit: int = 10, offset: int = 0,
+                        strategy: str = "average_vector",
+                        score_threshold: float = None,
+                        category_filter: str = None,
+                        price_min: float = None,
+                        price_max: float = None,
+                        filters: Dict[str, Any] = None,
+                        tier: str = None) -> List[Dict]:
+        """
+        Products similar to positive examples and unlike negative ones, from their stored vectors.
+
+        Args:
+            positive_ids: Product IDs to move towards
+            negative_ids: Product IDs to move away from
+            limit: Max number of results
+            offset: Results to skip (pagination)
+            strategy: average_vector (one query vector) or best_score (each example scored
+                separately; allows negatives only)
+            score_threshold: Optional minimum score
+            category_filter: Optional category filter
+            price_min: Optional minimum price
+            price_max: Optional maximum price
+            filters: Optional filters on other payload fields
+            tier: Latency tier (see search_params)
+
+        Returns:
+            Results (the examples themselves excluded), same format as search()
+
+        Raises:
+            InvalidSearchRequest: On invalid examples, strategy, filters or hints
+            ProductNotFound: If an example product is not indexed
+        """
+        negative_ids = negative_ids or []
+        if strategy not in RECOMMEND_STRATEGIES:
+            raise InvalidSearchRequest(
+                f"Unknown strategy '{strategy}' (expected one of {', '.join(RECOMMEND_STRATEGIES)})"
+            )
+        if not positive_ids and not (negative_ids and strategy == "best_score"):
+            raise InvalidSearchRequest("At least one positive product is required (or negatives with best_score)")
+
+        query = RecommendQuery(
+            recommend=RecommendInput(
+                positive=[product_point_id(product_id) for product_id in positive_ids],
+                negative=[product_point_id(product_id) for product_id in negative_ids],
+                strategy=RECOMMEND_STRATEGIES[strategy]
+            )
+        )
+        return await self._query_by_examples(query, positive_ids + negative_ids, limit, offset, score_threshold,
+                                             category_filter, price_min, price_max, filters, tier)
+
+    async def discover(self, target_id: Optional[str], context: List[Tuple[str, str]],
+                       limit: int = 10, offset: int = 0,
+                       category_filter: str = None,
+                       price_min: float = None,
+                       price_max: float = None,
+                       filters: Dict[str, Any] = None,
+                       tier: str = None) -> List[Dict]:
+        """
+        Discovery search: close to a target product, inside the region set by context pairs.
+
+        Args:
+            target_id: Product to search around (None: context-only exploration)
+            context: (positive_id, negative_id) pairs; results are on the positive side of each
+            limit: Max number of results
+            offset: Results to skip (pagination)
+            category_filter: Optional category filter
+            price_min: Optional minimum price
+            price_max: Optional maximum price
+            filters: Optional filters on other payload fields
+            tier: Latency tier (see search_params)
+
+        Returns:
+            Results, same format as search()
+
+        Raises:
+            InvalidSearchRequest: On invalid examples, filters or hints
+            ProductNotFound: If an example product is not indexed
+        """
+        if not context:
+            raise InvalidSearchRequest("At least one context pair is required")
+
+        pairs = [
+            ContextPair(positive=product_point_id(positive), negative=product_point_id(negative))
+            for positive, negative in context
+        ]
+        if target_id is None:
+            query = ContextQuery(context=pairs)
+        else:
+            query = DiscoverQuery(discover=DiscoverInput(target=product_point_id(target_id), context=pairs))
+        example_ids = [product_id for pair in context for product_id in pair]
+        if target_id is not None:
+            example_ids.append(target_id)
+        return await self._query_by_examples(query, example_ids, limit, offset, None,
+                                             category_filter, price_min, price_max, filters, tier)
+
+    async def get_collection_stats(self) -> Dict:
+        """Get collection statistics."""
+        try:
+            await self._ensure_initialized()
+            collection_info = await get_guard().call(
+                "get_collection", lambda: self._client().get_collection(self.collection_name)
+            )
+            return {
+                "name": self.collection_name,
+                "points_count": collection_info.points_count,
+                "vectors_count": collection_info.vectors_count,
+                "segment_count": getattr(collection_info, 'segments_count', 0),
+                "transport": self.transport
+            }
+        except Exception as e:
+            logger.error(f"Failed to get collection stats: {e}")
+            return {}
+
+    async def health_check(self) -> bool:
+        """Check if Qdrant is healthy."""
+        try:
+            await self._ensure_initialized()
+            await get_guard().call("health", lambda: self._client().get_collections())
+            return True
+        except Exception as e:
+            logger.error(f"Qdrant health check failed: {e}")
+            return False
+
+    async def close(self) -> None:
+        """Send buffered points, then close every channel/connection pool."""
+        if self._ingest is not None:
+            await self._ingest.flush()
+        for client in self._clients:
+            try:
+                await client.close()
+            except Exception as e:
+                logger.warning(f"Error closing Qdrant client: {e}")
+        self._clients = []
+        self._initialized = False
+
+
+# Singleton instance
+_async_qdrant_service: Optional[AsyncIntegratedQdrantService] = None
+
+
+def get_async_qdrant_service() -> AsyncIntegratedQdrantService:
+    """Get singleton async Qdrant service (configured from settings)."""
+    global _async_qdrant_service
+    if _async_qdrant_service is None:
+        from app.config import get_settings
+        settings = get_settings()
+        _async_qdrant_service = AsyncIntegratedQdrantService(
+            host=settings.qdrant_host,
+            port=settings.qdrant_port,
+            grpc_port=settings.qdrant_grpc_port,
+            collection_name=settings.qdrant_collection_name,
+            prefer_grpc=settings.qdrant_prefer_grpc,
+            pool_size=settings.qdrant_pool_size,
+            timeout=settings.qdrant_timeout,
+            mode=qdrant_mode()
+        )
+    return _async_qdrant_service
@@ -1,105 +1,368 @@
 """
 BM25 keyword search service for hybrid search
 BM25 is a probabilistic retrieval model that ranks documents based on query terms
+
+The index is an inverted index in compact arrays (CSR layout):
+- offsets    int64, postings of term t are rows offsets[t]:offsets[t + 1]
+- doc_ids    int32, documents of each postings list, ascending
+- impacts    float32, BM25 term-frequency part per posting, with the
+             document-length norm already applied:
+             tf * (k1 + 1) / (tf + k1 * (1 - b + b * doc_len / avgdl))
+- idf        float32 per term (Okapi IDF, same as rank_bm25.BM25Okapi)
+- max_impact float32 per term, upper bound of its impacts
+
+Queries use MaxScore pruning: terms are processed from the highest score
+bound down, and once the bound of the remaining terms is below the current
+k-th best score, their (long, low-IDF) postings lists are only probed for
+the candidates found so far instead of being scanned. Latency then follows
+the postings of the rare query terms, not the catalogue size. Results equal
+exhaustive BM25 scoring.
+
+Built from the products collection by app.tools.build_bm25_index and stored
+like the local vector index (build directories, CURRENT pointer, memory-
+mapped arrays); the API picks up new builds on its own.
 """
+import json
 import logging
-from typing import List, Dict, Tuple
-from rank_bm25 import BM25Okapi
+import os
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.vector_index import current_build, new_build, publish_build
 
 logger = logging.getLogger(__name__)
 
+ARRAYS = ("offsets", "doc_ids", "impacts", "idf", "max_impact", "doc_lengths")
+
+# Payload fields indexed for keywords
+TEXT_FIELDS = ("name", "category", "description")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase whitespace tokens."""
+    return str(text).lower().split()
+
+
+def product_tokens(product: Dict[str, Any]) -> List[str]:
+    """Tokens of a product: name, category and description."""
+    return tokenize(" ".join(str(product.get(field) or "") for field in TEXT_FIELDS))
+
+
+class BM25Index:
+    """Inverted index with precomputed BM25 impacts and MaxScore top-k search."""
+
+    def __init__(self, vocabulary: Dict[str, int], arrays: Dict[str, np.ndarray]):
+        """
+        Initialize from built arrays (see build or load).
+
+        Args:
+            vocabulary: term -> term id
+            arrays: offsets, doc_ids, impacts, idf, max_impact, doc_lengths
+        """
+        self.vocabulary = vocabulary
+        self.offsets = arrays["offsets"]
+        self.doc_ids = arrays["doc_ids"]
+        self.impacts = arrays["impacts"]
+        self.idf = arrays["idf"]
+        self.max_impact = arrays["max_impact"]
+        self.doc_lengths = arrays["doc_lengths"]
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    @classmethod
+    def build(cls, documents: Sequence[Sequence[str]], k1: float = 1.5, b: float = 0.75,
+              epsilon: float = 0.25) -> "BM25Index":
+        """
+        Build the index of tokenized documents.
+
+        Args:
+            documents: Tokens per document (document i is doc id i)
+            k1: Term frequency saturation
+            b: Document length normalization
+            epsilon: Floor of negative IDFs, as a fraction of the mean IDF (rank_bm25 semantics)
+
+        Returns:
+            BM25Index
+        """
+        vocabulary: Dict[str, int] = {}
+        term_ids: List[int] = []
+        posting_docs: List[int] = []
+        frequencies: List[int] = []
+        doc_lengths = np.zeros(len(documents), dtype=np.int32)
+
+        for doc_id, tokens in enumerate(documents):
+            doc_lengths[doc_id] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+                posting_docs.append(doc_id)
+                frequencies.append(tf)
+
+        terms = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(terms, kind="stable")  # Documents stay ascending within a term
+        document_frequency = np.bincount(terms, minlength=len(vocabulary))
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(document_frequency, out=offsets[1:])
+
+        doc_ids = np.asarray(posting_docs, dtype=np.int32)[order]
+        tf = np.asarray(frequencies, dtype=np.float64)[order]
+        count = max(len(documents), 1)
+        avgdl = max(float(doc_lengths.sum()) / count, 1e-9)
+        norms = k1 * (1 - b + b * doc_lengths.astype(np.float64) / avgdl)
+        impacts = (tf * (k1 + 1) / (tf + norms[doc_ids])).astype(np.float32)
+
+        idf = np.log(count - document_frequency + 0.5) - np.log(document_frequency + 0.5)
+        if len(idf):
+            idf[idf < 0] = epsilon * idf.mean()
+        max_impact = np.zeros(len(vocabulary), dtype=np.float32)
+        if len(impacts):
+            max_impact = np.maximum.reduceat(impacts, offsets[:-1]).astype(np.float32)
+
+        return cls(vocabulary, {
+            "offsets": offsets,
+            "doc_ids": doc_ids,
+            "impacts": impacts,
+            "idf": idf.astype(np.float32),
+            "max_impact": max_impact,
+            "doc_lengths": doc_lengths
+        })
+
+    def search(self, tokens: Sequence[str], limit: int = 10,
+               min_score: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top documents of a query (MaxScore pruning).
+
+        Args:
+            tokens: Query tokens (repeated tokens count repeatedly)
+            limit: Max results
+            min_score: Minimum score
+
+        Returns:
+            (doc ids, scores), best first (ties by doc id)
+        """
+        counts = Counter(token for token in tokens if token in self.vocabulary)
+        empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64))
+        if not counts or limit <= 0:
+            return empty
+
+        terms = np.array([self.vocabulary[token] for token in counts], dtype=np.int64)
+        weights = np.array(list(counts.values()), dtype=np.float64) * self.idf[terms]
+        keep = weights != 0
+        terms, weights = terms[keep], weights[keep]
+        bounds = weights * self.max_impact[terms]
+        pruning = bool((weights > 0).all())  # Bounds only hold without negative contributions
+
+        order = np.argsort(-bounds, kind="stable")
+        # remaining[i]: best score a document can still gain from terms order[i:]
+        remaining = np.append(np.cumsum(bounds[order][::-1])[::-1], 0.0) + 1e-9
+
+        candidates = np.zeros(0, dtype=np.int64)
+        scores = np.zeros(0, dtype=np.float64)
+        threshold = min_score
+        for position, term_index in enumerate(order):
+            term = terms[term_index]
+            start, end = self.offsets[term], self.offsets[term + 1]
+            docs = self.doc_ids[start:end]
+
+            if pruning and remaining[position] < threshold:
+                # No unseen document can reach the threshold: probe candidates only
+                found = np.searchsorted(docs, candidates)
+                hit = found < len(docs)
+                hit[hit] = docs[found[hit]] == candidates[hit]
+                scores[hit] += self.impacts[start + found[hit]] * weights[term_index]
+            else:
+                gains = self.impacts[start:end] * weights[term_index]
+                merged, inverse = np.unique(np.concatenate([candidates, docs]), return_inverse=True)
+                scores = np.bincount(inverse, weights=np.concatenate([scores, gains]), minlength=len(merged))
+                candidates = merged
+
+            if not pruning:
+                continue
+            if len(scores) >= limit:
+                threshold = max(threshold, float(np.partition(scores, len(scores) - limit)[len(scores) - limit]))
+            viable = scores + remaining[position + 1] >= threshold
+            candidates, scores = candidates[viable], scores[viable]
+
+        selected = scores >= min_score
+        candidates, scores = candidates[selected], scores[selected]
+        ranked = np.lexsort((candidates, -scores))[:limit]
+        return candidates[ranked], scores[ranked]
+
+    def save(self, directory: str, product_ids: Sequence[str], source: Optional[str] = None) -> str:
+        """
+        Write a new build and make it current.
+
+        Args:
+            directory: Index root directory
+            product_ids: Product ID of each document
+            source: Source collection name (recorded in the manifest)
+
+        Returns:
+            Path of the new build
+        """
+        name, path = new_build(directory)
+        for array in ARRAYS:
+            np.save(os.path.join(path, f"{array}.npy"), getattr(self, array))
+        with open(os.path.join(path, "vocabulary.json"), "w") as f:
+            json.dump(self.vocabulary, f)
+        with open(os.path.join(path, "product_ids.json"), "w") as f:
+            json.dump(list(product_ids), f)
+        with open(os.path.join(path, "manifest.json"), "w") as f:
+            json.dump({"documents": len(self), "terms": len(self.vocabulary), "postings": len(self.doc_ids),
+                       "source": source, "built_at": time.time()}, f)
+        publish_build(directory, name)
+        return path
+
+    @classmethod
+    def load(cls, directory: str) -> Optional[Tuple["BM25Index", List[str]]]:
+        """Current build of an index directory, memory-mapped, with its product IDs (None if there is none)."""
+        build = current_build(directory)
+        if build is None:
+            return None
+        path = os.path.join(directory, build)
+        arrays = {array: np.load(os.path.join(path, f"{array}.npy"), mmap_mode="r") for array in ARRAYS}
+        with open(os.path.join(path, "vocabulary.json")) as f:
+            vocabulary = json.load(f)
+        with open(os.path.join(path, "product_ids.json")) as f:
+            product_ids = json.load(f)
+        return cls(vocabulary, arrays), product_ids
+
+
+def build_bm25_index(client, collection_name: str, batch_size: int = 1000) -> Tuple[BM25Index, List[str]]:
+    """
+    Index the text of every product of a collection.
+
+    Args:
+        client: Sync QdrantClient
+        collection_name: Products collection
+        batch_size: Points per scroll page
+
+    Returns:
+        (index, product ID of each document)
+    """
+    documents: List[List[str]] = []
+    product_ids: List[str] = []
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            limit=batch_size,
+            offset=offset,
+            with_payload=["product_id", *TEXT_FIELDS],
+            with_vectors=False
+        )
+        for point in points:
+            payload = point.payload or {}
+            if payload.get("product_id") is None:
+                continue
+            product_ids.append(str(payload["product_id"]))
+            documents.append(product_tokens(payload))
+        if offset is None:
+            break
+    return BM25Index.build(documents), product_ids
+
 
 class BM25SearchService:
     """BM25-based keyword search for hybrid search"""
-    
-    def __init__(self):
-        """Initialize BM25 service"""
-        self.bm25 = None
-        self.corpus = []  # List of product dicts with name, description
-        self.corpus_ids = []  # Corresponding product IDs
-        
+
+    def __init__(self, index_path: Optional[str] = None, reload_interval: float = 10.0):
+        """
+        Initialize BM25 service
+
+        Args:
+            index_path: Directory of persisted builds (default: BM25_INDEX_PATH);
+                used until index_products is called
+            reload_interval: Seconds between checks for a new build
+        """
+        self.index: Optional[BM25Index] = None
+        self.corpus_ids: List[str] = []  # Product ID of each document
+        self.index_path = index_path
+        self.reload_interval = reload_interval
+        self._build: Optional[str] = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
     def index_products(self, products: List[Dict]) -> None:
         """
         Index products for BM25 search
-        
+
         Args:
             products: List of product dicts with 'id', 'name', 'description'
         """
-        self.corpus = []
-        self.corpus_ids = []
-        
-        for product in products:
-            product_id = product.get("id")
-            name = product.get("name", "").lower()
-            description = product.get("description", "").lower()
-            category = product.get("category", "").lower()
-            
-            # Combine all text fields
-            full_text = f"{name} {category} {description}"
-            
-            # Tokenize (split by space)
-            tokens = full_text.split()
-            
-            self.corpus.append(tokens)
-            self.corpus_ids.append(product_id)
-        
-        # Build BM25 index
-        if self.corpus:
-            self.bm25 = BM25Okapi(self.corpus)
-            logger.info(f"BM25 indexed {len(self.corpus)} products")
+        index = BM25Index.build([product_tokens(product) for product in products])
+        with self._lock:
+            self.index = index
+            self.corpus_ids = [product.get("id") for product in products]
+            self._build = None
+            self.index_path = ""  # Explicit corpus: stop following persisted builds
+
+        if products:
+            logger.info(f"BM25 indexed {len(products)} products ({len(index.doc_ids)} postings)")
         else:
             logger.warning("No products to index in BM25")
-    
+
+    def _current_index(self) -> Tuple[Optional[BM25Index], List[str]]:
+        """Index to search and its product IDs, (re)loading the persisted build when it changed."""
+        now = time.monotonic()
+        if now - self._checked < self.reload_interval:
+            return self.index, self.corpus_ids
+        with self._lock:
+            self._checked = now
+            path = self.index_path
+            if path is None:
+                from app.config import get_settings
+                path = get_settings().bm25_index_path
+            if not path:
+                return self.index, self.corpus_ids
+            build = current_build(path)
+            if build is not None and build != self._build:
+                try:
+                    self.index, self.corpus_ids = BM25Index.load(path)
+                    self._build = build
+                    logger.info(f"Loaded BM25 index {build} ({len(self.index)} products)")
+                except Exception as e:
+                    logger.warning(f"Could not load BM25 index {build}: {e}")
+            return self.index, self.corpus_ids
+
     def search(self, query: str, limit: int = 10, min_score: float = 0.1) -> List[Tuple[str, float]]:
         """
         Search for products using BM25
-        
+
         Args:
             query: Search query
             limit: Max results to return
             min_score: Minimum BM25 score threshold
-        
+
         Returns:
             List of (product_id, bm25_score) tuples sorted by score descending
         """
-        if not self.bm25:
+        index, corpus_ids = self._current_index()
+        if index is None or not len(index):
             logger.warning("BM25 not indexed yet")
             return []
-        
-        # Tokenize query
-        query_tokens = query.lower().split()
-        
-        # Get BM25 scores for all products
-        scores = self.bm25.get_scores(query_tokens)
-        
-        # Create result list with product IDs and scores
-        results = []
-        for idx, score in enumerate(scores):
-            if score >= min_score:
-                product_id = self.corpus_ids[idx]
-                results.append((product_id, float(score)))
-        
-        # Sort by score descending
-        results.sort(key=lambda x: x[1], reverse=True)
-        
-        # Return top limit results
-        return results[:limit]
-    
+
+        doc_ids, scores = index.search(tokenize(query), limit=limit, min_score=min_score)
+        return [(corpus_ids[doc_id], float(score)) for doc_id, score in zip(doc_ids, scores)]
+
     def normalize_scores(self, scores: List[float]) -> List[float]:
         """
         Normalize BM25 scores to 0-1 range
-        
+
         Args:
             scores: List of BM25 scores
-        
+
         Returns:
             Normalized scores (0-1)
         """
         if not scores:
             return []
-        
+
         max_score = max(scores)
         if max_score == 0:
             return [0.0] * len(scores)
-        
+
         return [s / max_score for s in scores]
@@ -0,0 +1,350 @@
+"""
+CLIP inference backends.
+
+Both backends expose the same two calls, returning L2-normalized float32 numpy
+embeddings, so EmbeddingService and ImageEmbeddingService don't care which one
+runs underneath:
+- encode_text(input_ids, attention_mask) -> (N, 512)
+- encode_images(pixel_values) -> (N, 512)
+
+Backends:
+- torch: PyTorch eager-mode CLIPModel (default)
+- onnx:  ONNX Runtime graphs of the text and vision towers, optionally with
+         dynamic int8 quantization (CPU only, lower latency and memory)
+
+Selected with CLIP_BACKEND=torch|onnx. ONNX graphs are exported to
+ONNX_MODEL_DIR on first use if missing (requires torch), or ahead of time with:
+    python -m app.tools.clip_backends export
+"""
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TEXT_GRAPH = "text"
+VISION_GRAPH = "vision"
+
+
+def _l2_normalize(features: np.ndarray) -> np.ndarray:
+    """Row-wise L2 normalization into a contiguous float32 array."""
+    features = np.asarray(features, dtype=np.float32)
+    norms = np.linalg.norm(features, axis=-1, keepdims=True)
+    return np.ascontiguousarray(features / np.maximum(norms, 1e-12))
+
+
+class TorchClipBackend:
+    """PyTorch eager-mode CLIP."""
+
+    name = "torch"
+
+    def __init__(self, model: Any, device: Any):
+        self.model = model
+        self.device = device
+
+    @property
+    def memory_bytes(self) -> int:
+        tensors = list(self.model.parameters()) + list(self.model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+
+    def encode_text(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        import torch
+        with torch.no_grad():
+            features = self.model.get_text_features(
+                input_ids=torch.as_tensor(input_ids).to(self.device),
+                attention_mask=torch.as_tensor(attention_mask).to(self.device)
+            )
+        return _l2_normalize(features.cpu().numpy())
+
+    def encode_images(self, pixel_values: np.ndarray) -> np.ndarray:
+        import torch
+        with torch.no_grad():
+            features = self.model.get_image_features(
+                pixel_values=torch.as_tensor(pixel_values).to(self.device)
+            )
+        return _l2_normalize(features.cpu().numpy())
+
+
+class OnnxClipBackend:
+    """ONNX Runtime CLIP (text and vision towers as separate graphs)."""
+
+    name = "onnx"
+
+    def __init__(self, model_dir: str, quantized: bool = False, num_threads: int = 0):
+        """
+        Load the exported graphs.
+
+        Args:
+            model_dir: Directory containing text[.int8].onnx and vision[.int8].onnx
+            quantized: Use the dynamic int8 quantized graphs
+            num_threads: ONNX Runtime intra-op threads (0 = runtime default)
+        """
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("onnxruntime is required for CLIP_BACKEND=onnx. Install with: pip install onnxruntime")
+
+        self.model_dir = Path(model_dir)
+        self.quantized = quantized
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            options.intra_op_num_threads = num_threads
+
+        text_path = graph_path(model_dir, TEXT_GRAPH, quantized)
+        vision_path = graph_path(model_dir, VISION_GRAPH, quantized)
+        self._text = ort.InferenceSession(str(text_path), options, providers=["CPUExecutionProvider"])
+        self._vision = ort.InferenceSession(str(vision_path), options, providers=["CPUExecutionProvider"])
+        self._graph_bytes = text_path.stat().st_size + vision_path.stat().st_size
+
+    @property
+    def device(self) -> str:
+        return "cpu"
+
+    @property
+    def memory_bytes(self) -> int:
+        # Weights dominate session memory; the graph files are a good estimate
+        return self._graph_bytes
+
+    def encode_text(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        features = self._text.run(None, {
+            "input_ids": np.asarray(input_ids, dtype=np.int64),
+            "attention_mask": np.asarray(attention_mask, dtype=np.int64)
+        })[0]
+        return _l2_normalize(features)
+
+    def encode_images(self, pixel_values: np.ndarray) -> np.ndarray:
+        features = self._vision.run(None, {
+            "pixel_values": np.asarray(pixel_values, dtype=np.float32)
+        })[0]
+        return _l2_normalize(features)
+
+
+def graph_path(model_dir: str, graph: str, quantized: bool) -> Path:
+    """Path of an exported graph (text/vision, fp32/int8)."""
+    suffix = ".int8.onnx" if quantized else ".onnx"
+    return Path(model_dir) / f"{graph}{suffix}"
+
+
+def _load_torch_clip(model_name: str) -> Tuple[Any, Any]:
+    """Load CLIPModel on the best available device."""
+    import torch
+    from transformers import CLIPModel
+
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    model = CLIPModel.from_pretrained(model_name).to(device)
+    model.eval()
+    return model, device
+
+
+def load_clip_backend(model_name: str, backend: str = "torch",
+                      onnx_model_dir: Optional[str] = None,
+                      onnx_quantize: bool = False,
+                      onnx_num_threads: int = 0) -> Tuple[Any, Any, Any]:
+    """
+    Load a CLIP backend and its processor (registry loader).
+
+    Returns:
+        (backend, processor, device)
+    """
+    from transformers import CLIPProcessor
+
+    processor = CLIPProcessor.from_pretrained(model_name)
+
+    if backend == "onnx":
+        if onnx_model_dir is None:
+            raise ValueError("onnx_model_dir is required for the onnx backend")
+        needed = [graph_path(onnx_model_dir, g, onnx_quantize) for g in (TEXT_GRAPH, VISION_GRAPH)]
+        if not all(p.exists() for p in needed):
+            logger.warning(f"ONNX graphs missing in {onnx_model_dir}, exporting {model_name} now...")
+            export_onnx(model_name, onnx_model_dir, quantize=onnx_quantize)
+        clip = OnnxClipBackend(onnx_model_dir, quantized=onnx_quantize, num_threads=onnx_num_threads)
+        return clip, processor, clip.device
+
+    if backend != "torch":
+        raise ValueError(f"Unknown CLIP backend: {backend} (expected 'torch' or 'onnx')")
+
+    model, device = _load_torch_clip(model_name)
+    return TorchClipBackend(model, device), processor, device
+
+
+def export_onnx(model_name: str, output_dir: str, quantize: bool = True, opset: int = 14) -> Dict[str, str]:
+    """
+    Export the CLIP text and vision towers to ONNX (with dynamic batch/sequence axes).
+
+    Args:
+        model_name: HuggingFace CLIP model name
+        output_dir: Directory for text.onnx / vision.onnx
+        quantize: Also write dynamic int8 quantized graphs (text.int8.onnx / vision.int8.onnx)
+        opset: ONNX opset version
+
+    Returns:
+        Dict of graph name -> written path
+    """
+    import torch
+
+    class TextTower(torch.nn.Module):
+        def __init__(self, clip):
+            super().__init__()
+            self.clip = clip
+
+        def forward(self, input_ids, attention_mask):
+            return self.clip.get_text_features(input_ids=input_ids, attention_mask=attention_mask)
+
+    class VisionTower(torch.nn.Module):
+        def __init__(self, clip):
+            super().__init__()
+            self.clip = clip
+
+        def forward(self, pixel_values):
+            return self.clip.get_image_features(pixel_values=pixel_values)
+
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+
+    model, _ = _load_torch_clip(model_name)
+    model = model.to("cpu")
+    written = {}
+
+    logger.info(f"Exporting CLIP text tower to {output / 'text.onnx'}")
+    dummy_ids = torch.ones((2, 77), dtype=torch.int64)
+    dummy_mask = torch.ones((2, 77), dtype=torch.int64)
+    torch.onnx.export(
+        TextTower(model), (dummy_ids, dummy_mask), str(graph_path(output_dir, TEXT_GRAPH, False)),
+        input_names=["input_ids", "attention_mask"], output_names=["text_embeds"],
+        dynamic_axes={"input_ids": {0: "batch", 1: "sequence"},
+                      "attention_mask": {0: "batch", 1: "sequence"},
+                      "text_embeds": {0: "batch"}},
+        opset_version=opset, do_constant_folding=True
+    )
+    written[TEXT_GRAPH] = str(graph_path(output_dir, TEXT_GRAPH, False))
+
+    logger.info(f"Exporting CLIP vision tower to {output / 'vision.onnx'}")
+    dummy_pixels = torch.zeros((2, 3, 224, 224), dtype=torch.float32)
+    torch.onnx.export(
+        VisionTower(model), (dummy_pixels,), str(graph_path(output_dir, VISION_GRAPH, False)),
+        input_names=["pixel_values"], output_names=["image_embeds"],
+        dynamic_axes={"pixel_values": {0: "batch"}, "image_embeds": {0: "batch"}},
+        opset_version=opset, do_constant_folding=True
+    )
+    written[VISION_GRAPH] = str(graph_path(output_dir, VISION_GRAPH, False))
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        for graph in (TEXT_GRAPH, VISION_GRAPH):
+            source = graph_path(output_dir, graph, False)
+            target = graph_path(output_dir, graph, True)
+            logger.info(f"Quantizing {source.name} -> {target.name} (dynamic int8)")
+            quantize_dynamic(str(source), str(target), weight_type=QuantType.QInt8)
+            written[f"{graph}.int8"] = str(target)
+
+    logger.info(f"✅ ONNX export complete: {', '.join(written)}")
+    return written
+
+
+def _sample_images(count: int = 8) -> List[Any]:
+    """Deterministic synthetic images (noise + gradients) for parity and benchmarks."""
+    from PIL import Image
+
+    rng = np.random.default_rng(0)
+    images = []
+    for i in range(count):
+        if i % 2:
+            pixels = rng.integers(0, 256, size=(256, 256, 3), dtype=np.uint8)
+        else:
+            ramp = np.linspace(0, 255, 256, dtype=np.uint8)
+            horizontal, vertical = np.meshgrid(ramp, ramp[::-1])
+            pixels = np.stack([horizontal, vertical, np.full((256, 256), 32 * i, np.uint8)], axis=-1)
+        images.append(Image.fromarray(pixels.astype(np.uint8)))
+    return images
+
+
+SAMPLE_TEXTS = [
+    "red cotton t-shirt",
+    "leather handbag with gold buckle",
+    "wireless bluetooth headphones",
+    "running shoes for women",
+    "wooden dining table with six chairs",
+    "stainless steel kitchen knife set",
+    "smartphone with large screen",
+    "children's winter jacket"
+]
+
+
+def check_parity(reference: Any, candidate: Any, processor: Any,
+                 tolerance: float = 0.02,
+                 texts: Optional[List[str]] = None,
+                 images: Optional[List[Any]] = None) -> Dict[str, Any]:
+    """
+    Compare a candidate backend's embeddings with a reference backend.
+
+    Passes when every embedding's cosine similarity with the reference is at
+    least 1 - tolerance.
+
+    Returns:
+        Report with min/mean cosine per modality and overall pass/fail
+    """
+    texts = texts or SAMPLE_TEXTS
+    images = images or _sample_images()
+
+    tokens = processor(text=texts, return_tensors="np", padding=True, truncation=True, max_length=77)
+    pixels = processor(images=images, return_tensors="np")["pixel_values"]
+
+    report = {"tolerance": tolerance}
+    for modality, encode in (
+        ("text", lambda b: b.encode_text(tokens["input_ids"], tokens["attention_mask"])),
+        ("image", lambda b: b.encode_images(pixels)),
+    ):
+        cosines = np.sum(encode(reference) * encode(candidate), axis=-1)
+        report[modality] = {
+            "samples": int(len(cosines)),
+            "min_cosine": round(float(cosines.min()), 5),
+            "mean_cosine": round(float(cosines.mean()), 5)
+        }
+
+    report["passed"] = all(report[m]["min_cosine"] >= 1 - tolerance for m in ("text", "image"))
+    return report
+
+
+def benchmark_backend(backend: Any, processor: Any,
+                      batch_sizes: Tuple[int, ...] = (1, 8, 32),
+                      iterations: int = 20) -> Dict[str, Any]:
+    """
+    Measure text and image encoding latency of one backend.
+
+    Returns:
+        {"text": {batch_size: {p50_ms, p95_ms, per_item_ms}}, "image": {...}, "memory_mb": ...}
+    """
+    def percentile(values: List[float], q: float) -> float:
+        return round(float(np.percentile(values, q)), 2)
+
+    results: Dict[str, Any] = {"backend": backend.name, "text": {}, "image": {}}
+    images = _sample_images(max(batch_sizes))
+    texts = (SAMPLE_TEXTS * (max(batch_sizes) // len(SAMPLE_TEXTS) + 1))[:max(batch_sizes)]
+
+    for batch_size in batch_sizes:
+        tokens = processor(text=texts[:batch_size], return_tensors="np", padding=True, truncation=True, max_length=77)
+        pixels = processor(images=images[:batch_size], return_tensors="np")["pixel_values"]
+
+        for modality, encode in (
+            ("text", lambda: backend.encode_text(tokens["input_ids"], tokens["attention_mask"])),
+            ("image", lambda: backend.encode_images(pixels)),
+        ):
+            encode()  # warmup
+            timings = []
+            for _ in range(iterations):
+                started = time.perf_counter()
+                encode()
+                timings.append((time.perf_counter() - started) * 1000)
+            results[modality][batch_size] = {
+                "p50_ms": percentile(timings, 50),
+                "p95_ms": percentile(timings, 95),
+                "per_item_ms": round(float(np.median(timings)) / batch_size, 2)
+            }
+
+    results["memory_mb"] = round(backend.memory_bytes / 1024 / 1024, 1)
+    return results
@@ -0,0 +1,512 @@
+"""
+Zero-downtime re-embedding through versioned collections and an alias.
+
+The services address the products collection (QDRANT_COLLECTION_NAME, e.g.
+"products") through its serving alias "products_live" (see provisioning).
+The alias starts on the collection of the plain name; migrations build
+versioned collections (products_v1, products_v2, ...) and switching
+versions is one atomic alias update, so searches never see a half-built
+collection and no collection is dropped while it may serve.
+
+A migration (app.tools.migrate_collection):
+1. start: create the next version from the collection spec (shadow collection)
+2. copy: scroll the live collection in batches, re-embed each product with
+   the embedding models of the migration process, upsert into the shadow.
+   The scroll offset and counts are checkpointed in Redis after every
+   batch, so an interrupted copy resumes where it stopped; throttled to a
+   rate so the live collection keeps its search latency.
+3. catch-up: products indexed or deleted meanwhile (recorded by the indexing
+   paths while a migration is active) are re-embedded or removed
+4. verify: point counts match and the shadow's search recall on sampled
+   products is above a floor
+5. flip: a last catch-up, the alias moves to the shadow in one request, then
+   a final catch-up of the writes that reached the previous version up to
+   the flip; the previous version is kept for rollback until cleaned up
+
+The live collection serves every search until the flip. Query embeddings
+must come from the same model as the collection: flip when the API is
+deployed with the new model settings.
+
+Redis layout:
+- migration:<alias>          JSON state of the running/last migration
+- migration:<alias>:changed  product_ids indexed/deleted during the migration
+                             (sorted set, scored by the time of their last change)
+"""
+import json
+import logging
+import os
+import random
+import re
+import time
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from qdrant_client.models import (
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    PointStruct,
+)
+
+from app.services.point_ids import product_point_id
+from app.services.provisioning import (
+    LIVE_ALIAS_SUFFIX,
+    CollectionSpec,
+    alias_target,
+    provision_collection,
+    serving_alias,
+)
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Re-embeds product payloads: one vector (or None when it cannot be embedded) per payload
+EmbedFunction = Callable[[List[Dict[str, Any]]], List[Optional[List[float]]]]
+
+MAX_FAILED_IDS = 1000  # Failed product IDs kept in the state (the count is exact)
+
+
+class MigrationError(RuntimeError):
+    """A migration step cannot run in the current state."""
+
+
+@dataclass
+class MigrationState:
+    """Progress of a migration (checkpointed after every batch)."""
+    alias: str
+    source: str
+    target: str
+    status: str = "created"  # created, copying, copied, verified, flipped
+    offset: Any = None  # Scroll offset of the next batch (None: start, or done when copied)
+    migrated: int = 0
+    failed: int = 0
+    failed_ids: List[str] = field(default_factory=list)
+    model_name: str = ""
+    started_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    verification: Dict[str, Any] = field(default_factory=dict)
+
+    def record_failures(self, product_ids: Iterable[str]) -> None:
+        for product_id in product_ids:
+            self.failed += 1
+            if len(self.failed_ids) < MAX_FAILED_IDS:
+                self.failed_ids.append(product_id)
+
+
+def base_name(alias: str) -> str:
+    """Collection name of a serving alias (products_live -> products)."""
+    return alias[:-len(LIVE_ALIAS_SUFFIX)] if alias.endswith(LIVE_ALIAS_SUFFIX) else alias
+
+
+def versioned_name(alias: str, version: int) -> str:
+    """Collection of a version (version 0: the first collection, under the plain name)."""
+    name = base_name(alias)
+    return f"{name}_v{version}" if version else name
+
+
+def collection_versions(client, alias: str) -> List[int]:
+    """Versions of an alias that exist as collections, ascending (0: the first collection)."""
+    name = base_name(alias)
+    pattern = re.compile(rf"^{re.escape(name)}_v(\d+)$")
+    versions = []
+    for collection in client.get_collections().collections:
+        match = pattern.match(collection.name)
+        if match:
+            versions.append(int(match.group(1)))
+        elif collection.name == name:
+            versions.append(0)
+    return sorted(versions)
+
+
+class MigrationStore:
+    """Migration state and change tracking in Redis."""
+
+    def __init__(self, redis_client: Any = None):
+        self._redis = redis_client
+        self._active: Dict[str, Tuple[float, bool]] = {}
+
+    def _get_redis(self):
+        """Redis client (decoded responses)."""
+        if self._redis is None:
+            if not REDIS_AVAILABLE:
+                raise RuntimeError("redis-py is not installed")
+            from app.config import get_settings
+            settings = get_settings()
+            redis_url = settings.redis_url or os.getenv("REDIS_URL")
+            if redis_url:
+                self._redis = redis.from_url(redis_url, decode_responses=True,
+                                             socket_timeout=2, socket_connect_timeout=1)
+            else:
+                self._redis = redis.Redis(
+                    host=settings.redis_host,
+                    port=int(settings.redis_port),
+                    password=settings.redis_password or None,
+                    decode_responses=True,
+                    socket_timeout=2,
+                    socket_connect_timeout=1
+                )
+        return self._redis
+
+    @staticmethod
+    def _key(alias: str) -> str:
+        return f"migration:{alias}"
+
+    def load(self, alias: str) -> Optional[MigrationState]:
+        raw = self._get_redis().get(self._key(alias))
+        return MigrationState(**json.loads(raw)) if raw else None
+
+    def save(self, state: MigrationState) -> None:
+        state.updated_at = time.time()
+        self._get_redis().set(self._key(state.alias), json.dumps(asdict(state)))
+
+    def is_active(self, alias: str) -> bool:
+        """Whether a migration of the alias is running (cached for a few seconds: checked on every index)."""
+        now = time.monotonic()
+        cached = self._active.get(alias)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        try:
+            state = self.load(alias)
+            active = state is not None and state.status != "flipped"
+            self._active[alias] = (now + 5.0, active)
+        except Exception as e:
+            logger.debug(f"Could not read migration state: {e}")
+            active = False
+            self._active[alias] = (now + 30.0, active)  # Redis down: no per-index timeout
+        return active
+
+    def mark_changed(self, alias: str, product_ids: Iterable[str]) -> None:
+        """Record products as changed now (marked after their write is acknowledged)."""
+        now = time.time()
+        changes = {str(product_id): now for product_id in product_ids}
+        if changes:
+            self._get_redis().zadd(f"{self._key(alias)}:changed", changes)
+
+    def changed_products(self, alias: str, until: Optional[float] = None) -> Dict[str, float]:
+        """Changed products (last changed at or before until), with their change time."""
+        return dict(self._get_redis().zrangebyscore(
+            f"{self._key(alias)}:changed", "-inf", "+inf" if until is None else until, withscores=True
+        ))
+
+    def clear_changed(self, alias: str, changes: Dict[str, float]) -> None:
+        """Unmark processed products, unless they changed again meanwhile."""
+        product_ids = list(changes)
+        if not product_ids:
+            return
+        key = f"{self._key(alias)}:changed"
+        current = self._get_redis().zmscore(key, product_ids)
+        done = [product_id for product_id, score in zip(product_ids, current)
+                if score is not None and score <= changes[product_id]]
+        if done:
+            self._get_redis().zrem(key, *done)
+
+    def drop_changed(self, alias: str) -> None:
+        self._get_redis().delete(f"{self._key(alias)}:changed")
+
+
+def start_migration(client, store: MigrationStore, spec: CollectionSpec, model_name: str = "") -> MigrationState:
+    """
+    Create the shadow collection (next version) and record the migration.
+
+    Args:
+        client: Sync QdrantClient
+        store: Migration store
+        spec: Collection spec (its name is the base collection name)
+        model_name: Embedding model used for the re-embedding (recorded)
+
+    Returns:
+        New migration state
+
+    Raises:
+        MigrationError: If another migration of the alias is in progress, or
+            there is no collection to migrate
+    """
+    alias = serving_alias(spec.name)
+    previous = store.load(alias)
+    if previous is not None and previous.status != "flipped":
+        raise MigrationError(
+            f"Migration of '{alias}' to {previous.target} is {previous.status}: resume, flip or abort it first"
+        )
+
+    source = alias_target(client, alias)
+    if source is None:
+        if not client.collection_exists(spec.name):
+            raise MigrationError(f"No collection '{spec.name}' to migrate")
+        flip_alias(client, alias, spec.name)  # Deployment provisioned before serving aliases
+        source = spec.name
+    versions = collection_versions(client, alias)
+    target = versioned_name(alias, (versions[-1] if versions else 0) + 1)
+
+    target_spec = replace(spec, name=target)
+    provision_collection(client, target_spec)
+    state = MigrationState(alias=alias, source=source, target=target, model_name=model_name)
+    store.save(state)
+    logger.info(f"Migration of '{alias}': {source} -> {target} (shadow created)")
+    return state
+
+
+def _reembed(client, state: MigrationState, points: Sequence[Any], embed: EmbedFunction) -> Tuple[int, List[str]]:
+    """Re-embed points' payloads and upsert them into the target. Returns (upserted, failed ids)."""
+    points = [point for point in points if (point.payload or {}).get("product_id") is not None]
+    if not points:
+        return 0, []
+    vectors = embed([point.payload for point in points])
+    upserts, failed = [], []
+    for point, vector in zip(points, vectors):
+        if vector:
+            upserts.append(PointStruct(id=point.id, vector=vector, payload=point.payload))
+        else:
+            failed.append(str(point.payload["product_id"]))
+    if upserts:
+        client.upsert(collection_name=state.target, points=upserts, wait=True)
+    return len(upserts), failed
+
+
+def copy_batch(client, store: MigrationStore, state: MigrationState, embed: EmbedFunction,
+               batch_size: int = 64) -> int:
+    """
+    Re-embed the next batch of the live collection into the shadow, then checkpoint.
+
+    Args:
+        client: Sync QdrantClient
+        store: Migration store
+        state: Migration state (updated in place)
+        embed: Re-embedding function
+        batch_size: Products per batch
+
+    Returns:
+        Products read in this batch (0 once the copy is complete)
+    """
+    if state.status == "copied":
+        return 0
+    points, next_offset = client.scroll(
+        collection_name=state.source,
+        limit=batch_size,
+        offset=state.offset,
+        with_payload=True,
+        with_vectors=False
+    )
+    upserted, failed = _reembed(client, state, points, embed)
+    state.migrated += upserted
+    state.record_failures(failed)
+    state.offset = next_offset
+    state.status = "copied" if next_offset is None else "copying"
+    store.save(state)  # Checkpoint: a restart continues from next_offset
+    return len(points)
+
+
+def run_copy(client, store: MigrationStore, state: MigrationState, embed: EmbedFunction,
+             batch_size: int = 64, max_rate: float = 0.0) -> MigrationState:
+    """
+    Copy until done, at most max_rate products per second (0 = unthrottled).
+
+    Resumable: the state holds the checkpointed offset.
+    """
+    while state.status != "copied":
+        started = time.monotonic()
+        count = copy_batch(client, store, state, embed, batch_size)
+        logger.info(f"Migration of '{state.alias}': {state.migrated} migrated, {state.failed} failed")
+        if max_rate > 0 and count:
+            time.sleep(max(0.0, count / max_rate - (time.monotonic() - started)))
+    return state
+
+
+def catch_up(client, store: MigrationStore, state: MigrationState, embed: EmbedFunction,
+             batch_size: int = 64, until: Optional[float] = None) -> Dict[str, int]:
+    """
+    Apply products indexed or deleted in the source collection since the migration started.
+
+    Args:
+        client: Sync QdrantClient
+        store: Migration store
+        state: Migration state
+        embed: Re-embedding function
+        batch_size: Products per batch
+        until: Only products last changed at or before this time (time.time())
+
+    Returns:
+        Counts: re-embedded and deleted products
+    """
+    changes = store.changed_products(state.alias, until)
+    changed = sorted(changes)
+    reembedded, deleted = 0, 0
+    for start in range(0, len(changed), batch_size):
+        product_ids = changed[start:start + batch_size]
+        points = client.retrieve(
+            collection_name=state.source,
+            ids=[product_point_id(product_id) for product_id in product_ids],
+            with_payload=True
+        )
+        present = {str(point.payload.get("product_id")) for point in points if point.payload}
+        gone = [product_id for product_id in product_ids if product_id not in present]
+        if gone:
+            client.delete(collection_name=state.target,
+                          points_selector=[product_point_id(product_id) for product_id in gone])
+        upserted, failed = _reembed(client, state, points, embed)
+        state.record_failures(failed)
+        reembedded += upserted
+        deleted += len(gone)
+        store.clear_changed(state.alias, {product_id: changes[product_id] for product_id in product_ids})
+    store.save(state)
+    return {"reembedded": reembedded, "deleted": deleted}
+
+
+def verify_migration(client, store: MigrationStore, state: MigrationState, sample_size: int = 50,
+                     k: int = 10, min_recall: float = 0.9, max_missing: int = 0) -> Dict[str, Any]:
+    """
+    Check the shadow before the flip: point counts and sampled search recall.
+
+    Recall is the shadow's default search (HNSW, quantization) against exact
+    search on sampled stored products, as in app.tools.tune_hnsw_ef.
+
+    Args:
+        client: Sync QdrantClient
+        store: Migration store
+        state: Migration state (status becomes verified on success)
+        sample_size: Sampled products
+        k: Neighbours per sample
+        min_recall: Recall floor
+        max_missing: Live products allowed to be absent from the shadow (not re-embeddable)
+
+    Returns:
+        Verification report (ok, counts, recall)
+    """
+    from app.tools.recall_eval import exact_neighbours, measure
+    from app.services.search_params import build_search_params
+
+    source_count = client.count(state.source, exact=True).count
+    target_count = client.count(state.target, exact=True).count
+    missing = source_count - target_count
+
+    points, _ = client.scroll(collection_name=state.target, limit=max(sample_size * 4, sample_size),
+                              with_payload=False, with_vectors=True)
+    queries = random.Random(0).sample(points, min(sample_size, len(points)))
+    recall = 1.0
+    if queries:
+        truth = exact_neighbours(client, state.target, queries, k)
+        recall = measure(client, state.target, queries, truth, k, build_search_params())[f"recall@{k}"]
+
+    report = {
+        "source_count": source_count,
+        "target_count": target_count,
+        "missing": missing,
+        "failed": state.failed,
+        f"recall@{k}": recall,
+        "ok": state.status == "copied" and missing <= max_missing and recall >= min_recall
+    }
+    state.verification = report
+    if report["ok"]:
+        state.status = "verified"
+    store.save(state)
+    return report
+
+
+def flip_alias(client, alias: str, target: str) -> Optional[str]:
+    """
+    Point the alias to target in one atomic request.
+
+    Returns:
+        Previous target (None for a new alias)
+
+    Raises:
+        MigrationError: If a collection is named like the alias
+    """
+    previous = alias_target(client, alias)
+    operations = []
+    if previous is not None:
+        operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias)))
+    elif client.collection_exists(alias):
+        raise MigrationError(f"'{alias}' is a collection, not an alias")
+    operations.append(CreateAliasOperation(create_alias=CreateAlias(collection_name=target, alias_name=alias)))
+    client.update_collection_aliases(change_aliases_operations=operations)
+    logger.info(f"Alias '{alias}' -> {target} (was {previous or 'unset'})")
+    return previous
+
+
+def flip_migration(client, store: MigrationStore, state: MigrationState, embed: EmbedFunction,
+                   batch_size: int = 64, force: bool = False) -> Optional[str]:
+    """
+    Flip the alias to the verified shadow without losing writes made meanwhile.
+
+    Products changed since the verify are applied before the flip. Writes
+    acknowledged by the source up to the flip itself are applied right after
+    it (still read from the source); later ones already reached the new
+    version through the alias and are left alone.
+
+    Args:
+        client: Sync QdrantClient
+        store: Migration store
+        state: Migration state (status becomes flipped)
+        embed: Re-embedding function of the catch-up
+        batch_size: Products per catch-up batch
+        force: Skip the verification check
+
+    Returns:
+        Previous alias target
+
+    Raises:
+        MigrationError: If the migration is not verified (and not forced)
+    """
+    if state.status != "verified" and not force:
+        raise MigrationError(f"Migration to {state.target} is {state.status}, not verified")
+    before = catch_up(client, store, state, embed, batch_size)
+    flipped_at = time.time()
+    previous = flip_alias(client, state.alias, state.target)
+    after = catch_up(client, store, state, embed, batch_size, until=flipped_at)
+    logger.info(f"Catch-up of the flip: {before} before, {after} after")
+    state.status = "flipped"
+    store.save(state)
+    store.drop_changed(state.alias)  # Later marks are writes through the alias
+    return previous
+
+
+def rollback_migration(client, state: MigrationState) -> str:
+    """
+    Point the alias back to the version a flipped migration replaced.
+
+    Returns:
+        Collection the alias points to again
+
+    Raises:
+        MigrationError: If the alias is not on the migration's target, or the
+            previous version was cleaned up
+    """
+    if state.status != "flipped" or alias_target(client, state.alias) != state.target:
+        raise MigrationError(f"'{state.alias}' is not on a flipped migration")
+    if not client.collection_exists(state.source):
+        raise MigrationError(f"Previous version {state.source} is gone")
+    flip_alias(client, state.alias, state.source)
+    return state.source
+
+
+def mark_migration_changes(product_ids: Iterable[str]) -> None:
+    """
+    Record products indexed/deleted while a migration of the collection runs (best effort).
+
+    Called by the indexing paths; the migration's catch-up step re-embeds them.
+    """
+    alias = serving_alias()
+    try:
+        store = get_migration_store()
+        if store.is_active(alias):
+            store.mark_changed(alias, product_ids)
+    except Exception as e:
+        logger.debug(f"Could not record migration changes: {e}")
+
+
+# Singleton instance
+_migration_store: Optional[MigrationStore] = None
+
+
+def get_migration_store() -> MigrationStore:
+    """Get singleton migration store."""
+    global _migration_store
+    if _migration_store is None:
+        _migration_store = MigrationStore()
+    return _migration_store
@@ -0,0 +1,245 @@
+"""
+Dynamic micro-batching for CLIP embeddings.
+
+Concurrent requests are collected for a short window (a few milliseconds) or
+until the batch is full, then embedded with a single batched forward pass.
+Each caller gets its own row of the result back. Batches run on the model's
+inference executor, so at most its concurrency limit of batches is in flight
+and requests arriving meanwhile accumulate into the next batch.
+
+Usage:
+    batcher = EmbeddingBatcher(embedding_service.embed_texts, name="clip_text")
+    embedding = await batcher.submit("red running shoes")
+"""
+import asyncio
+import logging
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from app.services.inference_executor import InferenceQueueFull, ModelExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """Collect concurrent embedding requests and run them as one batch."""
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], Sequence[Sequence[float]]],
+        name: str = "embeddings",
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        executor: Optional[ModelExecutor] = None,
+        max_queue: int = 0
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            batch_fn: Blocking function embedding a list of inputs, returning one row per input
+            name: Name used in logs and stats (e.g. "clip_text")
+            max_batch_size: Maximum number of inputs per forward pass
+            max_wait_ms: How long the first request of a batch waits for company
+            executor: Inference executor running the batches (default: loop's default pool)
+            max_queue: Maximum number of requests waiting for a batch (0 = unbounded)
+        """
+        self.batch_fn = batch_fn
+        self.name = name
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.executor = executor
+        self.max_queue = max(0, max_queue)
+        self.max_in_flight = executor.max_concurrency if executor is not None else 1
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        # Stats
+        self._batches = 0
+        self._items = 0
+        self._fill_ratio_sum = 0.0
+        self._wait_ms_sum = 0.0
+        self._inference_ms_sum = 0.0
+        self._size_histogram: Counter = Counter()
+
+    def _ensure_started(self) -> None:
+        """Start the collector task on the running event loop (restart if the loop changed)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._worker is not None and not self._worker.done():
+            return
+
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._worker = loop.create_task(self._collect_forever())
+        logger.info(
+            f"Embedding batcher '{self.name}' started "
+            f"(max_batch_size={self.max_batch_size}, window={self.max_wait * 1000:.1f}ms)"
+        )
+
+    async def submit(self, item: Any) -> List[float]:
+        """
+        Queue one input and wait for its embedding.
+
+        Args:
+            item: Input accepted by batch_fn (text, image bytes, ...)
+
+        Returns:
+            Embedding for this input
+
+        Raises:
+            InferenceQueueFull: If max_queue requests are already waiting
+        """
+        self._ensure_started()
+        future = self._loop.create_future()
+        try:
+            self._queue.put_nowait((item, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            raise InferenceQueueFull(
+                f"Embedding queue for '{self.name}' is full ({self.max_queue} waiting)"
+            )
+        return await future
+
+    async def submit_many(self, items: Sequence[Any], return_exceptions: bool = False) -> List[Any]:
+        """
+        Queue several inputs at once and wait for all their embeddings.
+
+        The inputs are enqueued together, so they share forward passes (one
+        per max_batch_size inputs) instead of being spread over windows.
+
+        Args:
+            items: Inputs accepted by batch_fn
+            return_exceptions: Return a failed input's exception in its slot instead of raising
+
+        Returns:
+            Embeddings, in input order
+
+        Raises:
+            InferenceQueueFull: If the inputs don't fit in the queue (nothing is queued)
+        """
+        if not items:
+            return []
+        self._ensure_started()
+        if self.max_queue and self._queue.qsize() + len(items) > self.max_queue:
+            raise InferenceQueueFull(
+                f"Embedding queue for '{self.name}' cannot take {len(items)} inputs "
+                f"({self._queue.qsize()}/{self.max_queue} waiting)"
+            )
+
+        enqueued = time.perf_counter()
+        futures = [self._loop.create_future() for _ in items]
+        for item, future in zip(items, futures):
+            self._queue.put_nowait((item, future, enqueued))
+        return await asyncio.gather(*futures, return_exceptions=return_exceptions)
+
+    async def _collect_forever(self) -> None:
+        """Form batches from the queue and dispatch them, max_in_flight at a time."""
+        slots = asyncio.Semaphore(self.max_in_flight)
+        while True:
+            # Wait for a free inference slot first: requests keep queuing meanwhile
+            await slots.acquire()
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                # Take whatever is already waiting before sleeping on the queue
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            dispatch = self._loop.create_task(self._dispatch(batch))
+            dispatch.add_done_callback(lambda task: self._on_dispatched(task, slots))
+
+    def _on_dispatched(self, task: asyncio.Task, slots: asyncio.Semaphore) -> None:
+        """Free the inference slot of a finished batch and log unexpected errors."""
+        slots.release()
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Embedding batcher '{self.name}' dispatch error: {task.exception()}")
+
+    async def _dispatch(self, batch: List[Tuple[Any, asyncio.Future, float]]) -> None:
+        """Run one batched forward pass and hand each row back to its caller."""
+        # Callers that gave up (client disconnect, timeout) don't need inference
+        batch = [entry for entry in batch if not entry[1].cancelled()]
+        if not batch:
+            return
+
+        items = [item for item, _, _ in batch]
+        started = time.perf_counter()
+
+        try:
+            embeddings = await self._run_batch(items)
+            if len(embeddings) != len(items):
+                raise RuntimeError(f"batch_fn returned {len(embeddings)} rows for {len(items)} inputs")
+        except Exception as e:
+            if len(batch) > 1:
+                # One bad input (corrupt or oversized image) must not fail its neighbours
+                logger.warning(
+                    f"Embedding batch '{self.name}' failed ({len(items)} items), "
+                    f"retrying items one by one: {e}"
+                )
+                await asyncio.gather(*(self._dispatch([entry]) for entry in batch))
+                return
+            logger.error(f"Embedding batch '{self.name}' failed: {e}")
+            _, future, _ = batch[0]
+            if not future.done():
+                future.set_exception(e)
+            return
+
+        finished = time.perf_counter()
+        self._record_batch(batch, started, finished)
+
+        for (_, future, _), embedding in zip(batch, embeddings):
+            if not future.done():
+                future.set_result(embedding)
+
+    async def _run_batch(self, items: List[Any]) -> Sequence[Sequence[float]]:
+        """Run batch_fn off the event loop."""
+        if self.executor is not None:
+            return await self.executor.run(self.batch_fn, items)
+        return await self._loop.run_in_executor(None, self.batch_fn, items)
+
+    def _record_batch(self, batch: List[Tuple[Any, asyncio.Future, float]],
+                      started: float, finished: float) -> None:
+        """Update fill and latency statistics for one dispatched batch."""
+        size = len(batch)
+        self._batches += 1
+        self._items += size
+        self._fill_ratio_sum += size / self.max_batch_size
+        self._wait_ms_sum += sum((started - enqueued) * 1000 for _, _, enqueued in batch)
+        self._inference_ms_sum += (finished - started) * 1000
+        self._size_histogram[size] += 1
+
+        logger.debug(
+            f"Embedding batch '{self.name}': {size}/{self.max_batch_size} "
+            f"in {(finished - started) * 1000:.1f}ms"
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return batch fill and latency statistics."""
+        batches = self._batches or 1
+        items = self._items or 1
+        return {
+            "name": self.name,
+            "max_batch_size": self.max_batch_size,
+            "window_ms": self.max_wait * 1000,
+            "max_in_flight": self.max_in_flight,
+            "batches": self._batches,
+            "items": self._items,
+            "avg_batch_size": round(self._items / batches, 2),
+            "avg_fill_ratio": round(self._fill_ratio_sum / batches, 4),
+            "avg_queue_wait_ms": round(self._wait_ms_sum / items, 2),
+            "avg_inference_ms": round(self._inference_ms_sum / batches, 2),
+            "batch_size_histogram": dict(sorted(self._size_histogram.items())),
+            "pending": self._queue.qsize() if self._queue is not None else 0
+        }
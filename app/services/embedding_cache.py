@@ -0,0 +1,307 @@
+"""
+Two-tier embedding cache: in-process LRU (with TTL) + shared Redis.
+
+Entries are content-addressed: the key is a BLAKE2b hash of the raw input
+(image bytes or text), so an identical photo re-uploaded by a seller or a
+repeated query is embedded once. Redis stores compact binary vectors
+(float16 by default: 1KB per 512-d embedding instead of ~10KB of JSON),
+shared by every API replica and worker. Batches use one MGET and one
+pipelined round trip of SETs.
+
+Keys carry a version tag derived from the model (name, backend, vocabulary...):
+changing the model switches to a fresh key space, and the old entries simply
+expire - no flush needed.
+
+Usage:
+    cache = get_image_embedding_cache()
+    keys = [cache.key_for(data) for data in images]
+    cached = cache.get_many(keys)              # None for misses
+    cache.set_many({keys[i]: embedding, ...})
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Seconds before retrying Redis after a connection error
+REDIS_RETRY_SECONDS = 30.0
+
+
+def version_tag(*parts: Any) -> str:
+    """Short stable tag identifying a model version (name, backend, vocabulary...)."""
+    return hashlib.blake2b("|".join(str(part) for part in parts).encode(), digest_size=4).hexdigest()
+
+
+class EmbeddingCache:
+    """Content-addressed embedding cache with an LRU tier and a Redis tier."""
+
+    def __init__(
+        self,
+        namespace: str,
+        dimension: Optional[int] = None,
+        version: str = "v1",
+        max_entries: int = 10000,
+        lru_ttl_seconds: float = 3600,
+        ttl_seconds: int = 7 * 24 * 3600,
+        dtype: str = "float16",
+        redis_client: Any = None,
+        use_redis: bool = True
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            namespace: Key prefix (e.g. "emb:clip-image"), one per model/input type
+            dimension: Embedding dimension stored vectors are checked against (None = any)
+            version: Model version tag (see version_tag); part of every key
+            max_entries: LRU tier capacity (0 disables the in-process tier)
+            lru_ttl_seconds: LRU entry lifetime (0 = until evicted)
+            ttl_seconds: Redis entry lifetime
+            dtype: Redis storage format, "float16" or "float32"
+            redis_client: Redis client (default: built from settings on first use)
+            use_redis: Disable the Redis tier entirely
+        """
+        if dtype not in ("float16", "float32"):
+            raise ValueError(f"Unsupported cache dtype: {dtype}")
+
+        self.namespace = namespace
+        self.dimension = dimension
+        self.version = version
+        self.max_entries = max(0, max_entries)
+        self.lru_ttl_seconds = max(0.0, lru_ttl_seconds)
+        self.ttl_seconds = ttl_seconds
+        self.dtype = np.dtype(dtype)
+        self.use_redis = use_redis and (redis_client is not None or REDIS_AVAILABLE)
+
+        self._redis = redis_client
+        self._redis_retry_at = 0.0
+        self._lru: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, vector)
+        self._lock = threading.Lock()
+
+        # Stats
+        self._lru_hits = 0
+        self._redis_hits = 0
+        self._misses = 0
+        self._sets = 0
+        self._redis_errors = 0
+
+    def key_for(self, data: Union[bytes, str]) -> str:
+        """Cache key for raw input bytes or text (BLAKE2b, 128-bit)."""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        return f"{self.namespace}:{self.version}:{hashlib.blake2b(data, digest_size=16).hexdigest()}"
+
+    def _get_redis(self):
+        """Redis client, or None while Redis is disabled or unreachable."""
+        if not self.use_redis or time.monotonic() < self._redis_retry_at:
+            return None
+        if self._redis is None:
+            from app.config import get_settings
+            settings = get_settings()
+            try:
+                if settings.redis_url:
+                    client = redis.from_url(settings.redis_url, socket_timeout=1, socket_connect_timeout=1)
+                else:
+                    client = redis.Redis(
+                        host=settings.redis_host,
+                        port=int(settings.redis_port),
+                        password=settings.redis_password or None,
+                        socket_timeout=1,
+                        socket_connect_timeout=1
+                    )
+                client.ping()
+                self._redis = client
+            except Exception as e:
+                self._redis_failed(e)
+                return None
+        return self._redis
+
+    def _redis_failed(self, error: Exception) -> None:
+        """Back off from Redis for a while; the LRU tier keeps working."""
+        self._redis_errors += 1
+        self._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+        logger.warning(
+            f"Embedding cache '{self.namespace}': Redis unavailable, "
+            f"retrying in {REDIS_RETRY_SECONDS:.0f}s ({error})"
+        )
+
+    def _lru_get(self, key: str) -> Optional[np.ndarray]:
+        """LRU lookup (lock held by caller); expired entries are dropped."""
+        entry = self._lru.get(key)
+        if entry is None:
+            return None
+        expires_at, vector = entry
+        if expires_at and time.monotonic() >= expires_at:
+            del self._lru[key]
+            return None
+        self._lru.move_to_end(key)
+        return vector
+
+    def _lru_put(self, key: str, vector: np.ndarray) -> None:
+        if self.max_entries == 0:
+            return
+        expires_at = time.monotonic() + self.lru_ttl_seconds if self.lru_ttl_seconds else 0.0
+        with self._lock:
+            self._lru[key] = (expires_at, vector)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def _decode(self, raw: Optional[bytes]) -> Optional[np.ndarray]:
+        """Binary Redis payload -> read-only float32 vector (None if absent or malformed)."""
+        if raw is None or len(raw) % self.dtype.itemsize:
+            return None
+        vector = np.frombuffer(raw, dtype=self.dtype).astype(np.float32)
+        if self.dimension is not None and vector.shape[0] != self.dimension:
+            return None
+        vector.flags.writeable = False
+        return vector
+
+    def _encode(self, embedding: Any) -> np.ndarray:
+        """Embedding -> read-only float32 vector (dimension checked)."""
+        vector = np.array(embedding, dtype=np.float32).reshape(-1)
+        if self.dimension is not None and vector.shape[0] != self.dimension:
+            raise ValueError(f"Expected a {self.dimension}-d embedding, got {vector.shape[0]}")
+        vector.flags.writeable = False
+        return vector
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """
+        Look up one embedding (LRU first, then Redis).
+
+        Returns:
+            Read-only float32 vector, or None on a miss
+        """
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up several embeddings: LRU first, then a single MGET for the rest.
+
+        Returns:
+            One read-only float32 vector (or None on a miss) per key
+        """
+        results: List[Optional[np.ndarray]] = [None] * len(keys)
+        remote = []
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                results[i] = self._lru_get(key)
+                if results[i] is None:
+                    remote.append(i)
+        self._lru_hits += len(keys) - len(remote)
+
+        client = self._get_redis() if remote else None
+        if client is not None:
+            try:
+                payloads = client.mget([keys[i] for i in remote])
+            except Exception as e:
+                self._redis_failed(e)
+                payloads = []
+
+            for i, raw in zip(remote, payloads):
+                vector = self._decode(raw)
+                if vector is not None:
+                    results[i] = vector
+                    self._lru_put(keys[i], vector)
+                    self._redis_hits += 1
+
+        self._misses += sum(1 for i in remote if results[i] is None)
+        return results
+
+    def set(self, key: str, embedding: Any) -> None:
+        """Store one embedding in both tiers."""
+        self.set_many({key: embedding})
+
+    def set_many(self, items: Dict[str, Any]) -> None:
+        """Store several embeddings: LRU, then one pipelined round trip to Redis."""
+        if not items:
+            return
+
+        vectors = {key: self._encode(embedding) for key, embedding in items.items()}
+        for key, vector in vectors.items():
+            self._lru_put(key, vector)
+        self._sets += len(vectors)
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                pipe = client.pipeline(transaction=False)
+                for key, vector in vectors.items():
+                    pipe.set(key, vector.astype(self.dtype).tobytes(), ex=self.ttl_seconds)
+                pipe.execute()
+            except Exception as e:
+                self._redis_failed(e)
+
+    def clear(self) -> None:
+        """Empty the in-process tier (Redis entries expire on their own)."""
+        with self._lock:
+            self._lru.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters per tier."""
+        lookups = self._lru_hits + self._redis_hits + self._misses
+        return {
+            "namespace": self.namespace,
+            "version": self.version,
+            "lru_entries": len(self._lru),
+            "lru_max_entries": self.max_entries,
+            "lru_ttl_seconds": self.lru_ttl_seconds,
+            "lru_hits": self._lru_hits,
+            "redis_hits": self._redis_hits,
+            "misses": self._misses,
+            "hit_rate": round((self._lru_hits + self._redis_hits) / lookups, 4) if lookups else 0.0,
+            "sets": self._sets,
+            "redis_enabled": self.use_redis,
+            "redis_errors": self._redis_errors,
+            "storage_dtype": self.dtype.name
+        }
+
+
+def create_embedding_cache(namespace: str, dimension: Optional[int], version: str) -> EmbeddingCache:
+    """Build an embedding cache configured from settings."""
+    from app.config import get_settings
+    settings = get_settings()
+    return EmbeddingCache(
+        namespace=namespace,
+        dimension=dimension,
+        version=version_tag(version, settings.embedding_cache_version),
+        max_entries=settings.embedding_cache_max_entries,
+        lru_ttl_seconds=settings.embedding_cache_lru_ttl_seconds,
+        ttl_seconds=settings.embedding_cache_ttl_seconds,
+        dtype=settings.embedding_cache_dtype,
+        use_redis=settings.embedding_cache_redis
+    )
+
+
+# Singleton instance
+_image_embedding_cache: Optional[EmbeddingCache] = None
+
+
+def get_image_embedding_cache() -> EmbeddingCache:
+    """Get the CLIP image embedding cache (keyed by image bytes)."""
+    global _image_embedding_cache
+    if _image_embedding_cache is None:
+        from app.config import get_settings
+        settings = get_settings()
+        backend = settings.clip_backend
+        if backend == "onnx" and settings.onnx_quantize:
+            backend = "onnx-int8"  # Quantized embeddings differ slightly: own key space
+        _image_embedding_cache = create_embedding_cache(
+            namespace="emb:clip-image",
+            dimension=settings.embedding_dim,
+            version=f"{settings.model_name}:{backend}"
+        )
+    return _image_embedding_cache
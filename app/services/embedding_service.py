@@ -1,11 +1,12 @@
 import logging
 from typing import List
-import torch
 from PIL import Image
 import io
 import requests
 import os
-from transformers import CLIPProcessor, CLIPModel
+from app.config import get_settings
+from app.services.image_preprocessing import get_image_preprocessor
+from app.services.model_registry import get_model_registry
 
 logger = logging.getLogger(__name__)
 
@@ -13,28 +14,38 @@ class EmbeddingService:
     """Service for generating CLIP embeddings from images and text"""
     
     def __init__(self, model_name: str = "openai/clip-vit-base-patch32"):
-        """Initialize CLIP model and processor"""
+        """Initialize CLIP model and processor (shared through the model registry)"""
         self.model_name = model_name
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.model = None
-        self.processor = None
+        self._handle = None
         
         # Skip model loading in local dev to avoid HuggingFace auth issues
         if os.getenv("ENVIRONMENT") != "development":
-            logger.info(f"Loading CLIP model: {model_name} on device: {self.device}")
+            backend = get_settings().clip_backend
+            logger.info(f"Loading CLIP model: {model_name} (backend: {backend})")
             try:
-                self.model = CLIPModel.from_pretrained(model_name)
-                self.processor = CLIPProcessor.from_pretrained(model_name)
-                self.model.to(self.device)
-                self.model.eval()
-                logger.info(f"CLIP model loaded successfully")
+                self._handle = get_model_registry().acquire_clip(model_name, backend=backend)
+                logger.info(f"CLIP model ready on device: {self.device}")
             except Exception as e:
                 logger.warning(f"Could not load CLIP model: {e}. Using mock embeddings.")
-                self.model = None
-                self.processor = None
+                self._handle = None
         else:
             logger.info(f"Development mode: Using mock embeddings (no model loaded)")
     
+    @property
+    def model(self):
+        """Shared CLIP backend, torch or ONNX (None in mock mode)"""
+        return self._handle.model if self._handle is not None else None
+    
+    @property
+    def processor(self):
+        """Shared CLIP processor (None in mock mode)"""
+        return self._handle.processor if self._handle is not None else None
+    
+    @property
+    def device(self):
+        """Device the shared model runs on"""
+        return self._handle.device if self._handle is not None else "cpu"
+    
     def get_image_from_url(self, image_url: str) -> Image.Image:
         """Download and load image from URL"""
         try:
@@ -64,46 +75,45 @@ class EmbeddingService:
             return [float(b) / 256.0 for b in hash_val[:512]]
         
         try:
-            with torch.no_grad():
-                inputs = self.processor(images=image, return_tensors="pt")
-                inputs = {k: v.to(self.device) for k, v in inputs.items()}
-                
-                image_features = self.model.get_image_features(**inputs)
-                image_features = image_features / image_features.norm(p=2, dim=-1, keepdim=True)
-                
-                embedding = image_features[0].cpu().numpy().tolist()
-                return embedding
+            pixel_values = get_image_preprocessor().preprocess(image)
+            
+            # Backend returns L2-normalized embeddings
+            with self._handle.use() as (model, _, _):
+                embedding = model.encode_images(pixel_values)[0].tolist()
+            return embedding
         except Exception as e:
             logger.error(f"Error embedding image: {e}")
             raise
     
     def embed_text(self, text: str) -> List[float]:
         """Generate embedding for text (max 77 tokens for CLIP)"""
+        return self.embed_texts([text])[0]
+    
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for several texts with a single forward pass"""
         if self.model is None:
-            # Return mock embedding for development
+            # Return mock embeddings for development
             import hashlib
-            hash_val = hashlib.md5(text.encode()).digest()
-            return [float(b) / 256.0 for b in hash_val[:512]]
+            return [
+                [float(b) / 256.0 for b in hashlib.md5(text.encode()).digest()[:512]]
+                for text in texts
+            ]
         
         try:
-            with torch.no_grad():
-                # CLIP has max 77 tokens - truncate and pad
-                inputs = self.processor(
-                    text=text, 
-                    return_tensors="pt", 
+            with self._handle.use() as (model, processor, _):
+                # CLIP has max 77 tokens - truncate and pad to the longest text of the batch
+                inputs = processor(
+                    text=texts, 
+                    return_tensors="np", 
                     padding=True,
                     truncation=True,
                     max_length=77
                 )
-                inputs = {k: v.to(self.device) for k, v in inputs.items()}
-                
-                text_features = self.model.get_text_features(**inputs)
-                text_features = text_features / text_features.norm(p=2, dim=-1, keepdim=True)
                 
-                embedding = text_features[0].cpu().numpy().tolist()
-                return embedding
+                # Backend returns L2-normalized embeddings
+                return model.encode_text(inputs["input_ids"], inputs["attention_mask"]).tolist()
         except Exception as e:
-            logger.error(f"Error embedding text: {e}")
+            logger.error(f"Error embedding {len(texts)} texts: {e}")
             raise
     
     def embed_image_from_url(self, image_url: str) -> List[float]:
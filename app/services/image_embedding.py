@@ -12,13 +12,14 @@ Architecture:
 - Performance: ~100-200ms per image (CPU), ~50ms (GPU)
 """
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Union
 import numpy as np
 from PIL import Image
-import io
-import torch
-import torchvision.transforms as transforms
-from transformers import CLIPModel, CLIPProcessor
+from app.config import get_settings
+from app.services.embedding_cache import get_image_embedding_cache
+from app.services.image_preprocessing import get_image_preprocessor
+from app.services.model_registry import get_model_registry
 
 logger = logging.getLogger(__name__)
 
@@ -26,9 +27,11 @@ class ImageEmbeddingService:
     """Extract image and text embeddings using OpenAI CLIP (ViT-B/32)."""
     
     _instance = None
-    _model = None
-    _processor = None
-    _device = None
+    _handle = None  # Shared CLIP weights from the model registry
+    _decode_pool = None
+    _preprocessor = None
+    _cache = None
+    _batch_size = 16
     
     # CLIP Model Configuration
     MODEL_NAME = "openai/clip-vit-base-patch32"  # ViT-B/32: optimal for e-commerce
@@ -41,26 +44,47 @@ class ImageEmbeddingService:
         return cls._instance
     
     def __init__(self):
-        if self._model is None:
+        if self._handle is None:
             self._initialize_model()
     
+    @property
+    def _model(self):
+        """Shared CLIP backend (torch or ONNX, see clip_backends)."""
+        return self._handle.model
+    
+    @property
+    def _processor(self):
+        return self._handle.processor
+    
+    @property
+    def _device(self):
+        return self._handle.device
+    
     def _initialize_model(self):
-        """Initialize CLIP ViT-B/32 model."""
+        """Initialize CLIP ViT-B/32 model (shared through the model registry)."""
         try:
             logger.info("🔄 Loading CLIP ViT-B/32 model...")
             
-            # Determine device (GPU if available, else CPU)
-            self._device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+            # Same registry key as EmbeddingService: one copy of the weights per process
+            settings = get_settings()
+            logger.info(f"   Model: {self.MODEL_NAME} (backend: {settings.clip_backend})")
+            ImageEmbeddingService._handle = get_model_registry().acquire_clip(
+                self.MODEL_NAME, backend=settings.clip_backend
+            )
             logger.info(f"   Device: {self._device}")
             
-            # Load CLIP model (ViT-B/32)
-            logger.info(f"   Model: {self.MODEL_NAME}")
-            self._model = CLIPModel.from_pretrained(self.MODEL_NAME)
-            self._processor = CLIPProcessor.from_pretrained(self.MODEL_NAME)
+            # Fast preprocessing (JPEG draft decode, direct resize/crop) instead of CLIPProcessor
+            ImageEmbeddingService._preprocessor = get_image_preprocessor()
             
-            # Move model to device
-            self._model = self._model.to(self._device)
-            self._model.eval()  # Set to evaluation mode
+            # Embedding cache keyed by image bytes (LRU + Redis)
+            ImageEmbeddingService._cache = get_image_embedding_cache()
+            
+            # Thread pool for image decoding/preprocessing (PIL releases the GIL)
+            ImageEmbeddingService._batch_size = max(1, settings.image_embedding_batch_size)
+            ImageEmbeddingService._decode_pool = ThreadPoolExecutor(
+                max_workers=max(1, settings.image_decode_workers),
+                thread_name_prefix="clip-decode"
+            )
             
             logger.info(f"✅ CLIP ViT-B/32 loaded successfully")
             logger.info(f"   Embedding dimension: {self.EMBEDDING_DIMENSION}")
@@ -79,41 +103,76 @@ class ImageEmbeddingService:
             
         Returns:
             List of 512 floats (CLIP embedding)
+            
+        Raises:
+            ImageTooLarge: If the image exceeds the IMAGE_MAX_PIXELS cap
         """
-        try:
-            # Convert bytes to PIL Image if needed
-            if isinstance(image_data, bytes):
-                image = Image.open(io.BytesIO(image_data)).convert("RGB")
-            else:
-                image = image_data.convert("RGB")
+        embedding = self.embed_images([image_data])[0].tolist()
+        logger.debug(f"Image embedding generated: {len(embedding)} dimensions")
+        return embedding
+    
+    def embed_images(self, images: List[Union[bytes, Image.Image]],
+                     batch_size: Optional[int] = None) -> np.ndarray:
+        """
+        Generate CLIP embeddings for many images.
+        
+        Images already in the embedding cache (same bytes) are returned without
+        decoding. The rest are decoded in parallel (see image_preprocessing)
+        into one pixel buffer and run through the vision tower in chunks of
+        batch_size.
+        
+        Args:
+            images: List of image bytes or PIL Image objects
+            batch_size: Images per forward pass (default from settings)
             
-            # Process image
-            inputs = self._processor(
-                images=image,
-                return_tensors="pt",
-                padding=True
+        Returns:
+            Contiguous float32 matrix of shape (len(images), 512), L2-normalized rows
+        """
+        embeddings = np.empty((len(images), self.EMBEDDING_DIMENSION), dtype=np.float32)
+        if not images:
+            return embeddings
+        
+        batch_size = batch_size or self._batch_size
+        
+        # Content-addressed cache: identical image bytes skip decoding and inference
+        keys = [self._cache.key_for(image) if isinstance(image, bytes) else None for image in images]
+        cacheable = [i for i, key in enumerate(keys) if key is not None]
+        cached = dict(zip(cacheable, self._cache.get_many([keys[i] for i in cacheable])))
+        misses = []
+        for i in range(len(images)):
+            if cached.get(i) is None:
+                misses.append(i)
+            else:
+                embeddings[i] = cached[i]
+        
+        if not misses:
+            logger.debug(f"Image embeddings served from cache: {len(images)} images")
+            return embeddings
+        
+        try:
+            # Decode + preprocess in parallel, straight into this thread's pixel buffer
+            pixel_values = self._preprocessor.preprocess_batch(
+                [images[i] for i in misses], pool=self._decode_pool
             )
             
-            # Move inputs to device
-            for key in inputs:
-                if isinstance(inputs[key], torch.Tensor):
-                    inputs[key] = inputs[key].to(self._device)
+            with self._handle.use() as (model, _, _):
+                for start in range(0, len(misses), batch_size):
+                    chunk = pixel_values[start:start + batch_size]
+                    rows = misses[start:start + len(chunk)]
+                    
+                    # Backend returns L2-normalized embeddings (important for similarity search)
+                    embeddings[rows] = model.encode_images(chunk)
             
-            # Get image embeddings
-            with torch.no_grad():
-                image_features = self._model.get_image_features(**inputs)
+            self._cache.set_many({keys[i]: embeddings[i] for i in misses if keys[i] is not None})
             
-            # Normalize embeddings (important for similarity search)
-            image_features = torch.nn.functional.normalize(image_features, p=2, dim=-1)
-            
-            # Convert to list
-            embedding = image_features[0].cpu().numpy().tolist()
-            
-            logger.debug(f"Image embedding generated: {len(embedding)} dimensions")
-            return embedding
+            logger.debug(
+                f"Image embeddings generated: {len(misses)} images "
+                f"({len(images) - len(misses)} cached), batch_size={batch_size}"
+            )
+            return embeddings
             
         except Exception as e:
-            logger.error(f"❌ Image embedding error: {e}")
+            logger.error(f"❌ Image embedding error ({len(misses)} images): {e}")
             raise
     
     def embed_text(self, text: str) -> List[float]:
@@ -128,28 +187,20 @@ class ImageEmbeddingService:
             List of 512 floats (CLIP embedding)
         """
         try:
-            # Process text
-            inputs = self._processor(
-                text=text,
-                return_tensors="pt",
-                padding=True,
-                truncation=True
-            )
-            
-            # Move inputs to device
-            for key in inputs:
-                if isinstance(inputs[key], torch.Tensor):
-                    inputs[key] = inputs[key].to(self._device)
-            
-            # Get text embeddings
-            with torch.no_grad():
-                text_features = self._model.get_text_features(**inputs)
-            
-            # Normalize embeddings
-            text_features = torch.nn.functional.normalize(text_features, p=2, dim=-1)
+            with self._handle.use() as (model, processor, _):
+                # Process text
+                inputs = processor(
+                    text=text,
+                    return_tensors="np",
+                    padding=True,
+                    truncation=True
+                )
+                
+                # Get normalized text embeddings
+                text_features = model.encode_text(inputs["input_ids"], inputs["attention_mask"])
             
             # Convert to list
-            embedding = text_features[0].cpu().numpy().tolist()
+            embedding = text_features[0].tolist()
             
             logger.debug(f"Text embedding generated: {len(embedding)} dimensions")
             return embedding
@@ -172,11 +223,10 @@ class ImageEmbeddingService:
             Similarity score (0.0 to 1.0, higher = more similar)
         """
         try:
-            embedding1 = np.array(self.embed_image(image1_data))
-            embedding2 = np.array(self.embed_image(image2_data))
+            embeddings = self.embed_images([image1_data, image2_data])
             
             # Cosine similarity (already normalized, so just dot product)
-            similarity = float(np.dot(embedding1, embedding2))
+            similarity = float(np.dot(embeddings[0], embeddings[1]))
             
             return similarity
             
@@ -192,6 +242,7 @@ class ImageEmbeddingService:
         """Return model information."""
         return {
             "model": self.MODEL_NAME,
+            "backend": self._model.name,
             "architecture": "ViT-B/32 (Vision Transformer)",
             "embedding_dimension": self.EMBEDDING_DIMENSION,
             "device": str(self._device),
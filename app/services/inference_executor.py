@@ -0,0 +1,181 @@
+"""
+Inference executor: runs blocking model calls (CLIP, Whisper) off the asyncio event loop.
+
+Each model gets its own thread pool, sized to its concurrency limit, plus a
+bounded number of waiting calls. When a model is saturated, new calls are
+rejected immediately with InferenceQueueFull instead of piling up, and the
+event loop stays free for cheap requests such as /health.
+
+Usage:
+    executor = get_inference_executor()
+    result = await executor.run("whisper", voice_service.transcribe, path)
+"""
+import asyncio
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceQueueFull(Exception):
+    """Raised when a model already has its maximum number of calls running and waiting."""
+
+
+class ModelExecutor:
+    """Thread pool with a concurrency limit and a bounded wait queue for one model."""
+
+    def __init__(self, name: str, max_concurrency: int = 1, max_queue: int = 64):
+        """
+        Initialize the executor.
+
+        Args:
+            name: Model name (e.g. "clip_text", "whisper")
+            max_concurrency: Maximum number of calls running at the same time
+            max_queue: Maximum number of calls waiting for a free slot
+        """
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix=f"infer-{name}"
+        )
+        self._lock = threading.Lock()
+        self._pending = 0  # running + waiting
+
+        # Stats
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._latency_ms_sum = 0.0
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) in this model's pool and await the result.
+
+        Raises:
+            InferenceQueueFull: If max_concurrency + max_queue calls are already pending
+        """
+        with self._lock:
+            if self._pending >= self.max_concurrency + self.max_queue:
+                self._rejected += 1
+                raise InferenceQueueFull(
+                    f"Inference queue for '{self.name}' is full "
+                    f"({self._pending} pending, limit {self.max_concurrency + self.max_queue})"
+                )
+            self._pending += 1
+            self._submitted += 1
+
+        started = time.perf_counter()
+        try:
+            future = self._pool.submit(functools.partial(fn, *args, **kwargs))
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        # The slot is freed when the call really ends: a cancelled caller does not stop its thread
+        future.add_done_callback(functools.partial(self._finished, started))
+        return await asyncio.wrap_future(future)
+
+    def _finished(self, started: float, future: Future) -> None:
+        """Release the slot of a finished call and record its outcome."""
+        with self._lock:
+            self._pending -= 1
+            if future.cancelled():
+                return  # Cancelled before it started
+            self._latency_ms_sum += (time.perf_counter() - started) * 1000
+            if future.exception() is not None:
+                self._failed += 1
+            else:
+                self._completed += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return call counts, current load and average latency."""
+        finished = (self._completed + self._failed) or 1
+        return {
+            "name": self.name,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": min(self._pending, self.max_concurrency),
+            "queued": max(0, self._pending - self.max_concurrency),
+            "submitted": self._submitted,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "avg_latency_ms": round(self._latency_ms_sum / finished, 2)
+        }
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop accepting work and release the pool threads."""
+        self._pool.shutdown(wait=wait)
+
+
+class InferenceExecutor:
+    """Registry of per-model executors."""
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None, max_queue: int = 64):
+        """
+        Initialize the registry.
+
+        Args:
+            limits: Concurrency limit per model name (unknown models get 1)
+            max_queue: Wait queue size for every model
+        """
+        self.limits = limits or {}
+        self.max_queue = max_queue
+        self._executors: Dict[str, ModelExecutor] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model: str) -> ModelExecutor:
+        """Get or create the executor for a model."""
+        with self._lock:
+            if model not in self._executors:
+                self._executors[model] = ModelExecutor(
+                    name=model,
+                    max_concurrency=self.limits.get(model, 1),
+                    max_queue=self.max_queue
+                )
+                logger.info(
+                    f"Inference executor '{model}' created "
+                    f"(concurrency={self._executors[model].max_concurrency}, queue={self.max_queue})"
+                )
+            return self._executors[model]
+
+    async def run(self, model: str, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking inference call on the given model's executor."""
+        return await self.get(model).run(fn, *args, **kwargs)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return stats for every model executor."""
+        return {name: executor.get_stats() for name, executor in self._executors.items()}
+
+    def shutdown(self) -> None:
+        """Shut down every model executor."""
+        for executor in self._executors.values():
+            executor.shutdown()
+
+
+# Singleton instance
+_inference_executor: Optional[InferenceExecutor] = None
+
+
+def get_inference_executor() -> InferenceExecutor:
+    """Get or create the process-wide inference executor."""
+    global _inference_executor
+    if _inference_executor is None:
+        from app.config import get_settings
+        settings = get_settings()
+        _inference_executor = InferenceExecutor(
+            limits={
+                "clip_text": settings.clip_text_inference_concurrency,
+                "clip_image": settings.clip_image_inference_concurrency,
+                "whisper": settings.whisper_inference_concurrency,
+            },
+            max_queue=settings.inference_max_queue
+        )
+    return _inference_executor
@@ -0,0 +1,262 @@
+"""
+Buffered vector ingest: points from many callers become batched upserts.
+
+Indexing one product used to cost one upsert request of one point. The
+buffer collects points from every caller (API requests, worker tasks, bulk
+loads) and sends them as one upsert per INGEST_BATCH_SIZE points, or after
+INGEST_FLUSH_MS for a partial batch, with up to INGEST_STREAMS upserts in
+flight (spread over the client pool). Upserts use wait=False by default
+(INGEST_WAIT): Qdrant acknowledges once the points are in its write-ahead
+log, and indexes them in the background.
+
+Callers either wait for the acknowledgement of their batch (submit) or only
+enqueue (submit(..., wait=False)) and call flush() at the end of a load.
+The queue is bounded (INGEST_MAX_PENDING points): producers faster than
+Qdrant wait for room instead of growing memory.
+
+A batch Qdrant rejects (a client error such as a malformed point) is retried
+by halves, so one bad point fails alone instead of taking its neighbours
+down with it; the IDs of failed points are kept in the stats, where callers
+that did not wait can find them. Server errors fail the whole batch: the
+circuit breaker handles outages.
+
+Usage:
+    buffer = IngestBuffer(qdrant.upsert_points, name="products")
+    await buffer.submit(point)                # returns once its batch is acknowledged
+    await buffer.submit(point, wait=False)    # bulk load...
+    await buffer.flush()                      # ...then wait for everything
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.services.resilience import CircuitOpen, counts_as_failure
+
+logger = logging.getLogger(__name__)
+
+_FLUSH = object()  # Queue marker: send the partial batch now
+
+THROUGHPUT_WINDOW_S = 60.0
+MAX_FAILED_IDS = 100  # Recent failed point IDs kept in the stats
+
+
+class IngestBuffer:
+    """Collect points and upsert them in batches, several batches in flight."""
+
+    def __init__(
+        self,
+        upsert: Callable[[List[Any]], Awaitable[None]],
+        name: str = "ingest",
+        max_batch_size: int = 256,
+        max_wait_ms: float = 200.0,
+        streams: int = 4,
+        max_pending: int = 20000
+    ):
+        """
+        Initialize the buffer.
+
+        Args:
+            upsert: Sends one batch of points (raises on failure)
+            name: Name used in logs and stats
+            max_batch_size: Points per upsert
+            max_wait_ms: How long a partial batch waits for more points
+            streams: Upserts in flight at once
+            max_pending: Points queued before submit waits for room
+        """
+        self.upsert = upsert
+        self.name = name
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.streams = max(1, streams)
+        self.max_pending = max(self.max_batch_size, max_pending)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        # Stats
+        self._batches = 0
+        self._points = 0
+        self._failed_batches = 0
+        self._failed_points = 0
+        self._upsert_ms_sum = 0.0
+        self._last_error: Optional[str] = None
+        self._failed_ids: Deque[Any] = deque(maxlen=MAX_FAILED_IDS)
+        self._recent: Deque[Tuple[float, int]] = deque()  # (time, points) of acknowledged batches
+
+    def _ensure_started(self) -> None:
+        """Start the collector task on the running event loop (restart if the loop changed)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._worker is not None and not self._worker.done():
+            return
+
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._worker = loop.create_task(self._collect_forever())
+        logger.info(
+            f"Ingest buffer '{self.name}' started "
+            f"(batch={self.max_batch_size}, window={self.max_wait * 1000:.0f}ms, streams={self.streams})"
+        )
+
+    async def submit(self, point: Any, wait: bool = True) -> None:
+        """
+        Queue one point.
+
+        Args:
+            point: PointStruct to upsert
+            wait: Return once the batch holding the point is acknowledged
+                (otherwise once it is queued; see flush)
+
+        Raises:
+            Exception: The upsert error of the point's batch (wait only)
+        """
+        self._ensure_started()
+        future = self._loop.create_future() if wait else None
+        await self._queue.put((point, future))
+        if future is not None:
+            await future
+
+    async def submit_many(self, points: List[Any], wait: bool = True) -> None:
+        """Queue several points (same as submit, one acknowledgement for all)."""
+        if not points:
+            return
+        self._ensure_started()
+        futures = []
+        for point in points:
+            future = self._loop.create_future() if wait else None
+            await self._queue.put((point, future))
+            if future is not None:
+                futures.append(future)
+        if futures:
+            await asyncio.gather(*futures)
+
+    async def flush(self) -> Dict[str, Any]:
+        """
+        Send the partial batch and wait until every queued point is acknowledged or failed.
+
+        Returns:
+            Buffer statistics
+        """
+        if self._queue is not None and self._loop is asyncio.get_running_loop():
+            await self._queue.put((_FLUSH, None))
+            await self._queue.join()
+        return self.get_stats()
+
+    async def _collect_forever(self) -> None:
+        """Form batches from the queue and dispatch them, streams at a time."""
+        slots = asyncio.Semaphore(self.streams)
+        while True:
+            await slots.acquire()
+            batch = []
+            entry = await self._queue.get()
+            if entry[0] is _FLUSH:
+                self._queue.task_done()
+                slots.release()
+                continue
+            batch.append(entry)
+            deadline = self._loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                try:
+                    entry = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - self._loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        entry = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if entry[0] is _FLUSH:
+                    self._queue.task_done()
+                    break
+                batch.append(entry)
+
+            dispatch = self._loop.create_task(self._dispatch(batch))
+            dispatch.add_done_callback(lambda task: self._on_dispatched(task, slots))
+
+    def _on_dispatched(self, task: asyncio.Task, slots: asyncio.Semaphore) -> None:
+        """Free the stream of a finished batch and log unexpected errors."""
+        slots.release()
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Ingest buffer '{self.name}' dispatch error: {task.exception()}")
+
+    async def _dispatch(self, batch: List[Tuple[Any, Optional[asyncio.Future]]]) -> None:
+        """Upsert one batch and settle its callers."""
+        try:
+            await self._upsert_batch(batch)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    async def _upsert_batch(self, batch: List[Tuple[Any, Optional[asyncio.Future]]]) -> None:
+        """Upsert points and settle their callers, retrying a rejected batch by halves."""
+        points = [point for point, _ in batch]
+        started = time.perf_counter()
+        try:
+            await self.upsert(points)
+        except Exception as e:
+            if len(batch) > 1 and not isinstance(e, CircuitOpen) and not counts_as_failure(e):
+                # One bad point must not fail its neighbours
+                logger.warning(
+                    f"Ingest buffer '{self.name}': upsert of {len(points)} points rejected, "
+                    f"retrying by halves: {e}"
+                )
+                middle = len(batch) // 2
+                await asyncio.gather(self._upsert_batch(batch[:middle]), self._upsert_batch(batch[middle:]))
+                return
+            self._failed_batches += 1
+            self._failed_points += len(points)
+            self._failed_ids.extend(getattr(point, "id", point) for point in points)
+            self._last_error = str(e)
+            logger.error(f"Ingest buffer '{self.name}': upsert of {len(points)} points failed: {e}")
+            for _, future in batch:
+                if future is not None and not future.done():
+                    future.set_exception(e)
+        else:
+            self._record_batch(len(points), (time.perf_counter() - started) * 1000)
+            for _, future in batch:
+                if future is not None and not future.done():
+                    future.set_result(None)
+
+    def _record_batch(self, size: int, upsert_ms: float) -> None:
+        """Update throughput statistics for one acknowledged batch."""
+        now = time.monotonic()
+        self._batches += 1
+        self._points += size
+        self._upsert_ms_sum += upsert_ms
+        self._recent.append((now, size))
+        while self._recent and self._recent[0][0] < now - THROUGHPUT_WINDOW_S:
+            self._recent.popleft()
+        logger.debug(f"Ingest batch '{self.name}': {size} points in {upsert_ms:.1f}ms")
+
+    def throughput(self) -> float:
+        """Points acknowledged per second over the last minute."""
+        now = time.monotonic()
+        recent = [(at, size) for at, size in self._recent if at >= now - THROUGHPUT_WINDOW_S]
+        if not recent:
+            return 0.0
+        span = max(now - recent[0][0], 1.0)
+        return sum(size for _, size in recent) / span
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return batching and throughput statistics."""
+        batches = self._batches or 1
+        return {
+            "name": self.name,
+            "max_batch_size": self.max_batch_size,
+            "window_ms": self.max_wait * 1000,
+            "streams": self.streams,
+            "batches": self._batches,
+            "points": self._points,
+            "avg_batch_size": round(self._points / batches, 2),
+            "avg_upsert_ms": round(self._upsert_ms_sum / batches, 2),
+            "points_per_s": round(self.throughput(), 1),
+            "failed_batches": self._failed_batches,
+            "failed_points": self._failed_points,
+            "failed_ids": [str(point_id) for point_id in self._failed_ids],
+            "last_error": self._last_error,
+            "pending": self._queue.qsize() if self._queue is not None else 0
+        }
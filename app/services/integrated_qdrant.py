@@ -5,19 +5,79 @@ Uses local storage directory for persistence.
 """
 import os
 import logging
-from typing import List, Dict, Optional
+from typing import Any, List, Dict
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
-import json
+from qdrant_client.models import PointStruct
+from app.services.collection_migration import mark_migration_changes
+from app.services.local_qdrant import get_local_client, is_local_mode, qdrant_mode
+from app.services.payload_store import (
+    DISPLAY_FIELDS,
+    get_payload_store,
+    hydrate_results,
+    hydration_enabled,
+    payload_traffic,
+    search_payload_bytes,
+    search_payload_selector,
+)
+from app.services.point_ids import product_point_id
+from app.services.provisioning import (
+    load_collection_spec,
+    provision_serving_collection,
+    resolve_collection,
+    serving_alias,
+)
+from app.services.resilience import get_guard
+from app.services.search_filters import build_search_filter
+from app.services.search_params import build_search_params
+from app.services.similar_products import get_similar_products_store, mark_products_changed
+from app.services.vector_index import fallback_vector_index, local_search, primary_vector_index
 
 logger = logging.getLogger(__name__)
 
+
+# Request/response builders shared by the sync and async services
+def build_product_point(product_id: str, name: str, description: str,
+                        embedding: List[float], metadata: Dict = None) -> PointStruct:
+    """Point for a product, at its stable ID (see point_ids)."""
+    return PointStruct(
+        id=product_point_id(product_id),
+        vector=embedding,
+        payload={
+            "product_id": product_id,
+            "name": name,
+            "description": description,
+            "full_text": f"{name} {description}",  # Combine name + description for better search
+            **(metadata or {})
+        }
+    )
+
+
+def format_search_results(scored_points) -> List[Dict]:
+    """Convert scored points to API results."""
+    return [
+        {
+            "id": scored_point.payload.get("product_id"),
+            "score": scored_point.score,
+            "metadata": {
+                "name": scored_point.payload.get("name"),
+                "description": scored_point.payload.get("description"),
+                "image_url": scored_point.payload.get("image_url"),
+                "price": scored_point.payload.get("price"),
+                "category": scored_point.payload.get("category"),
+                "url": scored_point.payload.get("url")
+            }
+        }
+        for scored_point in scored_points
+    ]
+
+
 class IntegratedQdrantService:
     """Qdrant service running in the same container."""
     
     _instance = None
     _client = None
-    _collection_name = "products"
+    _spec_name = "products"  # Base name: collection spec, first collection
+    _collection_name = serving_alias(_spec_name)  # Every operation goes through the alias
     _initialized = False
     
     def __new__(cls):
@@ -38,9 +98,16 @@ class IntegratedQdrantService:
         self._initialize_client()
     
     def _initialize_client(self):
-        """Initialize Qdrant client connecting to remote server."""
+        """Initialize Qdrant client: remote server, or embedded local mode (QDRANT_MODE)."""
         try:
+            if is_local_mode():
+                self._client = get_local_client()
+                self._ensure_collection_exists()
+                logger.info(f"✅ Qdrant initialized in local mode ({qdrant_mode()})")
+                return
+
             # Connect to remote Qdrant server instead of local storage
+            from app.config import get_settings
             qdrant_host = os.getenv("QDRANT_HOST", "qdrant")  # Default to docker service name
             qdrant_port = int(os.getenv("QDRANT_PORT", "6333"))
             
@@ -52,7 +119,7 @@ class IntegratedQdrantService:
                 port=qdrant_port,
                 prefer_grpc=False,  # Use HTTP for better compatibility
                 https=False,
-                timeout=60.0  # Increased timeout to 60 seconds
+                timeout=get_settings().qdrant_timeout  # Fail fast; the circuit breaker covers outages (see resilience)
             )
             
             # Create collection if it doesn't exist
@@ -79,21 +146,15 @@ class IntegratedQdrantService:
             logger.warning(f"Could not retrieve telemetry: {e}")
     
     def _ensure_collection_exists(self):
-        """Create collection if it doesn't exist."""
+        """Create the collection from its spec, or reconcile it (see provisioning)."""
         try:
-            collections = self._client.get_collections()
-            collection_names = [c.name for c in collections.collections]
-            
-            if self._collection_name not in collection_names:
-                logger.info(f"Creating collection: {self._collection_name}")
-                self._client.create_collection(
-                    collection_name=self._collection_name,
-                    vectors_config=VectorParams(
-                        size=512,  # CLIP vector dimension (openai/clip-vit-base-patch32)
-                        distance=Distance.COSINE
-                    )
-                )
-            else:
+            from app.config import get_settings
+            report = provision_serving_collection(
+                self._client,
+                load_collection_spec(self._spec_name),
+                update=get_settings().qdrant_provision_update
+            )
+            if not report["created"]:
                 logger.info(f"Collection '{self._collection_name}' already exists")
                 
         except Exception as e:
@@ -102,31 +163,19 @@ class IntegratedQdrantService:
     
     def index_product(self, product_id: str, name: str, description: str, 
                      embedding: List[float], metadata: Dict = None) -> tuple:
-        """Index a product with embedding. Returns (success: bool, qdrant_id: int or None)"""
+        """Index a product with embedding. Returns (success: bool, qdrant_id: str or None)"""
         self._ensure_initialized()  # Lazy init
         try:
-            # Combine name + description for better search
-            full_text = f"{name} {description}"
-            
-            # Generate the Qdrant ID (same as what would be stored)
-            qdrant_id = hash(product_id) % (2**63)  # Convert to positive int64
-            
-            point = PointStruct(
-                id=qdrant_id,
-                vector=embedding,
-                payload={
-                    "product_id": product_id,
-                    "name": name,
-                    "description": description,
-                    "full_text": full_text,
-                    **(metadata or {})
-                }
-            )
+            point = build_product_point(product_id, name, description, embedding, metadata)
+            qdrant_id = point.id  # Stable ID: re-indexing the same product overwrites its point
             
-            self._client.upsert(
+            get_guard().call_sync("upsert", lambda: self._client.upsert(
                 collection_name=self._collection_name,
                 points=[point]
-            )
+            ))
+            mark_products_changed([product_id])  # Refresh its similar-products neighbourhood
+            mark_migration_changes([product_id])  # Re-embedding catch-up
+            get_payload_store().set_many({product_id: point.payload})  # Hydration of search results
             
             logger.info(f"Indexed product: {product_id} with Qdrant ID: {qdrant_id}")
             return True, qdrant_id
@@ -138,76 +187,106 @@ class IntegratedQdrantService:
     def search(self, query_vector: List[float], limit: int = 10, 
                score_threshold: float = 0.3, 
                category_filter: str = None, 
-               min_score: float = None) -> List[Dict]:
+               min_score: float = None,
+               price_min: float = None,
+               price_max: float = None,
+               filters: Dict[str, Any] = None,
+               tier: str = None,
+               hnsw_ef: int = None,
+               exact: bool = False) -> List[Dict]:
         """
         Search for similar products with intelligent filtering.
         
+        Filters are applied by Qdrant (see search_filters), so selective
+        filters still return up to limit results.
+        
         Args:
             query_vector: Query embedding vector
             limit: Max number of results to return
             score_threshold: Minimum similarity score (0.0-1.0, default 0.3 for better precision)
-            category_filter: Optional category filter
+            category_filter: Optional category filter (case-insensitive word match)
             min_score: Alias for score_threshold (for backward compatibility)
+            price_min: Optional minimum price (inclusive)
+            price_max: Optional maximum price (inclusive)
+            filters: Optional filters on other payload fields
+            tier: Latency tier: fast, balanced or precise (see search_params)
+            hnsw_ef: Optional HNSW ef (overrides the tier)
+            exact: Exact search instead of HNSW (slow, for evaluation)
         
         Returns:
             List of search results sorted by score
+            
+        Raises:
+            ValueError: If a filter or search hint is invalid
         """
         self._ensure_initialized()  # Lazy init
         
+        # Invalid filters raise ValueError to the caller (HTTP 400), not an empty result
+        query_filter = build_search_filter(category_filter, price_min, price_max, filters)
+        search_params = build_search_params(tier, hnsw_ef, exact)
+        
+        # Use min_score if provided (backward compatibility)
+        if min_score is not None:
+            score_threshold = min_score
+
+        # Small catalogue: exact search in-process, no network round trip (see vector_index)
+        local_args = (query_vector, limit, score_threshold, category_filter, price_min, price_max)
+        local_results = local_search(primary_vector_index(filters), *local_args)
+        if local_results is not None:
+            return local_results
+
         try:
-            # Use min_score if provided (backward compatibility)
-            if min_score is not None:
-                score_threshold = min_score
-            
-            # Fetch more results than limit to allow filtering
-            fetch_limit = max(limit * 2, 50)
-            
-            results = self._client.search(
+            results = get_guard().call_sync("search", lambda: self._client.search(
                 collection_name=self._collection_name,
                 query_vector=query_vector,
-                limit=fetch_limit,
-                score_threshold=score_threshold  # Intelligent threshold
-            )
+                query_filter=query_filter,
+                limit=limit,
+                score_threshold=score_threshold,  # Intelligent threshold
+                search_params=search_params,  # ef / exact / quantization rescoring
+                with_payload=search_payload_selector()  # IDs + projected fields, hydrated below
+            ))
             
-            search_results = []
-            for scored_point in results:
-                payload = scored_point.payload
-                
-                # Apply category filter if provided
-                if category_filter:
-                    product_category = payload.get("category", "").lower()
-                    if category_filter.lower() not in product_category:
-                        continue
-                
-                search_results.append({
-                    "id": payload.get("product_id"),
-                    "score": scored_point.score,
-                    "metadata": {
-                        "name": payload.get("name"),
-                        "description": payload.get("description"),
-                        "image_url": payload.get("image_url"),
-                        "price": payload.get("price"),
-                        "category": payload.get("category"),
-                        "url": payload.get("url")
-                    }
-                })
-                
-                # Stop once we have enough results
-                if len(search_results) >= limit:
-                    break
+            search_results = format_search_results(results)
+            fetched = self._hydrate(search_results)
+            payload_traffic.record(search_payload_bytes(results), fetched)
             
             logger.info(f"Search returned {len(search_results)} results (threshold={score_threshold})")
             return search_results
             
         except Exception as e:
             logger.error(f"Search failed: {e}")
+            local_results = local_search(fallback_vector_index(filters), *local_args)
+            if local_results is not None:
+                logger.warning(f"Served {len(local_results)} results from the local vector index")
+                return local_results
             return []
     
+    def _fetch_payloads(self, product_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Full payloads of products from Qdrant (payload store misses)."""
+        points = get_guard().call_sync("retrieve", lambda: self._client.retrieve(
+            collection_name=self._collection_name,
+            ids=[product_point_id(product_id) for product_id in product_ids],
+            with_payload=["product_id", *DISPLAY_FIELDS]
+        ))
+        return {str(point.payload["product_id"]): point.payload for point in points if point.payload}
+    
+    def _hydrate(self, results: List[Dict]) -> int:
+        """Fill display fields of results (see payload_store). Returns bytes fetched from Qdrant."""
+        if not results or not hydration_enabled():
+            return 0
+        try:
+            return hydrate_results(results, self._fetch_payloads)
+        except Exception as e:
+            logger.warning(f"Could not hydrate search results: {e}")
+            return 0
+    
     def get_collection_stats(self) -> Dict:
         """Get collection statistics."""
         self._ensure_initialized()  # Lazy init
         try:
-            collection_info = self._client.get_collection(self._collection_name)
+            collection_info = get_guard().call_sync(
+                "get_collection", lambda: self._client.get_collection(self._collection_name)
+            )
             return {
                 "name": self._collection_name,
                 "points_count": collection_info.points_count,
@@ -222,7 +301,7 @@ class IntegratedQdrantService:
         """Check if Qdrant is healthy."""
         self._ensure_initialized()  # Lazy init
         try:
-            self._client.get_collections()
+            get_guard().call_sync("health", self._client.get_collections)
             return True
         except Exception as e:
             logger.error(f"Qdrant health check failed: {e}")
@@ -231,8 +310,16 @@ class IntegratedQdrantService:
     def clear_collection(self) -> bool:
         """Clear all data in collection (for testing)."""
         try:
-            self._client.delete_collection(self._collection_name)
+            self._client.delete_collection(resolve_collection(self._client, self._collection_name))
             self._ensure_collection_exists()
+            try:
+                get_similar_products_store().clear()
+            except Exception as e:
+                logger.warning(f"Could not clear similar-products table: {e}")
+            try:
+                get_payload_store().clear()
+            except Exception as e:
+                logger.warning(f"Could not clear product payload table: {e}")
             logger.info("Collection cleared")
             return True
         except Exception as e:
@@ -1,22 +1,22 @@
 """
 Lightweight embedding service using sentence-transformers (no PyTorch/Transformers bloat).
-Uses Redis cache to avoid recomputing embeddings.
+Uses the shared binary embedding cache (LRU + Redis) to avoid recomputing embeddings.
 """
-import json
-import hashlib
 import numpy as np
 from typing import List, Optional
 from sentence_transformers import SentenceTransformer
-import redis
 import asyncio
 from functools import lru_cache
+from app.services.embedding_cache import EmbeddingCache, create_embedding_cache
 
 class LightweightEmbeddingService:
     """Generate and cache embeddings efficiently."""
     
     _instance = None
     _model = None
-    _redis_client = None
+    _embedding_cache = None
+    
+    MODEL_NAME = 'all-MiniLM-L6-v2'
     
     def __new__(cls):
         if cls._instance is None:
@@ -26,109 +26,39 @@ class LightweightEmbeddingService:
     def __init__(self):
         if self._model is None:
             # Using MiniLM (40MB vs 400MB for CLIP)
-            self._model = SentenceTransformer('all-MiniLM-L6-v2')
-    
-    @staticmethod
-    def _get_redis():
-        """Get Redis connection (cached)."""
-        from app.config import get_settings
-        settings = get_settings()
-        if LightweightEmbeddingService._redis_client is None:
-            try:
-                LightweightEmbeddingService._redis_client = redis.Redis(
-                    host=settings.redis_host,
-                    port=int(settings.redis_port),
-                    password=settings.redis_password,
-                    ssl=False,  # Disable SSL for Docker Compose communication
-                    decode_responses=False
-                )
-                LightweightEmbeddingService._redis_client.ping()
-            except Exception as e:
-                print(f"Redis connection failed: {e}")
-                LightweightEmbeddingService._redis_client = None
-        return LightweightEmbeddingService._redis_client
+            self._model = SentenceTransformer(self.MODEL_NAME)
     
-    def _get_cache_key(self, text: str) -> str:
-        """Generate cache key for embedding."""
-        return f"embedding:{hashlib.md5(text.encode()).hexdigest()}"
+    @property
+    def _cache(self) -> EmbeddingCache:
+        """Binary embedding cache (LRU + Redis), keyed by model version."""
+        if LightweightEmbeddingService._embedding_cache is None:
+            LightweightEmbeddingService._embedding_cache = create_embedding_cache(
+                namespace="emb:minilm",
+                dimension=self._model.get_sentence_embedding_dimension(),
+                version=self.MODEL_NAME
+            )
+        return LightweightEmbeddingService._embedding_cache
     
     def embed(self, text: str) -> List[float]:
         """Get embedding for text, using cache if available."""
-        cache_key = self._get_cache_key(text)
-        redis_conn = self._get_redis()
-        
-        # Try to get from Redis cache
-        if redis_conn:
-            try:
-                cached = redis_conn.get(cache_key)
-                if cached:
-                    return json.loads(cached)
-            except Exception as e:
-                print(f"Redis cache get failed: {e}")
-        
-        # Generate embedding
-        embedding = self._model.encode(text).tolist()
-        
-        # Store in Redis cache (24h TTL)
-        if redis_conn:
-            try:
-                redis_conn.setex(
-                    cache_key,
-                    86400,  # 24 hours
-                    json.dumps(embedding)
-                )
-            except Exception as e:
-                print(f"Redis cache set failed: {e}")
-        
-        return embedding
+        return self.embed_batch([text])[0]
     
     def embed_batch(self, texts: List[str]) -> List[List[float]]:
-        """Embed multiple texts efficiently."""
-        results = []
-        redis_conn = self._get_redis()
-        
-        # Try batch cache first
-        uncached_texts = []
-        uncached_indices = []
-        cache_keys = []
-        
-        for i, text in enumerate(texts):
-            cache_key = self._get_cache_key(text)
-            cache_keys.append(cache_key)
-            
-            if redis_conn:
-                try:
-                    cached = redis_conn.get(cache_key)
-                    if cached:
-                        results.append(json.loads(cached))
-                        continue
-                except:
-                    pass
-            
-            uncached_texts.append(text)
-            uncached_indices.append(i)
-            results.append(None)
+        """Embed multiple texts efficiently (one MGET, one pipelined SET)."""
+        cache_keys = [self._cache.key_for(text) for text in texts]
+        results = self._cache.get_many(cache_keys)
+        uncached_indices = [i for i, cached in enumerate(results) if cached is None]
         
         # Generate embeddings for uncached texts
-        if uncached_texts:
-            embeddings = self._model.encode(uncached_texts)
-            
+        if uncached_indices:
+            embeddings = self._model.encode([texts[i] for i in uncached_indices])
             for idx, embedding in zip(uncached_indices, embeddings):
-                embedding_list = embedding.tolist()
-                results[idx] = embedding_list
-                
-                # Cache it
-                if redis_conn:
-                    try:
-                        redis_conn.setex(
-                            cache_keys[idx],
-                            86400,
-                            json.dumps(embedding_list)
-                        )
-                    except:
-                        pass
+                results[idx] = embedding
+            
+            # Cache them
+            self._cache.set_many({cache_keys[idx]: results[idx] for idx in uncached_indices})
         
-        return results
+        return [np.asarray(embedding).tolist() for embedding in results]
     
     def similarity(self, text1: str, text2: str) -> float:
         """Calculate cosine similarity between two texts."""
@@ -0,0 +1,107 @@
+"""
+Embedded Qdrant (local mode) for single-node deployments.
+
+Selected by QDRANT_MODE:
+- remote (default): Qdrant server at QDRANT_HOST (HTTP/gRPC)
+- embedded: qdrant-client local mode persisted under QDRANT_DATA_PATH
+- memory: local mode in RAM only (tests, demos; lost on restart)
+
+Local mode runs inside the API process: no Qdrant container and no
+network round trip per search. It scans vectors with numpy instead of
+using HNSW, which is fast for small catalogues (up to tens of thousands
+of products) but grows linearly; see app.tools.qdrant_mode_benchmark.
+
+One process owns the storage directory (it is locked), so every service
+shares a single local client (calls serialized, local mode is not
+thread-safe), and indexing must go through the API: separate indexing
+workers need remote mode.
+
+Usage:
+    client = get_local_client()                 # sync services
+    client = ThreadedAsyncClient(client)        # async service
+"""
+import asyncio
+import logging
+import threading
+from typing import Optional
+
+from qdrant_client import QdrantClient
+
+logger = logging.getLogger(__name__)
+
+QDRANT_MODES = ("remote", "embedded", "memory")
+
+_local_client: Optional["LockedClient"] = None
+_local_client_lock = threading.Lock()
+
+
+class LockedClient:
+    """
+    Thread-safe proxy of the local client.
+
+    Local mode is not thread-safe, and sync routes (thread pool) and the
+    async service (worker threads) share it, so calls are serialized.
+    """
+
+    def __init__(self, client: QdrantClient):
+        self._client = client
+        self._lock = threading.RLock()
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._client, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            with self._lock:
+                return attribute(*args, **kwargs)
+        return call
+
+
+def qdrant_mode() -> str:
+    """Configured Qdrant mode (QDRANT_MODE)."""
+    from app.config import get_settings
+    mode = get_settings().qdrant_mode.strip().lower()
+    if mode not in QDRANT_MODES:
+        raise ValueError(f"Unknown QDRANT_MODE '{mode}' (expected one of {', '.join(QDRANT_MODES)})")
+    return mode
+
+
+def is_local_mode() -> bool:
+    """Whether Qdrant runs embedded in this process."""
+    return qdrant_mode() != "remote"
+
+
+def get_local_client() -> LockedClient:
+    """Process-wide local-mode client (embedded storage or in-memory)."""
+    global _local_client
+    with _local_client_lock:
+        if _local_client is None:
+            from app.config import get_settings
+            settings = get_settings()
+            if qdrant_mode() == "memory":
+                logger.info("Starting in-memory Qdrant (local mode)")
+                _local_client = LockedClient(QdrantClient(location=":memory:"))
+            else:
+                logger.info(f"Starting embedded Qdrant (local mode) at {settings.qdrant_data_path}")
+                _local_client = LockedClient(QdrantClient(path=settings.qdrant_data_path))
+        return _local_client
+
+
+class ThreadedAsyncClient:
+    """Async facade over the local client: calls run in worker threads, off the event loop."""
+
+    def __init__(self, client: LockedClient):
+        self._client = client
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._client, name)
+        if not callable(attribute):
+            return attribute
+
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(attribute, *args, **kwargs)
+        return call
+
+    async def close(self) -> None:
+        """The local client is shared by every service: left open until exit."""
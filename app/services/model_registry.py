@@ -0,0 +1,297 @@
+"""
+Process-wide model registry.
+
+Each model is loaded once per process and shared through refcounted handles,
+so EmbeddingService, ImageEmbeddingService and the worker all use the same
+CLIP weights instead of loading their own copy (~600MB each).
+
+Models that sit idle can be unloaded to free memory; the next access through
+a handle reloads them transparently. Inference runs inside handle.use(), which
+marks the model as in use so an idle unload never pulls it from under a call.
+
+Usage:
+    handle = get_model_registry().acquire_clip("openai/clip-vit-base-patch32")
+    with handle.use() as (model, processor, device):
+        tokens = processor(text=["red shoes"], return_tensors="np", padding=True)
+        embeddings = model.encode_text(tokens["input_ids"], tokens["attention_mask"])
+    handle.release()
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A loader returns (model, processor, device)
+ModelLoader = Callable[[], Tuple[Any, Any, Any]]
+
+
+@dataclass
+class RegisteredModel:
+    """Registry entry for one model."""
+    name: str
+    loader: ModelLoader
+    model: Any = None
+    processor: Any = None
+    device: Any = None
+    refcount: int = 0
+    in_use: int = 0
+    loads: int = 0
+    memory_bytes: int = 0
+    load_time_s: float = 0.0
+    last_used: float = field(default_factory=time.monotonic)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @property
+    def loaded(self) -> bool:
+        return self.model is not None
+
+
+class ModelHandle:
+    """Shared, refcounted reference to a registry model."""
+
+    def __init__(self, registry: "ModelRegistry", entry: RegisteredModel):
+        self._registry = registry
+        self._entry = entry
+        self._released = False
+
+    @property
+    def name(self) -> str:
+        return self._entry.name
+
+    @property
+    def model(self) -> Any:
+        """The model (reloaded if it was unloaded while idle)."""
+        return self._registry._ensure_loaded(self._entry)[0]
+
+    @property
+    def processor(self) -> Any:
+        return self._registry._ensure_loaded(self._entry)[1]
+
+    @property
+    def device(self) -> Any:
+        return self._registry._ensure_loaded(self._entry)[2]
+
+    @contextmanager
+    def use(self) -> Iterator[Tuple[Any, Any, Any]]:
+        """
+        Hold the model for a call: it is not unloaded until the block exits.
+
+        Yields:
+            (model, processor, device), reloaded if the model was unloaded
+        """
+        loaded = self._registry._begin_use(self._entry)
+        try:
+            yield loaded
+        finally:
+            self._registry._end_use(self._entry)
+
+    def release(self) -> None:
+        """Drop this reference (idempotent)."""
+        if not self._released:
+            self._released = True
+            self._registry._release(self._entry)
+
+    def __enter__(self) -> "ModelHandle":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class ModelRegistry:
+    """Load each model once and hand out shared handles."""
+
+    def __init__(self):
+        self._entries: Dict[str, RegisteredModel] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, name: str, loader: ModelLoader) -> ModelHandle:
+        """
+        Get a handle on a model, loading it on first use.
+
+        Args:
+            name: Registry key (e.g. "clip-torch:openai/clip-vit-base-patch32")
+            loader: Function loading (model, processor, device); only called once per load
+
+        Returns:
+            ModelHandle sharing the registry copy of the model
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                entry = RegisteredModel(name=name, loader=loader)
+                self._entries[name] = entry
+            entry.refcount += 1
+
+        try:
+            self._ensure_loaded(entry)
+        except Exception:
+            self._release(entry)
+            raise
+        return ModelHandle(self, entry)
+
+    def acquire_clip(self, model_name: str, backend: Optional[str] = None) -> ModelHandle:
+        """
+        Get a handle on a CLIP backend (see clip_backends) and its processor.
+
+        Args:
+            model_name: HuggingFace CLIP model name
+            backend: "torch" or "onnx" (default: CLIP_BACKEND setting)
+        """
+        from app.config import get_settings
+        from app.services.clip_backends import load_clip_backend
+
+        settings = get_settings()
+        backend = backend or settings.clip_backend
+        if backend == "onnx" and settings.onnx_quantize:
+            key = f"clip-onnx-int8:{model_name}"
+        else:
+            key = f"clip-{backend}:{model_name}"
+
+        return self.acquire(key, lambda: load_clip_backend(
+            model_name,
+            backend=backend,
+            onnx_model_dir=settings.onnx_model_dir,
+            onnx_quantize=settings.onnx_quantize,
+            onnx_num_threads=settings.onnx_num_threads
+        ))
+
+    def _ensure_loaded(self, entry: RegisteredModel) -> Tuple[Any, Any, Any]:
+        """Load the entry if needed and mark it as used; returns (model, processor, device)."""
+        with entry.lock:
+            return self._load_locked(entry)
+
+    def _begin_use(self, entry: RegisteredModel) -> Tuple[Any, Any, Any]:
+        """Mark the entry as in use (loading it if needed)."""
+        with entry.lock:
+            loaded = self._load_locked(entry)
+            entry.in_use += 1
+            return loaded
+
+    def _end_use(self, entry: RegisteredModel) -> None:
+        with entry.lock:
+            entry.in_use = max(0, entry.in_use - 1)
+            entry.last_used = time.monotonic()
+
+    def _load_locked(self, entry: RegisteredModel) -> Tuple[Any, Any, Any]:
+        """Load the entry if needed; the caller holds entry.lock."""
+        entry.last_used = time.monotonic()
+        if not entry.loaded:
+            logger.info(f"🔄 Loading model '{entry.name}'...")
+            started = time.perf_counter()
+            model, processor, device = entry.loader()
+            entry.load_time_s = time.perf_counter() - started
+            entry.memory_bytes = _model_memory_bytes(model)
+            entry.processor = processor
+            entry.device = device
+            entry.model = model
+            entry.loads += 1
+            logger.info(
+                f"✅ Model '{entry.name}' loaded in {entry.load_time_s:.1f}s "
+                f"({entry.memory_bytes / 1024 / 1024:.0f} MB)"
+            )
+        return entry.model, entry.processor, entry.device
+
+    def _release(self, entry: RegisteredModel) -> None:
+        with self._lock:
+            entry.refcount = max(0, entry.refcount - 1)
+
+    def unload(self, name: str, force: bool = False) -> bool:
+        """
+        Unload a model now. Handles stay valid and reload it on next access.
+
+        Args:
+            name: Registry key
+            force: Unload even while a call holds the model (see ModelHandle.use)
+
+        Returns:
+            True if the model was unloaded, False if it was not loaded or is in use
+        """
+        entry = self._entries.get(name)
+        return entry is not None and self._unload(entry, force=force)
+
+    def unload_idle(self, max_idle_seconds: float) -> List[str]:
+        """
+        Unload every model not used for max_idle_seconds; models in use are skipped.
+
+        Blocks while a model is being loaded: call it off the event loop.
+
+        Returns:
+            Names of the unloaded models
+        """
+        return [
+            name for name, entry in list(self._entries.items())
+            if self._unload(entry, max_idle_seconds=max_idle_seconds)
+        ]
+
+    def _unload(self, entry: RegisteredModel, force: bool = False,
+                max_idle_seconds: Optional[float] = None) -> bool:
+        with entry.lock:
+            if not entry.loaded or (entry.in_use and not force):
+                return False
+            if max_idle_seconds is not None and time.monotonic() - entry.last_used < max_idle_seconds:
+                return False
+            entry.model = None
+            entry.processor = None
+            entry.memory_bytes = 0
+        _free_accelerator_memory()
+        logger.info(f"Model '{entry.name}' unloaded (refcount={entry.refcount})")
+        return True
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return load state, refcount and memory used per model."""
+        now = time.monotonic()
+        return {
+            name: {
+                "loaded": entry.loaded,
+                "refcount": entry.refcount,
+                "in_use": entry.in_use,
+                "memory_mb": round(entry.memory_bytes / 1024 / 1024, 1),
+                "device": str(entry.device) if entry.device is not None else None,
+                "loads": entry.loads,
+                "load_time_s": round(entry.load_time_s, 2),
+                "idle_s": round(now - entry.last_used, 1)
+            }
+            for name, entry in self._entries.items()
+        }
+
+    def total_memory_bytes(self) -> int:
+        """Memory used by all loaded models."""
+        return sum(entry.memory_bytes for entry in self._entries.values())
+
+
+def _model_memory_bytes(model: Any) -> int:
+    """Memory used by a model: its own estimate, else torch parameters and buffers (0 if unknown)."""
+    try:
+        if hasattr(model, "memory_bytes"):
+            return int(model.memory_bytes)
+        tensors = list(model.parameters()) + list(model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    except Exception:
+        return 0
+
+
+def _free_accelerator_memory() -> None:
+    """Return cached GPU memory after an unload (no-op on CPU)."""
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except Exception:
+        pass
+
+
+# Singleton instance
+_model_registry: Optional[ModelRegistry] = None
+
+
+def get_model_registry() -> ModelRegistry:
+    """Get the process-wide model registry."""
+    global _model_registry
+    if _model_registry is None:
+        _model_registry = ModelRegistry()
+    return _model_registry
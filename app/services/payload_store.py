@@ -0,0 +1,327 @@
+"""
+Product payload store: hydrates search results after an ID-only search.
+
+Searches ask Qdrant for scores plus a few payload fields
+(SEARCH_PAYLOAD_FIELDS) instead of every payload (name, description,
+full_text, metadata). Only the final top-k results are hydrated with their
+display fields, from:
+1. an in-process LRU (PAYLOAD_CACHE_SIZE entries, PAYLOAD_CACHE_TTL seconds)
+2. the Redis hash payloads:products (product_id -> JSON display fields)
+3. Qdrant itself for the remaining misses (retrieve by ID), written back
+
+The indexing paths write payloads through, so 3 only happens on a cold
+table. Payload bytes per query (projected search payloads vs hydration
+fetches from Qdrant) are counted and reported in /stats.
+
+Usage:
+    store = get_payload_store()
+    payloads = store.get_many(["sku-1", "sku-2"])
+    apply_payloads(results, payloads)
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Fields shown in search results (the metadata of format_search_results)
+DISPLAY_FIELDS = ("name", "description", "image_url", "price", "category", "url")
+
+
+class ProductPayloadStore:
+    """Display fields per product: LRU in front of a Redis hash."""
+
+    def __init__(self, redis_client: Any = None, key: str = "payloads:products",
+                 capacity: int = 10000, ttl: float = 300.0):
+        """
+        Initialize the store.
+
+        Args:
+            redis_client: Redis client (default: built from settings on first use)
+            key: Redis hash of the payloads
+            capacity: LRU entries kept in process (0 disables the LRU)
+            ttl: Seconds an LRU entry is trusted (other replicas may re-index a product)
+        """
+        self._redis = redis_client
+        self.key = key
+        self.capacity = capacity
+        self.ttl = ttl
+        self._lru: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis_down_until = 0.0  # Skip Redis for a while after a failure (no timeout per query)
+        self.stats = {"lru_hits": 0, "redis_hits": 0, "misses": 0}
+
+    def _get_redis(self):
+        """Redis client (decoded responses)."""
+        if self._redis is None:
+            if not REDIS_AVAILABLE:
+                raise RuntimeError("redis-py is not installed")
+            from app.config import get_settings
+            settings = get_settings()
+            redis_url = settings.redis_url or os.getenv("REDIS_URL")
+            if redis_url:
+                self._redis = redis.from_url(redis_url, decode_responses=True,
+                                             socket_timeout=2, socket_connect_timeout=1)
+            else:
+                self._redis = redis.Redis(
+                    host=settings.redis_host,
+                    port=int(settings.redis_port),
+                    password=settings.redis_password or None,
+                    decode_responses=True,
+                    socket_timeout=2,
+                    socket_connect_timeout=1
+                )
+        return self._redis
+
+    def _redis_available(self) -> bool:
+        return time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, action: str, error: Exception) -> None:
+        logger.warning(f"Payload store: could not {action}: {error}")
+        self._redis_down_until = time.monotonic() + 30.0
+
+    def _remember(self, product_id: str, payload: Dict[str, Any]) -> None:
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._lru[product_id] = (time.monotonic() + self.ttl, payload)
+            self._lru.move_to_end(product_id)
+            while len(self._lru) > self.capacity:
+                self._lru.popitem(last=False)
+
+    def get_many(self, product_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Display fields of products (LRU, then one HMGET for the rest).
+
+        A Redis failure is logged and treated as misses, so the caller
+        falls back to Qdrant instead of failing the search.
+
+        Args:
+            product_ids: Product IDs
+
+        Returns:
+            product_id -> display fields (products not found are left out)
+        """
+        found: Dict[str, Dict[str, Any]] = {}
+        pending: List[str] = []
+        now = time.monotonic()
+        with self._lock:
+            for product_id in dict.fromkeys(product_ids):
+                entry = self._lru.get(product_id)
+                if entry is not None and entry[0] > now:
+                    self._lru.move_to_end(product_id)
+                    found[product_id] = entry[1]
+                else:
+                    pending.append(product_id)
+        self.stats["lru_hits"] += len(found)
+
+        if pending:
+            raws = [None] * len(pending)
+            if self._redis_available():
+                try:
+                    raws = self._get_redis().hmget(self.key, pending)
+                except Exception as e:
+                    self._redis_failed("read payloads", e)
+            for product_id, raw in zip(pending, raws):
+                if raw is None:
+                    continue
+                payload = json.loads(raw)
+                found[product_id] = payload
+                self._remember(product_id, payload)
+                self.stats["redis_hits"] += 1
+            self.stats["misses"] += len(pending) - sum(1 for product_id in pending if product_id in found)
+        return found
+
+    def set_many(self, payloads: Dict[str, Dict[str, Any]]) -> None:
+        """Store display fields (one round trip; Redis failures are logged)."""
+        if not payloads:
+            return
+        payloads = {str(product_id): display_fields(payload) for product_id, payload in payloads.items()}
+        for product_id, payload in payloads.items():
+            self._remember(product_id, payload)
+        if not self._redis_available():
+            return
+        try:
+            self._get_redis().hset(
+                self.key,
+                mapping={product_id: json.dumps(payload, separators=(",", ":")) for product_id, payload in payloads.items()}
+            )
+        except Exception as e:
+            self._redis_failed("store payloads", e)
+
+    def delete(self, product_ids: Iterable[str]) -> None:
+        """Forget products (deleted or re-indexed elsewhere)."""
+        product_ids = [str(product_id) for product_id in product_ids]
+        if not product_ids:
+            return
+        with self._lock:
+            for product_id in product_ids:
+                self._lru.pop(product_id, None)
+        try:
+            self._get_redis().hdel(self.key, *product_ids)
+        except Exception as e:
+            self._redis_failed("delete payloads", e)
+
+    def clear(self) -> None:
+        """Drop the LRU and the Redis table."""
+        with self._lock:
+            self._lru.clear()
+        self._get_redis().delete(self.key)
+
+
+def display_fields(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Display fields of a full payload."""
+    return {field: payload.get(field) for field in DISPLAY_FIELDS if payload.get(field) is not None}
+
+
+def payload_bytes(payload: Optional[Dict[str, Any]]) -> int:
+    """Approximate wire size of a payload (compact JSON)."""
+    if not payload:
+        return 0
+    return len(json.dumps(payload, separators=(",", ":"), default=str))
+
+
+def search_payload_selector() -> Union[bool, List[str]]:
+    """
+    with_payload for searches: product_id plus SEARCH_PAYLOAD_FIELDS when
+    hydration is on, the full payload otherwise.
+    """
+    from app.config import get_settings
+    settings = get_settings()
+    if not settings.payload_hydration:
+        return True
+    fields = [field.strip() for field in settings.search_payload_fields.split(",") if field.strip()]
+    return ["product_id"] + [field for field in fields if field != "product_id"]
+
+
+def hydration_enabled() -> bool:
+    from app.config import get_settings
+    return get_settings().payload_hydration
+
+
+def apply_payloads(results: List[Dict], payloads: Dict[str, Dict[str, Any]]) -> List[Dict]:
+    """Fill the metadata of search results from display fields (in place)."""
+    for result in results:
+        payload = payloads.get(str(result.get("id")))
+        if payload is None:
+            continue
+        metadata = result.setdefault("metadata", {})
+        for field in DISPLAY_FIELDS:
+            if metadata.get(field) is None:
+                metadata[field] = payload.get(field)
+    return results
+
+
+def _missing_ids(results: List[Dict], payloads: Dict[str, Dict[str, Any]]) -> List[str]:
+    return list(dict.fromkeys(
+        str(result["id"]) for result in results
+        if result.get("id") is not None and str(result["id"]) not in payloads
+    ))
+
+
+def _store_fetched(store: ProductPayloadStore, fetched: Dict[str, Dict[str, Any]]) -> int:
+    store.set_many(fetched)
+    return sum(payload_bytes(payload) for payload in fetched.values())
+
+
+def hydrate_results(results: List[Dict], fetch: Callable[[List[str]], Dict[str, Dict[str, Any]]]) -> int:
+    """
+    Fill the display fields of final search results (in place).
+
+    Args:
+        results: Results of format_search_results (ID-only search)
+        fetch: Loads full payloads from Qdrant for store misses (product_id -> payload)
+
+    Returns:
+        Payload bytes fetched from Qdrant
+    """
+    store = get_payload_store()
+    payloads = store.get_many([str(result["id"]) for result in results if result.get("id") is not None])
+    missing = _missing_ids(results, payloads)
+    fetched_bytes = 0
+    if missing:
+        fetched = fetch(missing)
+        fetched_bytes = _store_fetched(store, fetched)
+        payloads.update({product_id: display_fields(payload) for product_id, payload in fetched.items()})
+    apply_payloads(results, payloads)
+    return fetched_bytes
+
+
+async def async_hydrate_results(results: List[Dict],
+                                fetch: Callable[[List[str]], Awaitable[Dict[str, Dict[str, Any]]]]) -> int:
+    """Same as hydrate_results, with an async fetch (store calls run off the event loop)."""
+    store = get_payload_store()
+    payloads = await asyncio.to_thread(
+        store.get_many, [str(result["id"]) for result in results if result.get("id") is not None]
+    )
+    missing = _missing_ids(results, payloads)
+    fetched_bytes = 0
+    if missing:
+        fetched = await fetch(missing)
+        fetched_bytes = await asyncio.to_thread(_store_fetched, store, fetched)
+        payloads.update({product_id: display_fields(payload) for product_id, payload in fetched.items()})
+    apply_payloads(results, payloads)
+    return fetched_bytes
+
+
+def search_payload_bytes(points: Iterable[Any]) -> int:
+    """Payload bytes returned with search hits."""
+    return sum(payload_bytes(point.payload) for point in points)
+
+
+class PayloadTraffic:
+    """Payload bytes moved per query, for /stats."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.search_bytes = 0  # Payloads returned with search hits
+        self.hydration_bytes = 0  # Payloads fetched from Qdrant on store misses
+
+    def record(self, search_bytes: int = 0, hydration_bytes: int = 0, queries: int = 1) -> None:
+        with self._lock:
+            self.queries += queries
+            self.search_bytes += search_bytes
+            self.hydration_bytes += hydration_bytes
+
+    def report(self) -> Dict[str, Any]:
+        queries = max(1, self.queries)
+        return {
+            "queries": self.queries,
+            "search_payload_bytes_per_query": round(self.search_bytes / queries, 1),
+            "hydration_bytes_per_query": round(self.hydration_bytes / queries, 1),
+            "payload_bytes_per_query": round((self.search_bytes + self.hydration_bytes) / queries, 1)
+        }
+
+
+payload_traffic = PayloadTraffic()
+
+# Singleton instance
+_payload_store: Optional[ProductPayloadStore] = None
+
+
+def get_payload_store() -> ProductPayloadStore:
+    """Get singleton payload store (configured from settings)."""
+    global _payload_store
+    if _payload_store is None:
+        from app.config import get_settings
+        settings = get_settings()
+        _payload_store = ProductPayloadStore(capacity=settings.payload_cache_size, ttl=settings.payload_cache_ttl)
+    return _payload_store
+
+
+def get_payload_stats() -> Dict[str, Any]:
+    """Traffic and store hit counts."""
+    store = get_payload_store()
+    return {"hydration": hydration_enabled(), **payload_traffic.report(), "store": dict(store.stats)}
@@ -0,0 +1,18 @@
+"""
+Stable Qdrant point IDs.
+
+Point IDs are UUIDv5 of the product_id under a fixed namespace: the same
+product always maps to the same point in every process (API, workers,
+tools), so re-indexing a product overwrites its point instead of adding a
+duplicate. Python's hash() is randomised per process and must not be used.
+"""
+import uuid
+
+# Fixed namespace for product point IDs - never change it, or every product
+# gets a new ID (run app.tools.dedupe_points afterwards if you must)
+PRODUCT_POINT_NAMESPACE = uuid.UUID("6f1c4f3e-3b0a-5d6e-9a44-2b7c1e0d8f51")
+
+
+def product_point_id(product_id: str) -> str:
+    """Deterministic Qdrant point ID (UUID string) for a product."""
+    return str(uuid.uuid5(PRODUCT_POINT_NAMESPACE, str(product_id)))
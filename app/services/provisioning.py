@@ -0,0 +1,387 @@
+"""
+Declarative collection provisioning.
+
+The products collection is described by a spec: the `collections` section
+of qdrant_config.yaml (QDRANT_COLLECTION_SPEC), on top of defaults from
+settings (vector size, QDRANT_QUANTIZATION, PAYLOAD_INDEXES). A spec covers:
+- vectors: size, distance, on_disk
+- on_disk_payload: payloads memory-mapped from disk instead of held in RAM
+- hnsw_config: m, ef_construct, full_scan_threshold, max_indexing_threads, on_disk
+- optimizers_config: indexing_threshold, memmap_threshold, max_segment_size, ...
+- quantization: none, scalar or binary
+- payload_indexes: field -> keyword, integer, float, bool or text
+
+provision_collection() creates a missing collection from the spec, adds
+missing payload indexes and compares everything else with the live
+collection. Drift is reported; settings Qdrant can change in place
+(on-disk flags, HNSW, optimizers, quantization) are updated when asked,
+the others (size, distance) need a migration to a new collection.
+
+The services address the collection through a serving alias,
+"<name>_live" (serving_alias): on first start the collection is created
+under its plain name and the alias pointed to it. Re-embedding migrations
+(collection_migration) build new versions and move the alias, so the
+collection a deployment started with is never renamed or dropped.
+
+Usage:
+    spec = load_collection_spec("products")
+    report = provision_collection(client, spec, update=False)
+    report = provision_serving_collection(client, spec)  # report["alias"]: "products_live"
+"""
+import logging
+import os
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+from qdrant_client.models import (
+    CollectionParamsDiff,
+    CreateAlias,
+    CreateAliasOperation,
+    Disabled,
+    Distance,
+    HnswConfigDiff,
+    OptimizersConfigDiff,
+    VectorParams,
+    VectorParamsDiff,
+)
+
+from app.services.quantization import QUANTIZATION_MODES, quantization_config, vectors_on_disk
+from app.services.search_filters import payload_index_specs
+
+try:
+    import yaml
+    YAML_AVAILABLE = True
+except ImportError:
+    YAML_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+LIVE_ALIAS_SUFFIX = "_live"
+
+
+@dataclass
+class CollectionSpec:
+    """Desired state of a collection."""
+    name: str
+    size: int
+    distance: str = "Cosine"
+    on_disk: Optional[bool] = None
+    on_disk_payload: Optional[bool] = None
+    hnsw_config: Dict[str, Any] = field(default_factory=dict)
+    optimizers_config: Dict[str, Any] = field(default_factory=dict)
+    quantization: str = "none"
+    payload_indexes: List[Tuple[str, Any]] = field(default_factory=list)
+
+    def vectors_config(self) -> VectorParams:
+        return VectorParams(size=self.size, distance=Distance(self.distance), on_disk=self.on_disk)
+
+
+@dataclass
+class Drift:
+    """One setting of the live collection that differs from the spec."""
+    setting: str
+    expected: Any
+    actual: Any
+    fixable: bool  # Qdrant can change it in place (update_collection)
+
+
+def _read_spec_file(path: str) -> Dict[str, Any]:
+    """Raw `collections` section of the spec file ({} if absent)."""
+    if not path or not os.path.exists(path):
+        return {}
+    if not YAML_AVAILABLE:
+        logger.warning(f"PyYAML not installed, ignoring collection spec {path}")
+        return {}
+    with open(path) as f:
+        return (yaml.safe_load(f) or {}).get("collections") or {}
+
+
+def load_collection_spec(name: Optional[str] = None, path: Optional[str] = None) -> CollectionSpec:
+    """
+    Spec of a collection: spec file entry over settings defaults.
+
+    Args:
+        name: Collection name (default: QDRANT_COLLECTION_NAME); looked up in the
+            spec file, falling back to its "default" entry
+        path: Spec file (default: QDRANT_COLLECTION_SPEC setting)
+
+    Returns:
+        CollectionSpec
+
+    Raises:
+        ValueError: On an unknown quantization mode or payload index type
+    """
+    from app.config import get_settings
+    settings = get_settings()
+    name = name or settings.qdrant_collection_name
+    path = settings.qdrant_collection_spec if path is None else path
+
+    collections = _read_spec_file(path)
+    raw = dict(collections.get(name) or collections.get("default") or {})
+    vectors = raw.get("vectors") or {}
+
+    quantization = str(raw.get("quantization", settings.qdrant_quantization)).lower()
+    if quantization not in QUANTIZATION_MODES:
+        raise ValueError(f"Collection spec '{name}': unknown quantization '{quantization}'")
+
+    if "payload_indexes" in raw:
+        declared = raw["payload_indexes"] or {}
+        indexes = payload_index_specs(",".join(f"{key}:{value}" for key, value in declared.items()))
+    else:
+        indexes = payload_index_specs()
+
+    return CollectionSpec(
+        name=name,
+        size=int(vectors.get("size", settings.embedding_dim)),
+        distance=str(vectors.get("distance", "Cosine")).capitalize(),
+        on_disk=vectors.get("on_disk", vectors_on_disk(quantization)),
+        on_disk_payload=raw.get("on_disk_payload"),
+        hnsw_config=dict(raw.get("hnsw_config") or {}),
+        optimizers_config=dict(raw.get("optimizers_config") or {}),
+        quantization=quantization,
+        payload_indexes=indexes
+    )
+
+
+def _quantization_mode(config: Any) -> str:
+    """Mode of a live quantization config."""
+    if config is None:
+        return "none"
+    if getattr(config, "scalar", None) is not None:
+        return "scalar"
+    if getattr(config, "binary", None) is not None:
+        return "binary"
+    return type(config).__name__
+
+
+def detect_drift(collection_info: Any, spec: CollectionSpec) -> List[Drift]:
+    """
+    Compare a live collection (get_collection result) with its spec.
+
+    Only settings the spec defines are compared; payload indexes are
+    reported when missing (extra indexes are harmless).
+
+    Args:
+        collection_info: CollectionInfo of the live collection
+        spec: Desired state
+
+    Returns:
+        Differences, empty when the collection matches
+    """
+    drift: List[Drift] = []
+    config = collection_info.config
+    vectors = config.params.vectors
+
+    if vectors.size != spec.size:
+        drift.append(Drift("vectors.size", spec.size, vectors.size, fixable=False))
+    actual_distance = getattr(vectors.distance, "value", vectors.distance)
+    if actual_distance != spec.distance:
+        drift.append(Drift("vectors.distance", spec.distance, actual_distance, fixable=False))
+    if spec.on_disk is not None and bool(vectors.on_disk) != spec.on_disk:
+        drift.append(Drift("vectors.on_disk", spec.on_disk, bool(vectors.on_disk), fixable=True))
+    if spec.on_disk_payload is not None and bool(config.params.on_disk_payload) != spec.on_disk_payload:
+        drift.append(Drift("on_disk_payload", spec.on_disk_payload, bool(config.params.on_disk_payload), fixable=True))
+
+    for section, expected, live in (("hnsw_config", spec.hnsw_config, config.hnsw_config),
+                                    ("optimizers_config", spec.optimizers_config, config.optimizer_config)):
+        for key, value in expected.items():
+            actual = getattr(live, key, None)
+            if actual != value:
+                drift.append(Drift(f"{section}.{key}", value, actual, fixable=True))
+
+    actual_mode = _quantization_mode(config.quantization_config)
+    if actual_mode != spec.quantization:
+        drift.append(Drift("quantization", spec.quantization, actual_mode, fixable=True))
+
+    existing = collection_info.payload_schema or {}
+    for field_name, _ in spec.payload_indexes:
+        if field_name not in existing:
+            drift.append(Drift(f"payload_indexes.{field_name}", "indexed", None, fixable=True))
+
+    return drift
+
+
+def _create_kwargs(spec: CollectionSpec) -> Dict[str, Any]:
+    """create_collection arguments of a spec."""
+    return {
+        "collection_name": spec.name,
+        "vectors_config": spec.vectors_config(),
+        "on_disk_payload": spec.on_disk_payload,
+        "hnsw_config": HnswConfigDiff(**spec.hnsw_config) if spec.hnsw_config else None,
+        "optimizers_config": OptimizersConfigDiff(**spec.optimizers_config) if spec.optimizers_config else None,
+        "quantization_config": quantization_config(spec.quantization)
+    }
+
+
+def _missing_indexes(spec: CollectionSpec, existing: Optional[Dict[str, Any]]) -> List[Tuple[str, Any]]:
+    return [(name, schema) for name, schema in spec.payload_indexes if name not in (existing or {})]
+
+
+def _drift_updates(spec: CollectionSpec, drift: List[Drift]) -> Dict[str, Any]:
+    """update_collection arguments fixing every fixable drifted setting."""
+    sections = {item.setting.split(".")[0] for item in drift if item.fixable}
+    updates: Dict[str, Any] = {}
+    if "vectors" in sections:
+        updates["vectors_config"] = {"": VectorParamsDiff(on_disk=spec.on_disk)}
+    if "on_disk_payload" in sections:
+        updates["collection_params"] = CollectionParamsDiff(on_disk_payload=spec.on_disk_payload)
+    if "hnsw_config" in sections:
+        updates["hnsw_config"] = HnswConfigDiff(**spec.hnsw_config)
+    if "optimizers_config" in sections:
+        updates["optimizers_config"] = OptimizersConfigDiff(**spec.optimizers_config)
+    if "quantization" in sections:
+        updates["quantization_config"] = quantization_config(spec.quantization) or Disabled.DISABLED
+    return updates
+
+
+def _record_drift(report: Dict[str, Any], info: Any, spec: CollectionSpec) -> List[Drift]:
+    """Detect drift on an existing collection, log it and add it to the report."""
+    drift = [item for item in detect_drift(info, spec) if not item.setting.startswith("payload_indexes.")]
+    report["drift"] = [asdict(item) for item in drift]
+    for item in drift:
+        logger.warning(
+            f"Collection '{spec.name}' drift: {item.setting} is {item.actual!r}, spec says {item.expected!r}"
+            f"{'' if item.fixable else ' (needs a migration to a new collection)'}"
+        )
+    return drift
+
+
+def _new_report(spec: CollectionSpec) -> Dict[str, Any]:
+    return {"collection": spec.name, "created": False, "payload_indexes_created": [], "drift": [], "updated": []}
+
+
+def provision_collection(client, spec: CollectionSpec, update: bool = False) -> Dict[str, Any]:
+    """
+    Create the collection from its spec, or reconcile an existing one.
+
+    Missing payload indexes are always created; other drift is only
+    reported unless update is set.
+
+    Args:
+        client: Sync QdrantClient
+        spec: Desired state
+        update: Apply fixable drift (HNSW/optimizer/quantization/on-disk changes
+            make Qdrant rebuild segments in the background)
+
+    Returns:
+        Report: created, payload indexes created, drift found, settings updated
+    """
+    report = _new_report(spec)
+    existing_schema: Dict[str, Any] = {}
+
+    if not client.collection_exists(spec.name):
+        logger.info(f"Creating collection '{spec.name}' from spec")
+        client.create_collection(**_create_kwargs(spec))
+        report["created"] = True
+    else:
+        info = client.get_collection(spec.name)
+        existing_schema = info.payload_schema or {}
+        drift = _record_drift(report, info, spec)
+        updates = _drift_updates(spec, drift) if update else {}
+        if updates:
+            logger.info(f"Updating collection '{spec.name}': {', '.join(sorted(updates))}")
+            client.update_collection(collection_name=spec.name, **updates)
+            report["updated"] = sorted(updates)
+
+    for name, schema in _missing_indexes(spec, existing_schema):
+        logger.info(f"Creating payload index on '{name}'")
+        client.create_payload_index(collection_name=spec.name, field_name=name, field_schema=schema)
+        report["payload_indexes_created"].append(name)
+    return report
+
+
+async def async_provision_collection(client, spec: CollectionSpec, update: bool = False) -> Dict[str, Any]:
+    """Same as provision_collection, with an AsyncQdrantClient."""
+    report = _new_report(spec)
+    existing_schema: Dict[str, Any] = {}
+
+    if not await client.collection_exists(spec.name):
+        logger.info(f"Creating collection '{spec.name}' from spec")
+        await client.create_collection(**_create_kwargs(spec))
+        report["created"] = True
+    else:
+        info = await client.get_collection(spec.name)
+        existing_schema = info.payload_schema or {}
+        drift = _record_drift(report, info, spec)
+        updates = _drift_updates(spec, drift) if update else {}
+        if updates:
+            logger.info(f"Updating collection '{spec.name}': {', '.join(sorted(updates))}")
+            await client.update_collection(collection_name=spec.name, **updates)
+            report["updated"] = sorted(updates)
+
+    for name, schema in _missing_indexes(spec, existing_schema):
+        logger.info(f"Creating payload index on '{name}'")
+        await client.create_payload_index(collection_name=spec.name, field_name=name, field_schema=schema)
+        report["payload_indexes_created"].append(name)
+    return report
+
+
+def serving_alias(name: Optional[str] = None) -> str:
+    """Alias the services address a collection by (default: QDRANT_COLLECTION_NAME)."""
+    if name is None:
+        from app.config import get_settings
+        name = get_settings().qdrant_collection_name
+    return name if name.endswith(LIVE_ALIAS_SUFFIX) else f"{name}{LIVE_ALIAS_SUFFIX}"
+
+
+def alias_target(client, alias: str) -> Optional[str]:
+    """Collection an alias points to (None if the alias does not exist)."""
+    for description in client.get_aliases().aliases:
+        if description.alias_name == alias:
+            return description.collection_name
+    return None
+
+
+async def async_alias_target(client, alias: str) -> Optional[str]:
+    """Same as alias_target, with an AsyncQdrantClient."""
+    for description in (await client.get_aliases()).aliases:
+        if description.alias_name == alias:
+            return description.collection_name
+    return None
+
+
+def resolve_collection(client, name: str) -> str:
+    """Collection behind a name: the alias target, or the name itself."""
+    return alias_target(client, name) or name
+
+
+def _create_alias(alias: str, collection: str) -> List[CreateAliasOperation]:
+    return [CreateAliasOperation(create_alias=CreateAlias(collection_name=collection, alias_name=alias))]
+
+
+def provision_serving_collection(client, spec: CollectionSpec, update: bool = False) -> Dict[str, Any]:
+    """
+    Provision the collection behind the serving alias of spec.name.
+
+    On first start the collection is created under spec.name and the alias
+    pointed to it; afterwards the alias target (e.g. a migrated version) is
+    reconciled with the spec.
+
+    Args:
+        client: Sync QdrantClient
+        spec: Desired state, named by the base collection name
+        update: See provision_collection
+
+    Returns:
+        provision_collection report, plus the serving alias
+    """
+    alias = serving_alias(spec.name)
+    target = alias_target(client, alias)
+    report = provision_collection(client, replace(spec, name=target or spec.name), update)
+    if target is None:
+        logger.info(f"Creating serving alias '{alias}' -> {spec.name}")
+        client.update_collection_aliases(change_aliases_operations=_create_alias(alias, spec.name))
+    report["alias"] = alias
+    return report
+
+
+async def async_provision_serving_collection(client, spec: CollectionSpec, update: bool = False) -> Dict[str, Any]:
+    """Same as provision_serving_collection, with an AsyncQdrantClient."""
+    alias = serving_alias(spec.name)
+    target = await async_alias_target(client, alias)
+    report = await async_provision_collection(client, replace(spec, name=target or spec.name), update)
+    if target is None:
+        logger.info(f"Creating serving alias '{alias}' -> {spec.name}")
+        await client.update_collection_aliases(change_aliases_operations=_create_alias(alias, spec.name))
+    report["alias"] = alias
+    return report
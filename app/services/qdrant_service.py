@@ -1,7 +1,16 @@
 import logging
 from typing import List, Dict, Any, Optional
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue, Range
+from qdrant_client.http.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue, Range, SearchParams
+from app.config import get_settings
+from app.services.collection_migration import mark_migration_changes
+from app.services.local_qdrant import get_local_client, is_local_mode
+from app.services.payload_store import get_payload_store
+from app.services.point_ids import product_point_id
+from app.services.provisioning import load_collection_spec, provision_serving_collection, serving_alias
+from app.services.resilience import get_guard
+from app.services.search_params import build_search_params
+from app.services.similar_products import mark_products_changed
 
 logger = logging.getLogger(__name__)
 
@@ -12,24 +21,18 @@ class QdrantService:
         """Initialize Qdrant client"""
         self.host = host
         self.port = port
-        self.collection_name = collection_name
+        self.spec_name = collection_name
+        self.collection_name = serving_alias(collection_name)
         self.vector_size = vector_size
         self.client = None
         self._initialized = False
         
+        self.api_key = api_key
+        
         logger.info(f"Connecting to Qdrant at {host}:{port}")
         
         try:
-            # Use HTTP (not HTTPS) for Docker service communication
-            # Docker Compose services communicate via HTTP by default
-            self.client = QdrantClient(
-                host=host, 
-                port=port, 
-                api_key=api_key, 
-                timeout=5.0,
-                prefer_grpc=False,  # Use HTTP instead of gRPC
-                https=False  # Explicitly disable HTTPS/SSL
-            )
+            self.client = self._create_client()
             self._initialize_collection()
             self._initialized = True
             logger.info(f"Connected to Qdrant successfully")
@@ -43,13 +46,7 @@ class QdrantService:
             return
         
         try:
-            self.client = QdrantClient(
-                host=self.host, 
-                port=self.port, 
-                timeout=5.0,
-                prefer_grpc=False,  # Use HTTP instead of gRPC
-                https=False  # Explicitly disable HTTPS/SSL
-            )
+            self.client = self._create_client()
             self._initialize_collection()
             self._initialized = True
             logger.info(f"Successfully connected to Qdrant")
@@ -57,22 +54,33 @@ class QdrantService:
             logger.error(f"Failed to connect to Qdrant: {e}")
             raise
     
+    def _create_client(self):
+        """Remote HTTP client, or the shared embedded client in local mode (QDRANT_MODE)."""
+        if is_local_mode():
+            return get_local_client()
+        # Use HTTP (not HTTPS) for Docker service communication
+        # Docker Compose services communicate via HTTP by default
+        return QdrantClient(
+            host=self.host, 
+            port=self.port, 
+            api_key=self.api_key, 
+            timeout=5.0,
+            prefer_grpc=False,  # Use HTTP instead of gRPC
+            https=False  # Explicitly disable HTTPS/SSL
+        )
+    
     def _initialize_collection(self):
         """Initialize collection if it doesn't exist"""
         if not self.client:
             raise Exception("Qdrant client not initialized")
         
         try:
-            # Check if collection exists
-            collections = self.client.get_collections()
-            collection_names = [c.name for c in collections.collections]
+            # Create from the collection spec, or reconcile (see provisioning)
+            spec = load_collection_spec(self.spec_name)
+            spec.size = self.vector_size
+            report = provision_serving_collection(self.client, spec, update=get_settings().qdrant_provision_update)
             
-            if self.collection_name not in collection_names:
-                logger.info(f"Creating collection: {self.collection_name}")
-                self.client.create_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=VectorParams(size=self.vector_size, distance=Distance.COSINE),
-                )
+            if report["created"]:
                 logger.info(f"Collection {self.collection_name} created successfully")
             else:
                 logger.info(f"Collection {self.collection_name} already exists")
@@ -84,17 +92,20 @@ class QdrantService:
         """Upsert product with embedding and metadata"""
         try:
             point = PointStruct(
-                id=hash(product_id) % (10 ** 8),  # Convert ID to positive integer
+                id=product_point_id(product_id),  # Stable across processes: upserts are idempotent
                 vector=embedding,
                 payload={
                     "product_id": product_id,
                     **metadata
                 }
             )
-            self.client.upsert(
+            get_guard().call_sync("upsert", lambda: self.client.upsert(
                 collection_name=self.collection_name,
                 points=[point]
-            )
+            ))
+            mark_products_changed([product_id])
+            mark_migration_changes([product_id])
+            get_payload_store().set_many({product_id: point.payload})
             logger.info(f"Product {product_id} upserted to Qdrant")
         except Exception as e:
             logger.error(f"Error upserting product {product_id}: {e}")
@@ -106,7 +117,7 @@ class QdrantService:
             points = []
             for product in products:
                 point = PointStruct(
-                    id=hash(product["product_id"]) % (10 ** 8),
+                    id=product_point_id(product["product_id"]),
                     vector=product["embedding"],
                     payload={
                         "product_id": product["product_id"],
@@ -120,28 +131,33 @@ class QdrantService:
                 )
                 points.append(point)
             
-            self.client.upsert(
+            get_guard().call_sync("upsert", lambda: self.client.upsert(
                 collection_name=self.collection_name,
                 points=points
-            )
+            ))
+            mark_products_changed(product["product_id"] for product in products)
+            mark_migration_changes(product["product_id"] for product in products)
+            get_payload_store().set_many({point.payload["product_id"]: point.payload for point in points})
             logger.info(f"Batch upserted {len(products)} products")
         except Exception as e:
             logger.error(f"Error in batch upsert: {e}")
             raise
     
     def search(self, embedding: List[float], top_k: int = 10, 
-               filters: Optional[Filter] = None) -> List[Dict[str, Any]]:
-        """Search for similar products"""
+               filters: Optional[Filter] = None,
+               search_params: Optional[SearchParams] = None) -> List[Dict[str, Any]]:
+        """Search for similar products (search_params defaults to the configured tier, see search_params)"""
         self._ensure_connected()
         
         try:
-            results = self.client.search(
+            results = get_guard().call_sync("search", lambda: self.client.search(
                 collection_name=self.collection_name,
                 query_vector=embedding,
                 query_filter=filters,
                 limit=top_k,
+                search_params=search_params or build_search_params(),
                 with_payload=True
-            )
+            ))
             
             search_results = []
             for result in results:
@@ -159,10 +175,13 @@ class QdrantService:
     def delete_product(self, product_id: str):
         """Delete product from collection"""
         try:
-            self.client.delete(
+            get_guard().call_sync("delete", lambda: self.client.delete(
                 collection_name=self.collection_name,
-                points_selector=[hash(product_id) % (10 ** 8)]
-            )
+                points_selector=[product_point_id(product_id)]
+            ))
+            mark_products_changed([product_id])
+            mark_migration_changes([product_id])
+            get_payload_store().delete([product_id])
             logger.info(f"Product {product_id} deleted from Qdrant")
         except Exception as e:
             logger.error(f"Error deleting product {product_id}: {e}")
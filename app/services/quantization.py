@@ -0,0 +1,160 @@
+"""
+Vector quantization of the products collection.
+
+Selected by QDRANT_QUANTIZATION:
+- none: float32 vectors and HNSW graph in RAM (previous behaviour)
+- scalar: int8 copies of the vectors (4x smaller)
+- binary: 1 bit per dimension (32x smaller, needs more oversampling)
+
+With quantization on, the compressed vectors are pinned in RAM
+(always_ram) and the float32 originals move to disk (QDRANT_VECTORS_ON_DISK).
+Searches run on the compressed vectors, fetch `limit * oversampling`
+candidates and rescore them with the originals, which restores most of
+the recall at the cost of a few disk reads per query.
+
+Usage:
+    client.create_collection(..., quantization_config=quantization_config())
+    client.query_points(..., search_params=quantization_search_params())
+"""
+import logging
+import time
+from typing import Optional, Union
+
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    Disabled,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    VectorParamsDiff,
+)
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_MODES = ("none", "scalar", "binary")
+
+# Candidates fetched per result before rescoring (binary loses more precision)
+DEFAULT_OVERSAMPLING = {"scalar": 2.0, "binary": 3.0}
+
+QuantizationConfig = Union[ScalarQuantization, BinaryQuantization]
+
+
+def _resolve_mode(mode: Optional[str]) -> str:
+    if mode is None:
+        from app.config import get_settings
+        mode = get_settings().qdrant_quantization
+    mode = mode.strip().lower()
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization mode '{mode}' (expected one of {', '.join(QUANTIZATION_MODES)})")
+    return mode
+
+
+def quantization_config(mode: Optional[str] = None) -> Optional[QuantizationConfig]:
+    """
+    Collection quantization config for a mode.
+
+    Args:
+        mode: none, scalar or binary (default: QDRANT_QUANTIZATION setting)
+
+    Returns:
+        Quantization config, or None for unquantized vectors
+    """
+    mode = _resolve_mode(mode)
+    if mode == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8,
+                quantile=0.99,  # Clip outliers so int8 buckets cover the useful range
+                always_ram=True
+            )
+        )
+    if mode == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def vectors_on_disk(mode: Optional[str] = None) -> Optional[bool]:
+    """Whether the float32 originals live on disk (only when quantized copies serve search)."""
+    if _resolve_mode(mode) == "none":
+        return None
+    from app.config import get_settings
+    return get_settings().qdrant_vectors_on_disk
+
+
+def quantization_search_params(mode: Optional[str] = None,
+                               oversampling: Optional[float] = None,
+                               rescore: Optional[bool] = None) -> Optional[SearchParams]:
+    """
+    Search params for a quantized collection: oversample then rescore with originals.
+
+    Args:
+        mode: none, scalar or binary (default: QDRANT_QUANTIZATION setting)
+        oversampling: Candidates per result (default: QDRANT_OVERSAMPLING, else per-mode default)
+        rescore: Rescore candidates with float32 vectors (default: QDRANT_RESCORE)
+
+    Returns:
+        SearchParams, or None for an unquantized collection
+    """
+    mode = _resolve_mode(mode)
+    if mode == "none":
+        return None
+
+    from app.config import get_settings
+    settings = get_settings()
+    if oversampling is None:
+        oversampling = settings.qdrant_oversampling or DEFAULT_OVERSAMPLING[mode]
+    if rescore is None:
+        rescore = settings.qdrant_rescore
+
+    return SearchParams(
+        quantization=QuantizationSearchParams(ignore=False, rescore=rescore, oversampling=oversampling)
+    )
+
+
+def apply_quantization(client, collection_name: str, mode: str,
+                       on_disk: Optional[bool] = None, wait: bool = True,
+                       poll_interval: float = 2.0, timeout: float = 3600.0) -> None:
+    """
+    Re-quantize an existing collection in place.
+
+    Qdrant rebuilds the quantized vectors in the background while the
+    collection keeps serving (unquantized) searches, so no downtime.
+
+    Args:
+        client: Sync QdrantClient
+        collection_name: Collection to update
+        mode: none, scalar or binary
+        on_disk: Store float32 originals on disk (default: setting, False for none)
+        wait: Block until the optimizer has finished (collection status green)
+        poll_interval: Seconds between status checks
+        timeout: Maximum seconds to wait
+
+    Raises:
+        TimeoutError: If the collection is not green within timeout
+    """
+    mode = _resolve_mode(mode)
+    if on_disk is None:
+        on_disk = bool(vectors_on_disk(mode))
+
+    logger.info(f"Re-quantizing '{collection_name}': mode={mode}, originals on disk={on_disk}")
+    client.update_collection(
+        collection_name=collection_name,
+        vectors_config={"": VectorParamsDiff(on_disk=on_disk)},
+        quantization_config=quantization_config(mode) or Disabled.DISABLED
+    )
+
+    if not wait:
+        return
+
+    deadline = time.monotonic() + timeout
+    while True:
+        status = client.get_collection(collection_name).status
+        if str(getattr(status, "value", status)) == "green":
+            logger.info(f"'{collection_name}' re-quantized ({mode})")
+            return
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"'{collection_name}' still {status} after {timeout:.0f}s")
+        time.sleep(poll_interval)
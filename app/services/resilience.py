@@ -0,0 +1,365 @@
+"""
+Resilience layer for vector store calls: deadlines, circuit breaker, hedging.
+
+- Deadlines: each search request gets a time budget (REQUEST_BUDGET_MS, or
+  the X-Request-Budget-Ms header), stored in a contextvar by the routes'
+  request_budget dependency.
+  Every Qdrant call is bounded by min(QDRANT_TIMEOUT, time left), so a
+  request never waits on Qdrant longer than its budget.
+- Circuit breaker: after QDRANT_BREAKER_FAILURES consecutive failures
+  (timeouts, connection errors, 5xx) the breaker opens and calls fail
+  immediately with CircuitOpen; searches then fall back to the local vector
+  index or an empty result instead of piling up on a restarting Qdrant.
+  After QDRANT_BREAKER_RESET_S one probe call is let through (half-open):
+  success closes the breaker, failure re-opens it.
+- Hedged retries: a read still running after QDRANT_HEDGE_DELAY_MS (or
+  failing fast) is re-issued on the next pooled client; the first answer
+  wins and the other is cancelled. Reads only, writes are never hedged.
+- Metrics: per-operation counts of every outcome (ok, error, timeout,
+  rejected, hedged, hedge_won), reported in /stats.
+
+Usage:
+    guard = get_guard()
+    points = await guard.call("search", lambda: client.query_points(...), hedge=True)
+"""
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpen(RuntimeError):
+    """The breaker is open: the call was not attempted."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """The call did not finish within its deadline."""
+
+
+# Deadline (time.monotonic() value) of the current request, if any
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("request_deadline", default=None)
+
+
+@contextmanager
+def request_deadline(budget_s: float) -> Iterator[None]:
+    """Bound every guarded call made in this context to budget_s from now."""
+    token = _deadline.set(time.monotonic() + budget_s)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_left() -> Optional[float]:
+    """Seconds left in the current request budget (None: no budget)."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def _grpc_status(error: BaseException) -> Optional[str]:
+    """gRPC status name of an error (None if it is not a gRPC error)."""
+    code = getattr(error, "code", None)
+    if not callable(code):
+        return None
+    try:
+        return getattr(code(), "name", "")
+    except Exception:
+        return ""
+
+
+def counts_as_failure(error: BaseException) -> bool:
+    """
+    Whether an error says the server is unhealthy (trips the breaker).
+
+    Client errors (4xx, gRPC NOT_FOUND/INVALID_ARGUMENT, bad input) are the
+    caller's problem and leave the breaker alone.
+    """
+    if isinstance(error, (ValueError, CircuitOpen)):
+        return False
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status >= 500
+    name = _grpc_status(error)
+    if name is not None:
+        return name not in ("NOT_FOUND", "INVALID_ARGUMENT", "FAILED_PRECONDITION", "ALREADY_EXISTS")
+    return True
+
+
+def is_not_found(error: BaseException) -> bool:
+    """Whether Qdrant answered not found (HTTP 404 or gRPC NOT_FOUND)."""
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status == 404
+    return _grpc_status(error) == "NOT_FOUND"
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with half-open probing."""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Initialize the breaker.
+
+        Args:
+            name: Protected dependency (for logs)
+            failure_threshold: Consecutive failures that open the breaker
+            reset_timeout: Seconds open before a probe call is let through
+        """
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go through (one probe at a time when half-open)."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            if self._probing:
+                return False
+            self._state = HALF_OPEN
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info(f"Circuit '{self.name}' closed")
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning(f"Circuit '{self.name}' open after {self._failures} failures")
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Give back a half-open probe slot without a verdict (e.g. client error)."""
+        with self._lock:
+            self._probing = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self._failures}
+
+
+class CallMetrics:
+    """Outcome counts per operation."""
+
+    def __init__(self):
+        self._counts: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def incr(self, operation: str, outcome: str) -> None:
+        with self._lock:
+            self._counts[operation][outcome] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {operation: dict(outcomes) for operation, outcomes in self._counts.items()}
+
+
+class CallGuard:
+    """Deadline + breaker + hedging + metrics around calls to one dependency."""
+
+    def __init__(self, breaker: CircuitBreaker, call_timeout: float = 10.0,
+                 hedge_delay: float = 0.0, metrics: Optional[CallMetrics] = None):
+        """
+        Initialize the guard.
+
+        Args:
+            breaker: Breaker of the dependency
+            call_timeout: Longest single call, even with budget left
+            hedge_delay: Seconds before a slow read is hedged (0 disables hedging)
+            metrics: Outcome counters (default: new)
+        """
+        self.breaker = breaker
+        self.call_timeout = call_timeout
+        self.hedge_delay = hedge_delay
+        self.metrics = metrics or CallMetrics()
+
+    def _timeout(self, operation: str, use_budget: bool = True) -> float:
+        """Time allowed for a call: the call timeout, capped by the request budget."""
+        left = time_left() if use_budget else None
+        timeout = self.call_timeout if left is None else min(self.call_timeout, left)
+        if timeout <= 0:
+            self.metrics.incr(operation, "timeout")
+            raise DeadlineExceeded(f"{operation}: request budget exhausted")
+        return timeout
+
+    def _admit(self, operation: str) -> None:
+        if not self.breaker.allow():
+            self.metrics.incr(operation, "rejected")
+            raise CircuitOpen(f"{self.breaker.name} circuit open, {operation} not attempted")
+
+    def _settle(self, operation: str, error: Optional[BaseException]) -> None:
+        """Record the outcome of an admitted call."""
+        if error is None:
+            self.breaker.record_success()
+            self.metrics.incr(operation, "ok")
+        elif isinstance(error, (asyncio.TimeoutError, DeadlineExceeded)):
+            self.breaker.record_failure()
+            self.metrics.incr(operation, "timeout")
+        elif counts_as_failure(error):
+            self.breaker.record_failure()
+            self.metrics.incr(operation, "error")
+        else:
+            self.breaker.release()
+            self.metrics.incr(operation, "client_error")
+
+    def _abandon(self, operation: str) -> None:
+        """Release an admitted call stopped without a verdict (cancelled caller, shutdown)."""
+        self.breaker.release()
+        self.metrics.incr(operation, "cancelled")
+
+    async def call(self, operation: str, factory: Callable[[], Awaitable[T]], hedge: bool = False,
+                   use_budget: bool = True) -> T:
+        """
+        Run an async call under the guard.
+
+        Args:
+            operation: Name for metrics (search, retrieve, upsert, ...)
+            factory: Starts the call (invoked again for a hedge, so it must
+                pick its client itself, e.g. the next one of the pool)
+            hedge: Idempotent read that may be hedged
+            use_budget: Cap the call by the request budget (off for one-off setup calls)
+
+        Returns:
+            The call result
+
+        Raises:
+            CircuitOpen: If the breaker is open
+            DeadlineExceeded: If the deadline passed
+        """
+        self._admit(operation)
+        try:
+            timeout = self._timeout(operation, use_budget)
+        except DeadlineExceeded:
+            self.breaker.release()
+            raise
+        # A half-open probe is sent alone: no hedge to a server that is just recovering
+        hedge = hedge and self.hedge_delay > 0 and self.breaker.state == CLOSED
+        try:
+            if hedge:
+                result = await self._hedged(operation, factory, timeout)
+            else:
+                result = await asyncio.wait_for(factory(), timeout)
+        except asyncio.TimeoutError as e:
+            self._settle(operation, e)
+            raise DeadlineExceeded(f"{operation} exceeded {timeout:.2f}s") from e
+        except Exception as e:
+            self._settle(operation, e)
+            raise
+        except BaseException:
+            self._abandon(operation)
+            raise
+        self._settle(operation, None)
+        return result
+
+    async def _hedged(self, operation: str, factory: Callable[[], Awaitable[T]], timeout: float) -> T:
+        """First successful answer of the call and, if it is slow or fails fast, one hedge."""
+        deadline = time.monotonic() + timeout
+        first = asyncio.ensure_future(factory())
+        done, _ = await asyncio.wait({first}, timeout=min(self.hedge_delay, timeout))
+        if first in done and first.exception() is None:
+            return first.result()
+
+        self.metrics.incr(operation, "hedged")
+        pending = set() if first in done else {first}
+        errors: List[BaseException] = [first.exception()] if first in done else []
+        hedge = asyncio.ensure_future(factory())
+        pending.add(hedge)
+        try:
+            while pending:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=left, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.metrics.incr(operation, "hedge_won")
+                        return task.result()
+                    errors.append(task.exception())
+        finally:
+            for task in pending:
+                task.cancel()
+        if errors and not pending:
+            raise errors[-1]
+        raise asyncio.TimeoutError()
+
+    def call_sync(self, operation: str, function: Callable[[], T]) -> T:
+        """
+        Run a blocking call under the breaker (its deadline is the client timeout).
+
+        Raises:
+            CircuitOpen: If the breaker is open
+            DeadlineExceeded: If the request budget is already exhausted
+        """
+        self._admit(operation)
+        try:
+            self._timeout(operation)
+        except DeadlineExceeded:
+            self.breaker.release()
+            raise
+        try:
+            result = function()
+        except Exception as e:
+            self._settle(operation, e)
+            raise
+        except BaseException:
+            self._abandon(operation)
+            raise
+        self._settle(operation, None)
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"breaker": self.breaker.snapshot(), "calls": self.metrics.snapshot()}
+
+
+# Singleton instance (one guard per Qdrant server, shared by the sync and async services)
+_guard: Optional[CallGuard] = None
+_guard_lock = threading.Lock()
+
+
+def get_guard() -> CallGuard:
+    """Get singleton Qdrant call guard (configured from settings)."""
+    global _guard
+    with _guard_lock:
+        if _guard is None:
+            from app.config import get_settings
+            settings = get_settings()
+            _guard = CallGuard(
+                CircuitBreaker("qdrant", settings.qdrant_breaker_failures, settings.qdrant_breaker_reset_s),
+                call_timeout=float(settings.qdrant_timeout),
+                hedge_delay=settings.qdrant_hedge_delay_ms / 1000.0
+            )
+        return _guard
@@ -0,0 +1,129 @@
+"""
+Server-side search filters and payload indexes.
+
+Filters are pushed down to Qdrant instead of being applied in Python after
+retrieval, so a selective filter still returns `limit` results and no
+non-matching payloads are transferred. Every filtered field gets a payload
+index when the collection is provisioned (PAYLOAD_INDEXES setting), which
+lets Qdrant plan filtered HNSW searches instead of scanning.
+
+Filter semantics:
+- category: case-insensitive word match (full-text index, lowercase tokenizer),
+  e.g. "shoes" matches "Sports Shoes"
+- price_min / price_max: inclusive range on the numeric "price" field
+- fields: any other payload field. A scalar is an exact match, a list
+  matches any of its values, and a dict of gt/gte/lt/lte is a range
+"""
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from qdrant_client.models import (
+    FieldCondition,
+    Filter,
+    MatchAny,
+    MatchText,
+    MatchValue,
+    PayloadSchemaType,
+    Range,
+    TextIndexParams,
+    TextIndexType,
+    TokenizerType,
+)
+
+logger = logging.getLogger(__name__)
+
+RANGE_KEYS = ("gt", "gte", "lt", "lte")
+
+
+class InvalidSearchRequest(ValueError):
+    """A search request has an invalid filter, hint or example (the API answers 400)."""
+
+
+def _field_condition(key: str, value: Any) -> FieldCondition:
+    """Condition for one metadata field (exact, any-of or range)."""
+    if isinstance(value, dict):
+        unknown = set(value) - set(RANGE_KEYS)
+        if unknown or not value:
+            raise InvalidSearchRequest(f"Filter on '{key}': range keys must be among {RANGE_KEYS}")
+        try:
+            return FieldCondition(key=key, range=Range(**value))
+        except ValueError as e:  # Non-numeric bounds
+            raise InvalidSearchRequest(f"Filter on '{key}': invalid range {value!r}") from e
+    if isinstance(value, (list, tuple)):
+        return FieldCondition(key=key, match=MatchAny(any=list(value)))
+    if isinstance(value, float):
+        return FieldCondition(key=key, range=Range(gte=value, lte=value))
+    if isinstance(value, (str, int, bool)):
+        return FieldCondition(key=key, match=MatchValue(value=value))
+    raise InvalidSearchRequest(f"Unsupported filter value for '{key}': {value!r}")
+
+
+def build_search_filter(category: Optional[str] = None,
+                        price_min: Optional[float] = None,
+                        price_max: Optional[float] = None,
+                        fields: Optional[Dict[str, Any]] = None) -> Optional[Filter]:
+    """
+    Build a Qdrant filter from search parameters.
+
+    Args:
+        category: Category words to match (case-insensitive)
+        price_min: Minimum price (inclusive)
+        price_max: Maximum price (inclusive)
+        fields: Other payload fields to filter on
+
+    Returns:
+        Filter, or None when no condition applies
+
+    Raises:
+        InvalidSearchRequest: On an invalid range or unsupported value
+    """
+    conditions: List[FieldCondition] = []
+
+    if category and category.strip():
+        conditions.append(FieldCondition(key="category", match=MatchText(text=category.strip())))
+
+    if price_min is not None or price_max is not None:
+        if price_min is not None and price_max is not None and price_min > price_max:
+            raise InvalidSearchRequest(f"price_min ({price_min}) is greater than price_max ({price_max})")
+        conditions.append(FieldCondition(key="price", range=Range(gte=price_min, lte=price_max)))
+
+    for key, value in (fields or {}).items():
+        conditions.append(_field_condition(key, value))
+
+    return Filter(must=conditions) if conditions else None
+
+
+_INDEX_TYPES = {
+    "keyword": PayloadSchemaType.KEYWORD,
+    "integer": PayloadSchemaType.INTEGER,
+    "float": PayloadSchemaType.FLOAT,
+    "bool": PayloadSchemaType.BOOL,
+    "text": TextIndexParams(type=TextIndexType.TEXT, tokenizer=TokenizerType.WORD, lowercase=True),
+}
+
+
+def payload_index_specs(spec: Optional[str] = None) -> List[Tuple[str, Any]]:
+    """
+    Parse the payload index setting ("field:type,field:type").
+
+    Args:
+        spec: Index list (default: PAYLOAD_INDEXES setting)
+
+    Returns:
+        (field_name, field_schema) pairs for create_payload_index
+    """
+    if spec is None:
+        from app.config import get_settings
+        spec = get_settings().payload_indexes
+
+    specs = []
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        field, _, index_type = item.strip().partition(":")
+        index_type = index_type.strip() or "keyword"
+        if index_type not in _INDEX_TYPES:
+            raise ValueError(f"Unknown payload index type '{index_type}' for '{field}' "
+                             f"(expected one of {', '.join(_INDEX_TYPES)})")
+        specs.append((field.strip(), _INDEX_TYPES[index_type]))
+    return specs
@@ -0,0 +1,82 @@
+"""
+Per-request search parameters: HNSW ef, exact search and latency tiers.
+
+Tiers trade recall for latency with the HNSW beam width (ef):
+- fast: HNSW_EF_FAST, for autocomplete / typeahead style queries
+- balanced: HNSW_EF (written by app.tools.tune_hnsw_ef; 0 = server default)
+- precise: HNSW_EF_PRECISE and twice the quantization oversampling
+
+Explicit hints win over the tier: hnsw_ef replaces the tier's ef (up to
+HNSW_EF_MAX, so one request cannot make every search slow), and
+exact=True does a full scan on the original vectors (ground truth, slow).
+
+Usage:
+    params = build_search_params(tier="fast")
+    client.query_points(..., search_params=params)
+"""
+from typing import Optional
+
+from qdrant_client.models import QuantizationSearchParams, SearchParams
+
+from app.services.quantization import quantization_search_params
+from app.services.search_filters import InvalidSearchRequest
+
+SEARCH_TIERS = ("fast", "balanced", "precise")
+
+
+def tier_ef(tier: str) -> Optional[int]:
+    """HNSW ef of a tier (None = server default)."""
+    from app.config import get_settings
+    settings = get_settings()
+    ef = {
+        "fast": settings.hnsw_ef_fast,
+        "balanced": settings.hnsw_ef,
+        "precise": settings.hnsw_ef_precise
+    }[tier]
+    return ef or None
+
+
+def build_search_params(tier: Optional[str] = None,
+                        hnsw_ef: Optional[int] = None,
+                        exact: bool = False) -> Optional[SearchParams]:
+    """
+    Search params for one request.
+
+    Args:
+        tier: fast, balanced or precise (default: SEARCH_TIER setting)
+        hnsw_ef: Explicit HNSW ef (overrides the tier, at most HNSW_EF_MAX)
+        exact: Exact (brute force) search on the original vectors
+
+    Returns:
+        SearchParams, or None when every parameter is the server default
+
+    Raises:
+        InvalidSearchRequest: On an unknown tier or an hnsw_ef outside 1..HNSW_EF_MAX
+        ValueError: If the SEARCH_TIER setting is unknown
+    """
+    if exact:
+        return SearchParams(exact=True, quantization=QuantizationSearchParams(ignore=True))
+
+    from app.config import get_settings
+    settings = get_settings()
+    error = InvalidSearchRequest
+    if tier is None:
+        tier, error = settings.search_tier, ValueError  # Configuration, not the request
+    tier = tier.strip().lower()
+    if tier not in SEARCH_TIERS:
+        raise error(f"Unknown search tier '{tier}' (expected one of {', '.join(SEARCH_TIERS)})")
+    if hnsw_ef is not None and not 1 <= hnsw_ef <= settings.hnsw_ef_max:
+        raise InvalidSearchRequest(f"hnsw_ef must be between 1 and {settings.hnsw_ef_max}, got {hnsw_ef}")
+
+    quantization = quantization_search_params()
+    if quantization is not None and tier == "precise":
+        quantization.quantization.oversampling *= 2
+
+    ef = hnsw_ef if hnsw_ef is not None else tier_ef(tier)
+    if ef is None and quantization is None:
+        return None
+
+    return SearchParams(
+        hnsw_ef=ef,
+        quantization=quantization.quantization if quantization is not None else None
+    )
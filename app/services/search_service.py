@@ -4,6 +4,7 @@ from typing import List, Dict, Any, Optional
 from app.services.embedding_service import EmbeddingService
 from app.services.qdrant_service import QdrantService
 from app.services.cache_service import CacheService
+from app.services.search_filters import build_search_filter
 
 logger = logging.getLogger(__name__)
 
@@ -27,8 +28,10 @@ class SearchService:
         start_time = time.time()
         top_k = top_k or self.top_k
         
-        # Check cache
-        cache_key = self.cache_service._generate_key("image_search", image_url)
+        # Check cache (filters are part of the key: they change the result set)
+        cache_key = self.cache_service._generate_key(
+            "image_search", f"{image_url}|{top_k}|{category_filter}|{price_min}|{price_max}"
+        )
         cached_result = self.cache_service.get(cache_key)
         if cached_result:
             return cached_result
@@ -40,15 +43,12 @@ class SearchService:
             
             # Search in Qdrant
             logger.info(f"Searching for similar products in Qdrant")
-            search_results = self.qdrant_service.search(embedding, top_k=top_k)
-            
-            # Filter results
-            results = self._filter_and_format_results(
-                search_results, 
-                category_filter, 
-                price_min, 
-                price_max
+            search_results = self.qdrant_service.search(
+                embedding,
+                top_k=top_k,
+                filters=build_search_filter(category_filter, price_min, price_max)  # Applied by Qdrant
             )
+            results = self._format_results(search_results)
             
             execution_time = (time.time() - start_time) * 1000
             
@@ -76,8 +76,10 @@ class SearchService:
         start_time = time.time()
         top_k = top_k or self.top_k
         
-        # Check cache
-        cache_key = self.cache_service._generate_key("text_search", text_query)
+        # Check cache (filters are part of the key: they change the result set)
+        cache_key = self.cache_service._generate_key(
+            "text_search", f"{text_query}|{top_k}|{category_filter}|{price_min}|{price_max}"
+        )
         cached_result = self.cache_service.get(cache_key)
         if cached_result:
             return cached_result
@@ -89,15 +91,12 @@ class SearchService:
             
             # Search in Qdrant
             logger.info(f"Searching for similar products in Qdrant")
-            search_results = self.qdrant_service.search(embedding, top_k=top_k)
-            
-            # Filter results
-            results = self._filter_and_format_results(
-                search_results, 
-                category_filter, 
-                price_min, 
-                price_max
+            search_results = self.qdrant_service.search(
+                embedding,
+                top_k=top_k,
+                filters=build_search_filter(category_filter, price_min, price_max)  # Applied by Qdrant
             )
+            results = self._format_results(search_results)
             
             execution_time = (time.time() - start_time) * 1000
             
@@ -117,27 +116,12 @@ class SearchService:
             logger.error(f"Error searching by text: {e}")
             raise
     
-    def _filter_and_format_results(self, search_results: List[Dict[str, Any]],
-                                   category_filter: Optional[str] = None,
-                                   price_min: Optional[float] = None,
-                                   price_max: Optional[float] = None) -> List[Dict[str, Any]]:
-        """Filter and format search results"""
+    def _format_results(self, search_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Format search results (filters are applied by Qdrant)"""
         formatted_results = []
         
         for result in search_results:
             payload = result["payload"]
-            
-            # Apply category filter
-            if category_filter and payload.get("category") != category_filter:
-                continue
-            
-            # Apply price filters
-            price = payload.get("price", 0)
-            if price_min is not None and price < price_min:
-                continue
-            if price_max is not None and price > price_max:
-                continue
-            
             formatted_results.append({
                 "product_id": payload.get("product_id"),
                 "name": payload.get("name"),
@@ -0,0 +1,198 @@
+"""
+Precomputed "similar products" table.
+
+The similar-items carousel is read far more often than the catalogue
+changes, so neighbours are computed offline (app.tools.build_similar_products)
+and served from Redis with one HGET instead of an ANN query per page view.
+
+Redis layout:
+- similar:products  hash  product_id -> JSON [[neighbour_id, score], ...] (top-K, best first)
+- similar:staging   hash  table of a running full build, renamed over
+                          similar:products when complete (drops removed products)
+- similar:dirty     set   product_ids indexed/deleted since the last refresh
+- similar:meta      hash  build info (k, full_at, incremental_at)
+
+Indexing paths call mark_products_changed() so the refresh job only
+recomputes the neighbourhoods that an ingestion actually touched.
+
+Usage:
+    store = get_similar_products_store()
+    neighbours = store.get("sku-42")  # [{"id": "sku-7", "score": 0.93}, ...] or None
+"""
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+Neighbours = List[Tuple[str, float]]
+
+
+class SimilarProductsStore:
+    """Top-K neighbour lists per product, in a Redis hash."""
+
+    def __init__(self, redis_client: Any = None, prefix: str = "similar"):
+        """
+        Initialize the store.
+
+        Args:
+            redis_client: Redis client (default: built from settings on first use)
+            prefix: Key prefix of the table, dirty set and metadata
+        """
+        self._redis = redis_client
+        self.table_key = f"{prefix}:products"
+        self.staging_key = f"{prefix}:staging"
+        self.dirty_key = f"{prefix}:dirty"
+        self.meta_key = f"{prefix}:meta"
+
+    def _get_redis(self):
+        """Redis client (decoded responses)."""
+        if self._redis is None:
+            if not REDIS_AVAILABLE:
+                raise RuntimeError("redis-py is not installed")
+            from app.config import get_settings
+            settings = get_settings()
+            redis_url = settings.redis_url or os.getenv("REDIS_URL")
+            if redis_url:
+                self._redis = redis.from_url(redis_url, decode_responses=True,
+                                             socket_timeout=2, socket_connect_timeout=1)
+            else:
+                self._redis = redis.Redis(
+                    host=settings.redis_host,
+                    port=int(settings.redis_port),
+                    password=settings.redis_password or None,
+                    decode_responses=True,
+                    socket_timeout=2,
+                    socket_connect_timeout=1
+                )
+        return self._redis
+
+    @staticmethod
+    def _decode(raw: Optional[str]) -> Optional[Neighbours]:
+        if raw is None:
+            return None
+        return [(str(product_id), float(score)) for product_id, score in json.loads(raw)]
+
+    @staticmethod
+    def _encode(neighbours: Neighbours) -> str:
+        return json.dumps([[product_id, round(score, 4)] for product_id, score in neighbours],
+                          separators=(",", ":"))
+
+    def get(self, product_id: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Precomputed neighbours of a product.
+
+        Args:
+            product_id: Product ID
+
+        Returns:
+            [{"id", "score"}, ...] best first, or None if the product has no entry
+        """
+        neighbours = self._decode(self._get_redis().hget(self.table_key, product_id))
+        if neighbours is None:
+            return None
+        return [{"id": neighbour_id, "score": score} for neighbour_id, score in neighbours]
+
+    def get_many(self, product_ids: Sequence[str]) -> Dict[str, Neighbours]:
+        """Neighbour lists of several products (missing products are left out)."""
+        if not product_ids:
+            return {}
+        raws = self._get_redis().hmget(self.table_key, list(product_ids))
+        return {
+            product_id: self._decode(raw)
+            for product_id, raw in zip(product_ids, raws)
+            if raw is not None
+        }
+
+    def set_many(self, neighbours: Dict[str, Neighbours], staging: bool = False) -> None:
+        """Store neighbour lists (one round trip), in the table or the staging table of a full build."""
+        if neighbours:
+            self._get_redis().hset(
+                self.staging_key if staging else self.table_key,
+                mapping={product_id: self._encode(items) for product_id, items in neighbours.items()}
+            )
+
+    def reset_staging(self) -> None:
+        """Start a full build from an empty staging table."""
+        self._get_redis().delete(self.staging_key)
+
+    def publish_staging(self) -> None:
+        """Replace the table by the staging table in one step (entries not rebuilt disappear)."""
+        client = self._get_redis()
+        if client.exists(self.staging_key):
+            client.rename(self.staging_key, self.table_key)
+        else:
+            client.delete(self.table_key)  # Empty collection
+
+    def delete(self, product_ids: Sequence[str]) -> None:
+        """Drop the entries of products that no longer exist."""
+        if product_ids:
+            self._get_redis().hdel(self.table_key, *product_ids)
+
+    def clear(self) -> None:
+        """Drop the whole table (the next build must be a full one)."""
+        self._get_redis().delete(self.table_key, self.staging_key, self.dirty_key, self.meta_key)
+
+    def mark_changed(self, product_ids: Iterable[str]) -> None:
+        """Record products whose vector was added, replaced or deleted."""
+        product_ids = [str(product_id) for product_id in product_ids]
+        if product_ids:
+            self._get_redis().sadd(self.dirty_key, *product_ids)
+
+    def changed_products(self) -> List[str]:
+        """Products changed since the last refresh."""
+        return sorted(self._get_redis().smembers(self.dirty_key))
+
+    def clear_changed(self, product_ids: Sequence[str]) -> None:
+        """Forget processed change marks (marks added meanwhile are kept)."""
+        if product_ids:
+            self._get_redis().srem(self.dirty_key, *product_ids)
+
+    def set_build_info(self, k: int, mode: str, **extra: Any) -> None:
+        """Record when and how the table was last built/refreshed."""
+        self._get_redis().hset(self.meta_key, mapping={"k": k, f"{mode}_at": time.time(), **extra})
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Table size, pending changes and build info."""
+        client = self._get_redis()
+        return {
+            "products": client.hlen(self.table_key),
+            "pending_changes": client.scard(self.dirty_key),
+            "build": client.hgetall(self.meta_key)
+        }
+
+
+# Singleton instance
+_similar_products_store: Optional[SimilarProductsStore] = None
+
+
+def get_similar_products_store() -> SimilarProductsStore:
+    """Get singleton similar-products store."""
+    global _similar_products_store
+    if _similar_products_store is None:
+        _similar_products_store = SimilarProductsStore()
+    return _similar_products_store
+
+
+def mark_products_changed(product_ids: Iterable[str]) -> None:
+    """
+    Flag products for the next incremental refresh (best effort).
+
+    Called by the indexing paths; a Redis failure is logged and never
+    fails the indexing itself (the next full build catches up).
+    """
+    from app.config import get_settings
+    if not get_settings().similar_products_track_changes:
+        return
+    try:
+        get_similar_products_store().mark_changed(product_ids)
+    except Exception as e:
+        logger.warning(f"Could not mark products for similar-products refresh: {e}")
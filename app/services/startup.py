@@ -0,0 +1,157 @@
+"""
+Staged startup: liveness, readiness and model warmup.
+
+The API process answers liveness probes as soon as uvicorn is up: heavy
+modules (torch, transformers, whisper) are imported lazily and no model is
+built at import time. Models are then loaded in the background and warmed
+up with a dummy forward pass, and the process only reports ready once every
+required component is warm - so autoscaled replicas receive traffic only
+when the first request won't pay for a model load.
+
+Usage:
+    tracker = get_startup_tracker()
+    with tracker.stage("routes_import"):
+        from app.api.routes import router
+    tracker.register_warmup("clip_text", lambda: service.embed_texts(["warmup"]))
+    asyncio.create_task(tracker.run_warmups())   # in the lifespan
+    tracker.is_ready()                           # /api/v1/ready
+"""
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StartupStage:
+    """Timing and outcome of one startup component."""
+    name: str
+    status: str = "pending"  # pending, running, ok, failed
+    required: bool = True
+    started_at: Optional[float] = None
+    duration_s: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class Warmup:
+    """Background warmup step for one model."""
+    name: str
+    fn: Callable[[], Any]
+    executor_model: Optional[str] = None
+    required: bool = True
+
+
+class StartupTracker:
+    """Record startup stages and decide readiness."""
+
+    def __init__(self):
+        self.process_started = time.perf_counter()
+        self.ready_after_s: Optional[float] = None
+        self._stages: Dict[str, StartupStage] = {}
+        self._warmups: List[Warmup] = []
+        self._startup_complete = False
+
+    @contextmanager
+    def stage(self, name: str, required: bool = True):
+        """Time a startup stage; failures are recorded and re-raised."""
+        stage = self._stages.setdefault(name, StartupStage(name=name, required=required))
+        stage.status = "running"
+        stage.started_at = time.perf_counter()
+        try:
+            yield stage
+            stage.status = "ok"
+        except Exception as e:
+            stage.status = "failed"
+            stage.error = str(e)
+            raise
+        finally:
+            stage.duration_s = time.perf_counter() - stage.started_at
+            logger.info(f"Startup stage '{name}': {stage.status} in {stage.duration_s:.2f}s")
+            self._update_ready()
+
+    def register_warmup(self, name: str, fn: Callable[[], Any],
+                        executor_model: Optional[str] = None, required: bool = True) -> None:
+        """
+        Register a model warmup to run in the background after startup.
+
+        Args:
+            name: Component name (e.g. "clip_text")
+            fn: Blocking function loading the model and running a dummy forward pass
+            executor_model: Inference executor to run it on (default: loop's default pool)
+            required: Whether readiness waits for this warmup
+        """
+        self._warmups.append(Warmup(name, fn, executor_model, required))
+        self._stages[f"warmup:{name}"] = StartupStage(name=f"warmup:{name}", required=required)
+
+    def mark_startup_complete(self) -> None:
+        """Called at the end of the lifespan startup (services initialized)."""
+        self._startup_complete = True
+        self._update_ready()
+
+    async def run_warmups(self) -> None:
+        """Run every registered warmup concurrently (each on its model's executor)."""
+        from app.services.inference_executor import get_inference_executor
+
+        executor = get_inference_executor()
+        loop = asyncio.get_running_loop()
+
+        async def run(warmup: Warmup) -> None:
+            try:
+                with self.stage(f"warmup:{warmup.name}", required=warmup.required):
+                    if warmup.executor_model:
+                        await executor.run(warmup.executor_model, warmup.fn)
+                    else:
+                        await loop.run_in_executor(None, warmup.fn)
+            except Exception as e:
+                logger.error(f"Warmup of '{warmup.name}' failed: {e}")
+
+        await asyncio.gather(*(run(warmup) for warmup in self._warmups))
+
+    def _update_ready(self) -> None:
+        if self.ready_after_s is None and self.is_ready():
+            self.ready_after_s = time.perf_counter() - self.process_started
+            logger.info(f"✅ Ready to serve traffic after {self.ready_after_s:.2f}s")
+
+    def is_ready(self) -> bool:
+        """Ready once startup completed and every required stage succeeded."""
+        return self._startup_complete and all(
+            stage.status == "ok" for stage in self._stages.values() if stage.required
+        )
+
+    def get_report(self) -> Dict[str, Any]:
+        """Startup time breakdown per component."""
+        return {
+            "ready": self.is_ready(),
+            "ready_after_s": round(self.ready_after_s, 2) if self.ready_after_s is not None else None,
+            "uptime_s": round(time.perf_counter() - self.process_started, 2),
+            "stages": {
+                name: {
+                    "status": stage.status,
+                    "required": stage.required,
+                    "duration_s": round(stage.duration_s, 3),
+                    "started_at_s": (
+                        round(stage.started_at - self.process_started, 3)
+                        if stage.started_at is not None else None
+                    ),
+                    "error": stage.error
+                }
+                for name, stage in self._stages.items()
+            }
+        }
+
+
+# Singleton instance
+_startup_tracker: Optional[StartupTracker] = None
+
+
+def get_startup_tracker() -> StartupTracker:
+    """Get the process-wide startup tracker."""
+    global _startup_tracker
+    if _startup_tracker is None:
+        _startup_tracker = StartupTracker()
+    return _startup_tracker
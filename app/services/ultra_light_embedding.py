@@ -3,13 +3,11 @@ Ultra-lightweight embedding service using TF-IDF (scikit-learn).
 No PyTorch, Transformers, or sentence-transformers dependencies.
 Uses pre-computed embeddings from Qdrant + TF-IDF for search.
 """
-import json
-import hashlib
 import numpy as np
 from typing import List, Optional
 from sklearn.feature_extraction.text import TfidfVectorizer
-import redis
 import logging
+from app.services.embedding_cache import EmbeddingCache, create_embedding_cache
 
 logger = logging.getLogger(__name__)
 
@@ -18,7 +16,7 @@ class UltraLightEmbeddingService:
     
     _instance = None
     _vectorizer = None
-    _redis_client = None
+    _embedding_cache = None
     
     def __new__(cls):
         if cls._instance is None:
@@ -40,116 +38,44 @@ class UltraLightEmbeddingService:
             # Pre-fit with dummy data to initialize
             self._vectorizer.fit(['search query text'])
     
-    @staticmethod
-    def _get_redis():
-        """Get Redis connection (cached)."""
-        from app.config import get_settings
-        settings = get_settings()
-        if UltraLightEmbeddingService._redis_client is None:
-            try:
-                UltraLightEmbeddingService._redis_client = redis.Redis(
-                    host=settings.redis_host,
-                    port=int(settings.redis_port),
-                    password=settings.redis_password,
-                    ssl=False,  # Disable SSL for Docker Compose communication
-                    decode_responses=False
-                )
-                UltraLightEmbeddingService._redis_client.ping()
-            except Exception as e:
-                logger.error(f"Redis connection failed: {e}")
-                UltraLightEmbeddingService._redis_client = None
-        return UltraLightEmbeddingService._redis_client
-    
-    def _get_cache_key(self, text: str) -> str:
-        """Generate cache key for embedding."""
-        return f"tfidf_embedding:{hashlib.md5(text.encode()).hexdigest()}"
+    @property
+    def _cache(self) -> EmbeddingCache:
+        """Binary embedding cache (LRU + Redis), versioned by the fitted vocabulary."""
+        if UltraLightEmbeddingService._embedding_cache is None:
+            vocabulary = sorted(self._vectorizer.vocabulary_.items())
+            UltraLightEmbeddingService._embedding_cache = create_embedding_cache(
+                namespace="emb:tfidf",
+                dimension=self.get_dimension(),
+                version=str(vocabulary)
+            )
+        return UltraLightEmbeddingService._embedding_cache
     
     def embed(self, text: str) -> List[float]:
         """Get TF-IDF embedding for text, using cache if available."""
-        cache_key = self._get_cache_key(text)
-        redis_conn = self._get_redis()
-        
-        # Try to get from Redis cache
-        if redis_conn:
-            try:
-                cached = redis_conn.get(cache_key)
-                if cached:
-                    return json.loads(cached)
-            except Exception as e:
-                logger.warning(f"Redis cache get failed: {e}")
-        
-        # Generate TF-IDF embedding
-        try:
-            tfidf_vector = self._vectorizer.transform([text]).toarray()[0]
-            embedding = tfidf_vector.tolist()
-        except Exception as e:
-            logger.error(f"TF-IDF embedding failed: {e}")
-            # Fallback: return zero vector
-            embedding = [0.0] * len(self._vectorizer.get_feature_names_out())
-        
-        # Store in Redis cache (24h TTL)
-        if redis_conn:
-            try:
-                redis_conn.setex(
-                    cache_key,
-                    86400,  # 24 hours
-                    json.dumps(embedding)
-                )
-            except Exception as e:
-                logger.warning(f"Redis cache set failed: {e}")
-        
-        return embedding
+        return self.embed_batch([text])[0]
     
     def embed_batch(self, texts: List[str]) -> List[List[float]]:
-        """Embed multiple texts efficiently."""
-        results = []
-        redis_conn = self._get_redis()
-        
-        # Try batch cache first
-        uncached_texts = []
-        uncached_indices = []
-        cache_keys = []
-        
-        for i, text in enumerate(texts):
-            cache_key = self._get_cache_key(text)
-            cache_keys.append(cache_key)
-            
-            if redis_conn:
-                try:
-                    cached = redis_conn.get(cache_key)
-                    if cached:
-                        results.append(json.loads(cached))
-                        continue
-                except:
-                    pass
-            
-            uncached_texts.append(text)
-            uncached_indices.append(i)
-            results.append(None)
+        """Embed multiple texts efficiently (one MGET, one pipelined SET)."""
+        cache_keys = [self._cache.key_for(text) for text in texts]
+        results = self._cache.get_many(cache_keys)
+        uncached_indices = [i for i, cached in enumerate(results) if cached is None]
         
         # Generate embeddings for uncached texts
-        if uncached_texts:
+        if uncached_indices:
             try:
-                tfidf_vectors = self._vectorizer.transform(uncached_texts).toarray()
-                
+                tfidf_vectors = self._vectorizer.transform([texts[i] for i in uncached_indices]).toarray()
                 for idx, vector in zip(uncached_indices, tfidf_vectors):
-                    embedding_list = vector.tolist()
-                    results[idx] = embedding_list
-                    
-                    # Cache it
-                    if redis_conn:
-                        try:
-                            redis_conn.setex(
-                                cache_keys[idx],
-                                86400,
-                                json.dumps(embedding_list)
-                            )
-                        except:
-                            pass
+                    results[idx] = vector
+                
+                # Cache them
+                self._cache.set_many({cache_keys[idx]: results[idx] for idx in uncached_indices})
             except Exception as e:
                 logger.error(f"Batch TF-IDF embedding failed: {e}")
+                # Fallback: return zero vectors
+                for idx in uncached_indices:
+                    results[idx] = np.zeros(self.get_dimension())
         
-        return results
+        return [np.asarray(embedding).tolist() for embedding in results]
     
     def similarity(self, text1: str, text2: str) -> float:
         """Calculate cosine similarity between two texts."""
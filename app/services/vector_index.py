@@ -0,0 +1,411 @@
+"""
+In-process brute-force vector index (low-latency tier and Qdrant fallback).
+
+A snapshot of the products collection, built by app.tools.build_vector_index:
+- vectors.npy    float16 matrix of L2-normalized vectors, memory-mapped (the
+                 OS page cache holds it, not the Python heap); float32 doubles
+                 the size but skips the per-query conversion on CPUs without
+                 fast half-precision support (see build_vector_index --benchmark)
+- payloads.json  product_id and display fields per row (the id table)
+- manifest.json  count, dimension, dtype, source collection, build time
+
+Search is exact cosine similarity: a chunked matrix-vector product with
+argpartition top-k per chunk. The category filter uses bitmaps precomputed
+per category word (packed bits, ANDed per query word, same semantics as the
+full-text index on category); price ranges are a vectorized mask.
+
+Selected by VECTOR_INDEX_ROUTE:
+- off: never used
+- fallback (default): serves searches when Qdrant fails
+- auto: also serves every search it can answer while the catalogue has at
+  most VECTOR_INDEX_MAX_POINTS products (skips the network round trip)
+
+Queries with other payload filters always go to Qdrant. The snapshot is as
+fresh as its last build; rebuild it periodically (the running API picks up
+a new build on its own).
+
+Usage:
+    index = get_vector_index()
+    results = index.search_results(query_vector, limit=10, category="shoes")
+"""
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_ROUTES = ("off", "fallback", "auto")
+
+# Payload fields kept per row (what search results display)
+PAYLOAD_FIELDS = ("product_id", "name", "description", "image_url", "price", "category", "url")
+
+CURRENT_FILE = "CURRENT"  # Name of the live build directory (swapped atomically)
+
+
+def new_build(directory: str) -> Tuple[str, str]:
+    """Create the directory of a new build. Returns (name, path)."""
+    os.makedirs(directory, exist_ok=True)
+    name = f"build-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+    path = os.path.join(directory, name)
+    os.makedirs(path)
+    return name, path
+
+
+def publish_build(directory: str, name: str, keep: int = 2) -> None:
+    """Make a build current (atomic swap of the CURRENT pointer) and drop older builds."""
+    pointer = os.path.join(directory, CURRENT_FILE)
+    with open(pointer + ".tmp", "w") as f:
+        f.write(name)
+    os.replace(pointer + ".tmp", pointer)
+
+    # Keep the previous build: a running API may still have it mapped
+    builds = sorted(entry for entry in os.listdir(directory) if entry.startswith("build-"))
+    for old in builds[:-keep]:
+        shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+
+
+def current_build(directory: str) -> Optional[str]:
+    """Name of the current build of an index directory (None if there is none)."""
+    try:
+        with open(os.path.join(directory, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _words(text: str) -> List[str]:
+    """Lowercase words, like the full-text index tokenizer."""
+    return re.findall(r"\w+", str(text).lower())
+
+
+class LocalVectorIndex:
+    """Exact cosine search over a float16 snapshot of the collection."""
+
+    def __init__(self, vectors: np.ndarray, payloads: Sequence[Dict[str, Any]], chunk_size: int = 4096):
+        """
+        Initialize the index.
+
+        Args:
+            vectors: (n, dim) L2-normalized vectors (typically a float16 memmap)
+            payloads: Row payloads (product_id and display fields), same order
+            chunk_size: Rows scored per matrix-vector product (bounds temporary memory)
+        """
+        if len(vectors) != len(payloads):
+            raise ValueError(f"{len(vectors)} vectors but {len(payloads)} payloads")
+        self.vectors = vectors
+        self.payloads = list(payloads)
+        self.chunk_size = max(1, chunk_size)
+
+        self.prices = np.array(
+            [payload.get("price") if isinstance(payload.get("price"), (int, float)) else np.nan
+             for payload in self.payloads],
+            dtype=np.float32
+        )
+        rows_by_word: Dict[str, List[int]] = {}
+        for row, payload in enumerate(self.payloads):
+            for word in set(_words(payload.get("category") or "")):
+                rows_by_word.setdefault(word, []).append(row)
+        self.category_bitmaps: Dict[str, np.ndarray] = {}
+        for word, rows in rows_by_word.items():
+            mask = np.zeros(len(self.payloads), dtype=bool)
+            mask[rows] = True
+            self.category_bitmaps[word] = np.packbits(mask)
+
+    def __len__(self) -> int:
+        return len(self.payloads)
+
+    @property
+    def dimension(self) -> int:
+        return int(self.vectors.shape[1]) if len(self.vectors.shape) == 2 else 0
+
+    def _filter_mask(self, category: Optional[str], price_min: Optional[float],
+                     price_max: Optional[float]) -> Optional[np.ndarray]:
+        """Rows passing the filters (None when unfiltered)."""
+        mask = None
+        if category and category.strip():
+            mask = np.ones(len(self), dtype=bool)
+            for word in _words(category):
+                bitmap = self.category_bitmaps.get(word)
+                if bitmap is None:
+                    return np.zeros(len(self), dtype=bool)
+                mask &= np.unpackbits(bitmap, count=len(self)).astype(bool)
+        if price_min is not None or price_max is not None:
+            with np.errstate(invalid="ignore"):  # NaN (no price) never matches a range
+                in_range = np.ones(len(self), dtype=bool)
+                if price_min is not None:
+                    in_range &= self.prices >= price_min
+                if price_max is not None:
+                    in_range &= self.prices <= price_max
+            mask = in_range if mask is None else mask & in_range
+        return mask
+
+    def search(self, query_vector: Sequence[float], limit: int = 10, score_threshold: Optional[float] = None,
+               category: Optional[str] = None, price_min: Optional[float] = None,
+               price_max: Optional[float] = None) -> List[Tuple[int, float]]:
+        """
+        Exact top-k rows by cosine similarity.
+
+        Args:
+            query_vector: Query embedding
+            limit: Max number of results
+            score_threshold: Minimum similarity score
+            category: Category words to match (case-insensitive)
+            price_min: Minimum price (inclusive)
+            price_max: Maximum price (inclusive)
+
+        Returns:
+            [(row, score), ...] best first
+
+        Raises:
+            ValueError: If the query dimension does not match the index
+        """
+        query = np.asarray(query_vector, dtype=np.float32)
+        if query.shape != (self.dimension,):
+            raise ValueError(f"Query has dimension {query.size}, index has {self.dimension}")
+        if len(self) == 0 or limit <= 0:
+            return []
+        norm = float(np.linalg.norm(query))
+        if norm > 0:
+            query = query / norm
+
+        mask = self._filter_mask(category, price_min, price_max)
+        if mask is not None and not mask.any():
+            return []
+
+        rows: List[np.ndarray] = []
+        scores: List[np.ndarray] = []
+        for start in range(0, len(self), self.chunk_size):
+            chunk_scores = np.asarray(self.vectors[start:start + self.chunk_size], dtype=np.float32) @ query
+            if mask is not None:
+                chunk_scores[~mask[start:start + self.chunk_size]] = -np.inf
+            if score_threshold is not None:
+                chunk_scores[chunk_scores < score_threshold] = -np.inf
+            k = min(limit, len(chunk_scores))
+            top = np.argpartition(-chunk_scores, k - 1)[:k]
+            top = top[np.isfinite(chunk_scores[top])]
+            rows.append(top + start)
+            scores.append(chunk_scores[top])
+
+        rows_all = np.concatenate(rows)
+        scores_all = np.concatenate(scores)
+        order = np.argsort(-scores_all, kind="stable")[:limit]
+        return [(int(rows_all[i]), float(scores_all[i])) for i in order]
+
+    def search_results(self, query_vector: Sequence[float], limit: int = 10, score_threshold: Optional[float] = None,
+                       category: Optional[str] = None, price_min: Optional[float] = None,
+                       price_max: Optional[float] = None) -> List[Dict]:
+        """Same as search, formatted like the Qdrant services' results."""
+        results = []
+        for row, score in self.search(query_vector, limit, score_threshold, category, price_min, price_max):
+            payload = self.payloads[row]
+            results.append({
+                "id": payload.get("product_id"),
+                "score": score,
+                "metadata": {field: payload.get(field) for field in PAYLOAD_FIELDS if field != "product_id"}
+            })
+        return results
+
+    def save(self, directory: str, source: Optional[str] = None, dtype: str = "float16") -> str:
+        """
+        Write a new build and make it current (atomic swap of the CURRENT pointer).
+
+        Args:
+            directory: Index root directory
+            source: Source collection name (recorded in the manifest)
+            dtype: Stored vector type, float16 or float32
+
+        Returns:
+            Path of the new build
+        """
+        if dtype not in ("float16", "float32"):
+            raise ValueError(f"Unsupported vector dtype '{dtype}'")
+        name, path = new_build(directory)
+        np.save(os.path.join(path, "vectors.npy"), np.asarray(self.vectors, dtype=dtype))
+        with open(os.path.join(path, "payloads.json"), "w") as f:
+            json.dump(self.payloads, f)
+        with open(os.path.join(path, "manifest.json"), "w") as f:
+            json.dump({"count": len(self), "dimension": self.dimension, "dtype": dtype,
+                       "source": source, "built_at": time.time()}, f)
+
+        publish_build(directory, name)
+        return path
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["LocalVectorIndex"]:
+        """Current build of an index directory, memory-mapped (None if there is none)."""
+        build = current_build(directory)
+        if build is None:
+            return None
+        path = os.path.join(directory, build)
+        vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        with open(os.path.join(path, "payloads.json")) as f:
+            payloads = json.load(f)
+        return cls(vectors, payloads)
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows (zero rows are left as is)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def build_vector_index(client, collection_name: str, batch_size: int = 1000) -> LocalVectorIndex:
+    """
+    Snapshot a collection into a LocalVectorIndex (in RAM; save() it to serve it).
+
+    Args:
+        client: Sync QdrantClient
+        collection_name: Collection to mirror
+        batch_size: Points per scroll page
+
+    Returns:
+        LocalVectorIndex of every point with a product_id
+    """
+    vectors: List[np.ndarray] = []
+    payloads: List[Dict[str, Any]] = []
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            limit=batch_size,
+            offset=offset,
+            with_payload=list(PAYLOAD_FIELDS),
+            with_vectors=True
+        )
+        for point in points:
+            payload = point.payload or {}
+            if payload.get("product_id") is None or point.vector is None:
+                continue
+            vectors.append(np.asarray(point.vector, dtype=np.float32))
+            payloads.append({field: payload.get(field) for field in PAYLOAD_FIELDS if payload.get(field) is not None})
+        if offset is None:
+            break
+
+    matrix = normalize_rows(np.vstack(vectors)) if vectors else np.zeros((0, 0), dtype=np.float32)
+    return LocalVectorIndex(matrix.astype(np.float16), payloads)
+
+
+# Singleton instance (reloaded when a new build becomes current)
+_vector_index: Optional[LocalVectorIndex] = None
+_vector_index_build: Optional[str] = None
+_vector_index_checked = 0.0
+_vector_index_lock = threading.Lock()
+
+
+def get_vector_index(reload_interval: float = 10.0) -> Optional[LocalVectorIndex]:
+    """
+    Current local index (None when routing is off or no build exists).
+
+    The CURRENT pointer is checked at most every reload_interval seconds.
+    """
+    global _vector_index, _vector_index_build, _vector_index_checked
+    from app.config import get_settings
+    settings = get_settings()
+    if vector_index_route() == "off":
+        return None
+
+    now = time.monotonic()
+    if now - _vector_index_checked < reload_interval:
+        return _vector_index
+    with _vector_index_lock:
+        if now - _vector_index_checked < reload_interval:
+            return _vector_index
+        _vector_index_checked = now
+        build = current_build(settings.vector_index_path)
+        if build is None:
+            return _vector_index
+        if build != _vector_index_build:
+            try:
+                _vector_index = LocalVectorIndex.load(settings.vector_index_path)
+                _vector_index_build = build
+                logger.info(f"Loaded local vector index {build} ({len(_vector_index)} products)")
+            except Exception as e:
+                logger.warning(f"Could not load local vector index {build}: {e}")
+    return _vector_index
+
+
+def vector_index_route() -> str:
+    """VECTOR_INDEX_ROUTE: off, fallback or auto (cheap: settings only)."""
+    from app.config import get_settings
+    route = get_settings().vector_index_route.strip().lower()
+    if route not in INDEX_ROUTES:
+        raise ValueError(f"Unknown VECTOR_INDEX_ROUTE '{route}' (expected one of {', '.join(INDEX_ROUTES)})")
+    return route
+
+
+def _servable_index(filters: Optional[Dict[str, Any]]) -> Optional[LocalVectorIndex]:
+    """Local index when it exists and can answer the query (category/price filters only)."""
+    if filters:
+        return None
+    index = get_vector_index()
+    return index if index is not None and len(index) > 0 else None
+
+
+def primary_vector_index(filters: Optional[Dict[str, Any]] = None) -> Optional[LocalVectorIndex]:
+    """Local index to serve a search before trying Qdrant (auto route, small catalogue)."""
+    from app.config import get_settings
+    if vector_index_route() != "auto":
+        return None
+    index = _servable_index(filters)
+    if index is None or len(index) > get_settings().vector_index_max_points:
+        return None
+    return index
+
+
+def fallback_vector_index(filters: Optional[Dict[str, Any]] = None) -> Optional[LocalVectorIndex]:
+    """Local index to serve a search Qdrant failed (any route but off)."""
+    return _servable_index(filters)
+
+
+def search_vector_index(select: Callable[[Optional[Dict[str, Any]]], Optional[LocalVectorIndex]],
+                        filters: Optional[Dict[str, Any]], *local_args: Any) -> Optional[List[Dict]]:
+    """
+    Pick the local index with select and search it (see local_search for local_args).
+
+    Blocking: getting the index may load a new build from disk, so async
+    callers run the whole call in a worker thread.
+
+    Args:
+        select: primary_vector_index or fallback_vector_index
+        filters: Search filters (the local index only answers category/price ones)
+
+    Returns:
+        Results, or None when the local index cannot answer
+    """
+    return local_search(select(filters), *local_args)
+
+
+def local_search(index: Optional[LocalVectorIndex], query_vector: Sequence[float], limit: int,
+                 score_threshold: Optional[float], category: Optional[str] = None,
+                 price_min: Optional[float] = None, price_max: Optional[float] = None) -> Optional[List[Dict]]:
+    """
+    Search results from the local index, or None when it cannot answer.
+
+    Args:
+        index: primary_vector_index() or fallback_vector_index() (None: not routed)
+        query_vector: Query embedding
+        limit: Max number of results
+        score_threshold: Minimum similarity score
+        category: Category words to match
+        price_min: Minimum price (inclusive)
+        price_max: Maximum price (inclusive)
+
+    Returns:
+        Results formatted like the Qdrant services', or None
+    """
+    if index is None:
+        return None
+    try:
+        return index.search_results(query_vector, limit, score_threshold, category, price_min, price_max)
+    except Exception as e:
+        logger.warning(f"Local vector index search failed: {e}")
+        return None
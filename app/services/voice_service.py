@@ -5,7 +5,6 @@ Converts audio files to text with high precision.
 
 import os
 import logging
-import whisper
 from pathlib import Path
 from typing import Optional, Dict, Any
 
@@ -37,6 +36,8 @@ class VoiceTranscriptionService:
     def _load_model(self) -> None:
         """Load Whisper model on initialization."""
         try:
+            import whisper  # Heavy (torch): imported on first load, not at API startup
+            
             logger.info(f"Loading Whisper model: {self.model_size}")
             self.model = whisper.load_model(self.model_size)
             logger.info(f"✓ Whisper model '{self.model_size}' loaded successfully")
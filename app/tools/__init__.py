@@ -0,0 +1,6 @@
+"""
+Operational command-line tools (exports, benchmarks, migrations).
+
+Usage:
+    python -m app.tools.<tool> --help
+"""
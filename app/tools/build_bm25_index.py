@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Build the BM25 keyword index of hybrid search (see app/services/bm25_search.py).
+
+Scrolls the products collection, tokenizes name, category and description,
+stores the inverted index as memory-mapped arrays and swaps the new build in
+atomically; running API processes pick it up within seconds. Run it after
+bulk indexing and periodically (e.g. from cron next to build_vector_index).
+
+Usage:
+    python -m app.tools.build_bm25_index [--path /app/data/bm25_index] [--batch-size 1000]
+    python -m app.tools.build_bm25_index --benchmark 200    # compare with exhaustive scoring
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+from app.config import get_settings
+from app.services.bm25_search import BM25Index, build_bm25_index
+from app.services.provisioning import serving_alias
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def sample_queries(index: BM25Index, count: int, terms_per_query: int = 3, seed: int = 0) -> List[List[str]]:
+    """Queries of random indexed terms, drawn by document frequency (like real queries)."""
+    rng = random.Random(seed)
+    terms = list(index.vocabulary)
+    frequencies = np.diff(index.offsets)[[index.vocabulary[term] for term in terms]]
+    return [rng.choices(terms, weights=frequencies, k=terms_per_query) for _ in range(count)]
+
+
+def benchmark(index: BM25Index, queries: List[List[str]], limit: int) -> Dict[str, Any]:
+    """Latency of the pruned search vs exhaustive scoring of every document, and result agreement."""
+    from rank_bm25 import BM25Okapi  # Exhaustive baseline (the previous implementation)
+
+    postings = [index.doc_ids[index.offsets[t]:index.offsets[t + 1]] for t in range(len(index.vocabulary))]
+    documents: List[List[str]] = [[] for _ in range(len(index))]
+    for term, term_id in index.vocabulary.items():
+        for doc_id in postings[term_id]:
+            documents[doc_id].append(term)  # Term frequencies don't matter for latency
+    baseline = BM25Okapi(documents)
+
+    results: Dict[str, Any] = {}
+    started = time.perf_counter()
+    pruned = [index.search(query, limit=limit)[0] for query in queries]
+    results["pruned_ms_per_query"] = round((time.perf_counter() - started) * 1000 / len(queries), 3)
+
+    started = time.perf_counter()
+    for query in queries:
+        scores = baseline.get_scores(query)
+        np.argsort(-scores)[:limit]
+    results["exhaustive_ms_per_query"] = round((time.perf_counter() - started) * 1000 / len(queries), 3)
+    results["queries"] = len(queries)
+    results["postings_per_query"] = round(float(np.mean([
+        sum(int(index.offsets[index.vocabulary[term] + 1] - index.offsets[index.vocabulary[term]])
+            for term in set(query)) for query in queries
+    ])), 1)
+    results["empty_results"] = sum(1 for docs in pruned if not len(docs))
+    return results
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Build the BM25 keyword index from the products collection")
+    parser.add_argument("--host", default=settings.qdrant_host, help="Qdrant host")
+    parser.add_argument("--port", type=int, default=settings.qdrant_port, help="Qdrant HTTP port")
+    parser.add_argument("--collection", default=serving_alias(settings.qdrant_collection_name),
+                        help="Collection or alias (default: the serving alias)")
+    parser.add_argument("--path", default=settings.bm25_index_path, help="Index directory")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Points per scroll page")
+    parser.add_argument("--benchmark", type=int, default=0, help="Also time N queries against exhaustive scoring")
+    parser.add_argument("--limit", type=int, default=10, help="Results per benchmark query")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_arguments()
+    client = QdrantClient(host=args.host, port=args.port, timeout=60.0)
+
+    started = time.perf_counter()
+    index, product_ids = build_bm25_index(client, args.collection, batch_size=args.batch_size)
+    path = index.save(args.path, product_ids, source=args.collection)
+    report: Dict[str, Any] = {
+        "path": path,
+        "products": len(index),
+        "terms": len(index.vocabulary),
+        "postings": int(len(index.doc_ids)),
+        "build_s": round(time.perf_counter() - started, 2)
+    }
+
+    if args.benchmark and len(index.vocabulary):
+        report["benchmark"] = benchmark(index, sample_queries(index, args.benchmark), args.limit)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
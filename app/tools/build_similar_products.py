@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Build and refresh the precomputed similar-products table (see app/services/similar_products.py).
+
+Full build: scroll the whole collection and run one batched search
+(query_batch_points) per page of products, storing each product's top-K
+neighbour IDs and scores in a staging table that replaces the live one
+when complete (so removed products disappear).
+
+Incremental refresh (default): only products flagged by the indexing paths
+since the last run, plus the products whose neighbourhood they affect:
+- a changed product's own list
+- the products in its previous list (it may have moved away or been deleted)
+- the products it now beats the K-th neighbour of (it moved in)
+Neighbour lists are not perfectly symmetric, so a periodic --full rebuild
+is still recommended (e.g. nightly).
+
+Usage:
+    python -m app.tools.build_similar_products --full [--k 20] [--batch-size 64]
+    python -m app.tools.build_similar_products            # incremental
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+from typing import Any, Dict, List, Sequence
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import QueryRequest
+
+from app.config import get_settings
+from app.services.point_ids import product_point_id
+from app.services.provisioning import serving_alias
+from app.services.search_params import build_search_params
+from app.services.similar_products import Neighbours, SimilarProductsStore
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def compute_neighbours(client: QdrantClient, collection: str, points: Sequence[Any], k: int) -> Dict[str, Neighbours]:
+    """
+    Top-k neighbours of stored points, with one batched search request.
+
+    Args:
+        client: Qdrant client
+        collection: Collection name
+        points: Points with vector and product_id payload
+        k: Neighbours per product
+
+    Returns:
+        product_id -> [(neighbour_product_id, score), ...] best first
+    """
+    points = [point for point in points if (point.payload or {}).get("product_id") is not None]
+    if not points:
+        return {}
+
+    params = build_search_params()
+    responses = client.query_batch_points(
+        collection_name=collection,
+        requests=[
+            QueryRequest(query=point.vector, limit=k + 1, params=params, with_payload=["product_id"])
+            for point in points
+        ]
+    )
+
+    neighbours = {}
+    for point, response in zip(points, responses):
+        product_id = str(point.payload["product_id"])
+        neighbours[product_id] = [
+            (str(hit.payload["product_id"]), float(hit.score))
+            for hit in response.points
+            if hit.id != point.id and (hit.payload or {}).get("product_id") is not None
+        ][:k]
+    return neighbours
+
+
+def build_all(client: QdrantClient, collection: str, store: SimilarProductsStore,
+              k: int = 20, batch_size: int = 64) -> Dict[str, int]:
+    """
+    Recompute the neighbours of every product.
+
+    Args:
+        client: Qdrant client
+        collection: Collection name
+        store: Similar-products store
+        k: Neighbours per product
+        batch_size: Products per scroll page / batched search
+
+    Returns:
+        Counts: products stored
+    """
+    pending = store.changed_products()  # Covered by this build
+    store.reset_staging()
+    stored = 0
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection,
+            limit=batch_size,
+            offset=offset,
+            with_payload=["product_id"],
+            with_vectors=True
+        )
+        neighbours = compute_neighbours(client, collection, points, k)
+        store.set_many(neighbours, staging=True)
+        stored += len(neighbours)
+        if offset is None:
+            break
+
+    store.publish_staging()
+    store.clear_changed(pending)
+    store.set_build_info(k, "full")
+    logger.info(f"Similar products: full build stored {stored} products (k={k})")
+    return {"products": stored}
+
+
+def _retrieve(client: QdrantClient, collection: str, product_ids: Sequence[str]) -> List[Any]:
+    """Stored points of products (missing products are left out)."""
+    if not product_ids:
+        return []
+    return client.retrieve(
+        collection_name=collection,
+        ids=[product_point_id(product_id) for product_id in product_ids],
+        with_payload=["product_id"],
+        with_vectors=True
+    )
+
+
+def refresh_changed(client: QdrantClient, collection: str, store: SimilarProductsStore,
+                    k: int = 20, batch_size: int = 64) -> Dict[str, int]:
+    """
+    Recompute only the neighbourhoods touched by products changed since the last run.
+
+    Args:
+        client: Qdrant client
+        collection: Collection name
+        store: Similar-products store
+        k: Neighbours per product
+        batch_size: Products per batched search
+
+    Returns:
+        Counts: changed products, deleted products, products recomputed
+    """
+    changed = store.changed_products()
+    if not changed:
+        return {"changed": 0, "deleted": 0, "recomputed": 0}
+
+    previous = store.get_many(changed)
+    present = _retrieve(client, collection, changed)
+    present_ids = {str(point.payload["product_id"]) for point in present if point.payload}
+    deleted = [product_id for product_id in changed if product_id not in present_ids]
+
+    # Products that listed a changed product before (it may have moved away or gone)
+    affected = set(present_ids)
+    for product_id in changed:
+        affected.update(neighbour for neighbour, _ in previous.get(product_id, []))
+
+    # Products a changed product now enters the top-k of
+    for start in range(0, len(present), batch_size):
+        fresh = compute_neighbours(client, collection, present[start:start + batch_size], k)
+        candidates = {neighbour: score for items in fresh.values() for neighbour, score in items}
+        current = store.get_many(list(candidates))
+        for neighbour, score in candidates.items():
+            listed = current.get(neighbour)
+            if listed is None or len(listed) < k or score > listed[-1][1]:
+                affected.add(neighbour)
+
+    affected.difference_update(deleted)
+    store.delete(deleted)
+
+    affected = sorted(affected)
+    recomputed = 0
+    for start in range(0, len(affected), batch_size):
+        points = _retrieve(client, collection, affected[start:start + batch_size])
+        neighbours = compute_neighbours(client, collection, points, k)
+        store.set_many(neighbours)
+        recomputed += len(neighbours)
+
+    store.clear_changed(changed)
+    store.set_build_info(k, "incremental")
+    stats = {"changed": len(changed), "deleted": len(deleted), "recomputed": recomputed}
+    logger.info(f"Similar products: incremental refresh {stats}")
+    return stats
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Build/refresh the precomputed similar-products table")
+    parser.add_argument("--host", default=settings.qdrant_host, help="Qdrant host")
+    parser.add_argument("--port", type=int, default=settings.qdrant_port, help="Qdrant HTTP port")
+    parser.add_argument("--collection", default=serving_alias(settings.qdrant_collection_name),
+                        help="Collection or alias (default: the serving alias)")
+    parser.add_argument("--k", type=int, default=settings.similar_products_k, help="Neighbours per product")
+    parser.add_argument("--batch-size", type=int, default=64, help="Products per batched search")
+    parser.add_argument("--full", action="store_true", help="Rebuild every product instead of refreshing changes")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_arguments()
+    client = QdrantClient(host=args.host, port=args.port, timeout=60.0)
+    store = SimilarProductsStore()
+
+    if args.full:
+        stats = build_all(client, args.collection, store, k=args.k, batch_size=args.batch_size)
+    else:
+        stats = refresh_changed(client, args.collection, store, k=args.k, batch_size=args.batch_size)
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Build the in-process vector index (see app/services/vector_index.py).
+
+Scrolls the products collection, stores its vectors as a memory-mapped
+float16 matrix with the product id table, and swaps the new build in
+atomically; running API processes pick it up within seconds. Run it after
+bulk indexing and periodically (e.g. every few minutes from cron) so the
+fallback tier stays fresh.
+
+Usage:
+    python -m app.tools.build_vector_index [--path /app/data/vector_index] [--batch-size 1000]
+    python -m app.tools.build_vector_index --benchmark 200    # compare with Qdrant latency
+    python -m app.tools.build_vector_index --dtype float32    # faster scans, 2x the size
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict
+
+from qdrant_client import QdrantClient
+
+from app.config import get_settings
+from app.services.provisioning import serving_alias
+from app.services.search_params import build_search_params
+from app.services.vector_index import LocalVectorIndex, build_vector_index
+from app.tools.qdrant_transport_benchmark import latency_report, random_queries
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def benchmark(index: LocalVectorIndex, client: QdrantClient, collection: str,
+              queries: int, limit: int) -> Dict[str, Any]:
+    """Sequential search latency of the local index and of Qdrant on the same queries."""
+    vectors = random_queries(queries, dimension=index.dimension)
+    results: Dict[str, Any] = {}
+
+    latencies = []
+    started = time.perf_counter()
+    for vector in vectors:
+        query_started = time.perf_counter()
+        index.search(vector, limit=limit)
+        latencies.append((time.perf_counter() - query_started) * 1000)
+    results["local"] = latency_report(latencies, time.perf_counter() - started)
+
+    params = build_search_params()
+    latencies = []
+    started = time.perf_counter()
+    for vector in vectors:
+        query_started = time.perf_counter()
+        client.query_points(collection_name=collection, query=vector, limit=limit, search_params=params, with_payload=True)
+        latencies.append((time.perf_counter() - query_started) * 1000)
+    results["qdrant"] = latency_report(latencies, time.perf_counter() - started)
+    return results
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Build the in-process vector index from the products collection")
+    parser.add_argument("--host", default=settings.qdrant_host, help="Qdrant host")
+    parser.add_argument("--port", type=int, default=settings.qdrant_port, help="Qdrant HTTP port")
+    parser.add_argument("--collection", default=serving_alias(settings.qdrant_collection_name),
+                        help="Collection or alias (default: the serving alias)")
+    parser.add_argument("--path", default=settings.vector_index_path, help="Index directory")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Points per scroll page")
+    parser.add_argument("--dtype", default="float16", choices=["float16", "float32"],
+                        help="Stored vector type (float32: 2x size, no per-query conversion)")
+    parser.add_argument("--benchmark", type=int, default=0, help="Also time N queries against the index and Qdrant")
+    parser.add_argument("--limit", type=int, default=10, help="Results per benchmark query")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_arguments()
+    client = QdrantClient(host=args.host, port=args.port, timeout=60.0)
+
+    started = time.perf_counter()
+    index = build_vector_index(client, args.collection, batch_size=args.batch_size)
+    path = index.save(args.path, source=args.collection, dtype=args.dtype)
+    report: Dict[str, Any] = {
+        "path": path,
+        "products": len(index),
+        "dimension": index.dimension,
+        "build_s": round(time.perf_counter() - started, 2)
+    }
+
+    if args.benchmark and len(index):
+        report["benchmark"] = benchmark(LocalVectorIndex.load(args.path), client, args.collection,
+                                        args.benchmark, args.limit)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
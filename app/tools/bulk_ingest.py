@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Bulk catalogue load through the ingest buffer (see app/services/ingest_buffer.py).
+
+Reads products from a JSON Lines file (product_id, name, description,
+optional metadata and embedding), embeds the ones without an embedding in
+CLIP batches, and queues them for batched upserts (INGEST_BATCH_SIZE points
+each, INGEST_STREAMS in flight, wait=False). Embedding of the next chunk
+overlaps with the upserts of the previous ones.
+
+--benchmark compares one upsert per point (the old path) with the buffer
+on random vectors in a scratch collection.
+
+Usage:
+    python -m app.tools.bulk_ingest --file catalogue.jsonl [--embed-batch 64]
+    python -m app.tools.bulk_ingest --benchmark 20000 [--single 1000]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List
+
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from app.config import get_settings
+from app.services.ingest_buffer import IngestBuffer
+from app.tools.qdrant_transport_benchmark import random_queries
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SCRATCH_COLLECTION = "ingest_benchmark"
+
+
+def read_products(path: str, chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Products of a JSON Lines file, in chunks."""
+    chunk = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                chunk.append(json.loads(line))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+async def load_file(path: str, embed_batch: int) -> Dict[str, Any]:
+    """Embed and queue every product of the file, then wait for the upserts."""
+    from app.services.async_qdrant import get_async_qdrant_service
+    from app.services.embedding_service import EmbeddingService
+
+    qdrant = get_async_qdrant_service()
+    text_service = EmbeddingService()
+    queued, skipped = 0, 0
+    started = time.perf_counter()
+
+    for chunk in read_products(path, embed_batch):
+        to_embed = [product for product in chunk if not product.get("embedding")]
+        if to_embed:
+            texts = [f"{product.get('name', '')} {product.get('description', '')}" for product in to_embed]
+            for product, embedding in zip(to_embed, await asyncio.to_thread(text_service.embed_texts, texts)):
+                product["embedding"] = embedding
+        products = [product for product in chunk if product.get("product_id") and product.get("embedding")]
+        skipped += len(chunk) - len(products)
+        queued += await qdrant.index_products(products, wait=False)
+
+    stats = await qdrant.ingest.flush()
+    elapsed = time.perf_counter() - started
+    await qdrant.close()
+    return {
+        "queued": queued,
+        "skipped": skipped,
+        "failed_points": stats["failed_points"],
+        "elapsed_s": round(elapsed, 2),
+        "products_per_s": round(queued / elapsed, 1) if elapsed else 0.0,
+        "ingest": stats
+    }
+
+
+async def benchmark(points: int, single: int, settings) -> Dict[str, Any]:
+    """Throughput of one upsert per point vs the ingest buffer, on a scratch collection."""
+    from app.services.async_qdrant import create_async_client
+
+    client = create_async_client(settings.qdrant_host, settings.qdrant_port, settings.qdrant_grpc_port,
+                                 settings.qdrant_prefer_grpc, settings.qdrant_pool_size, 60)
+    vectors = random_queries(points, dimension=settings.embedding_dim)
+    batch = [PointStruct(id=i, vector=vector, payload={"product_id": f"bench-{i}"}) for i, vector in enumerate(vectors)]
+    results: Dict[str, Any] = {}
+
+    if await client.collection_exists(SCRATCH_COLLECTION):
+        await client.delete_collection(SCRATCH_COLLECTION)
+    await client.create_collection(SCRATCH_COLLECTION,
+                                   vectors_config=VectorParams(size=len(vectors[0]), distance=Distance.COSINE))
+    try:
+        sample = batch[:single]
+        started = time.perf_counter()
+        for point in sample:
+            await client.upsert(SCRATCH_COLLECTION, points=[point])
+        elapsed = time.perf_counter() - started
+        results["single_point_upserts"] = {"points": len(sample), "points_per_s": round(len(sample) / elapsed, 1)}
+
+        buffer = IngestBuffer(
+            lambda chunk: client.upsert(SCRATCH_COLLECTION, points=chunk, wait=settings.ingest_wait),
+            name="benchmark",
+            max_batch_size=settings.ingest_batch_size,
+            max_wait_ms=settings.ingest_flush_ms,
+            streams=settings.ingest_streams,
+            max_pending=settings.ingest_max_pending
+        )
+        started = time.perf_counter()
+        await buffer.submit_many(batch, wait=False)
+        stats = await buffer.flush()
+        elapsed = time.perf_counter() - started
+        results["buffered"] = {"points": len(batch), "points_per_s": round(len(batch) / elapsed, 1),
+                               "batches": stats["batches"], "avg_upsert_ms": stats["avg_upsert_ms"],
+                               "failed_points": stats["failed_points"]}
+    finally:
+        await client.delete_collection(SCRATCH_COLLECTION)
+        await client.close()
+    return results
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Bulk catalogue load through the ingest buffer")
+    parser.add_argument("--file", help="JSON Lines file of products")
+    parser.add_argument("--embed-batch", type=int, default=64, help="Products embedded per CLIP pass")
+    parser.add_argument("--benchmark", type=int, default=0, help="Benchmark with N random points instead")
+    parser.add_argument("--single", type=int, default=1000, help="Points of the one-upsert-per-point run")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_arguments()
+    if args.benchmark:
+        report = asyncio.run(benchmark(args.benchmark, min(args.single, args.benchmark), get_settings()))
+    elif args.file:
+        report = asyncio.run(load_file(args.file, args.embed_batch))
+    else:
+        logger.error("Pass --file or --benchmark")
+        return 1
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
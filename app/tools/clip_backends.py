@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+CLIP backend tool: ONNX export, torch/ONNX parity check and latency benchmark.
+
+Usage:
+    python -m app.tools.clip_backends export [--no-quantize]
+    python -m app.tools.clip_backends parity [--quantized] [--tolerance 0.02]
+    python -m app.tools.clip_backends benchmark [--batch-sizes 1 8 32] [--iterations 20]
+
+Parity exits with status 1 when an embedding's cosine similarity with the
+torch output is below 1 - tolerance, so it can gate a deployment.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+from app.config import get_settings
+from app.services.clip_backends import (
+    OnnxClipBackend,
+    benchmark_backend,
+    check_parity,
+    export_onnx,
+    load_clip_backend,
+)
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="CLIP torch/ONNX backend tool")
+    parser.add_argument("command", choices=["export", "parity", "benchmark"])
+    parser.add_argument("--model", default=settings.model_name, help="CLIP model name")
+    parser.add_argument("--onnx-dir", default=settings.onnx_model_dir, help="Directory of the ONNX graphs")
+    parser.add_argument("--no-quantize", action="store_true", help="export: skip int8 quantization")
+    parser.add_argument("--quantized", action="store_true", help="parity/benchmark: use the int8 graphs")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="parity: allowed 1 - cosine")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32], help="benchmark batch sizes")
+    parser.add_argument("--iterations", type=int, default=20, help="benchmark iterations per batch size")
+    parser.add_argument("--threads", type=int, default=settings.onnx_num_threads, help="ONNX Runtime intra-op threads")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_arguments()
+
+    if args.command == "export":
+        written = export_onnx(args.model, args.onnx_dir, quantize=not args.no_quantize)
+        print(json.dumps(written, indent=2))
+        return 0
+
+    torch_backend, processor, _ = load_clip_backend(args.model, backend="torch")
+    onnx_backend = OnnxClipBackend(args.onnx_dir, quantized=args.quantized, num_threads=args.threads)
+
+    if args.command == "parity":
+        report = check_parity(torch_backend, onnx_backend, processor, tolerance=args.tolerance)
+        print(json.dumps(report, indent=2))
+        return 0 if report["passed"] else 1
+
+    report = {
+        "torch": benchmark_backend(torch_backend, processor, tuple(args.batch_sizes), args.iterations),
+        "onnx" + ("-int8" if args.quantized else ""): benchmark_backend(
+            onnx_backend, processor, tuple(args.batch_sizes), args.iterations
+        ),
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+One-off migration: collapse duplicate Qdrant points and move every product
+to its stable point ID (UUIDv5 of product_id, see app/services/point_ids.py).
+
+Points indexed with the old hash()-based IDs got a different ID in every
+process, so re-indexed products exist several times. For each product_id:
+- the survivor is the point already at the stable ID if there is one,
+  otherwise the duplicate with the richest payload (most fields)
+- the survivor is copied to the stable ID (vector + payload) if needed
+- every other point of that product is deleted
+
+Usage:
+    python -m app.tools.dedupe_points --dry-run
+    python -m app.tools.dedupe_points [--collection products] [--batch-size 256]
+
+Points without a product_id payload are left untouched.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointIdsList, PointStruct
+
+from app.config import get_settings
+from app.services.point_ids import product_point_id
+from app.services.provisioning import serving_alias
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def collect_point_ids(client: QdrantClient, collection: str, batch_size: int = 256) -> Dict[str, List[Any]]:
+    """Scroll the whole collection and group point IDs by product_id (payload field only)."""
+    groups: Dict[str, List[Any]] = defaultdict(list)
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection,
+            limit=batch_size,
+            offset=offset,
+            with_payload=["product_id"],
+            with_vectors=False
+        )
+        for point in points:
+            product_id = (point.payload or {}).get("product_id")
+            if product_id is not None:
+                groups[str(product_id)].append(point.id)
+        if offset is None:
+            return groups
+
+
+def dedupe_collection(client: QdrantClient, collection: str,
+                      batch_size: int = 256, dry_run: bool = False) -> Dict[str, int]:
+    """
+    Collapse duplicates and migrate products to their stable point IDs.
+
+    Args:
+        client: Qdrant client
+        collection: Collection name
+        batch_size: Scroll page size and points per upsert/delete request
+        dry_run: Only count what would change
+
+    Returns:
+        Counts: points scanned, products, points moved to stable IDs,
+        points deleted, duplicates removed
+    """
+    groups = collect_point_ids(client, collection, batch_size)
+    stats = {
+        "points_scanned": sum(len(ids) for ids in groups.values()),
+        "products": len(groups),
+        "points_moved": 0,
+        "points_deleted": 0,
+        "duplicates_removed": 0
+    }
+
+    pending_upserts: List[PointStruct] = []
+    pending_deletes: List[Any] = []
+
+    def flush() -> None:
+        if dry_run:
+            pending_upserts.clear()
+            pending_deletes.clear()
+            return
+        # Upsert survivors before deleting anything: an interrupted run loses no product
+        if pending_upserts:
+            client.upsert(collection_name=collection, points=list(pending_upserts), wait=True)
+            pending_upserts.clear()
+        if pending_deletes:
+            client.delete(
+                collection_name=collection,
+                points_selector=PointIdsList(points=list(pending_deletes)),
+                wait=True
+            )
+            pending_deletes.clear()
+
+    for product_id, ids in groups.items():
+        stable_id = product_point_id(product_id)
+        ids_str = [str(point_id) for point_id in ids]
+        if ids_str == [stable_id]:
+            continue  # Already migrated, no duplicates
+
+        if stable_id in ids_str:
+            stale = [point_id for point_id in ids if str(point_id) != stable_id]
+        else:
+            candidates = client.retrieve(collection_name=collection, ids=ids, with_payload=True, with_vectors=True)
+            survivor = max(candidates, key=lambda point: len(point.payload or {}))
+            pending_upserts.append(PointStruct(id=stable_id, vector=survivor.vector, payload=survivor.payload))
+            stats["points_moved"] += 1
+            stale = ids
+
+        pending_deletes.extend(stale)
+        stats["points_deleted"] += len(stale)
+        stats["duplicates_removed"] += len(ids) - 1
+
+        if len(pending_upserts) >= batch_size or len(pending_deletes) >= batch_size:
+            flush()
+
+    flush()
+    return stats
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Collapse duplicate Qdrant points onto stable IDs")
+    parser.add_argument("--host", default=settings.qdrant_host, help="Qdrant host")
+    parser.add_argument("--port", type=int, default=settings.qdrant_port, help="Qdrant HTTP port")
+    parser.add_argument("--collection", default=serving_alias(settings.qdrant_collection_name),
+                        help="Collection or alias (default: the serving alias)")
+    parser.add_argument("--batch-size", type=int, default=256, help="Scroll page / write batch size")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_arguments()
+    client = QdrantClient(host=args.host, port=args.port, timeout=60.0)
+
+    logger.info(f"Deduplicating '{args.collection}' on {args.host}:{args.port}{' (dry run)' if args.dry_run else ''}")
+    stats = dedupe_collection(client, args.collection, batch_size=args.batch_size, dry_run=args.dry_run)
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Re-embed the products collection into a new version without downtime
+(see app/services/collection_migration.py).
+
+The API serves the collection through its serving alias (<collection>_live);
+searches keep using the live version until the flip. Run the migration
+with the new model settings (MODEL_NAME / CLIP_BACKEND), then deploy the API
+with the same settings and flip: queries and stored vectors must come from
+the same model. Rebuild the similar-products table (build_similar_products
+--full) after the flip.
+
+Products indexed from an image are re-embedded from their image_url; a
+product whose image cannot be fetched is counted as failed and left out
+of the new version. Other products are re-embedded from their text.
+
+Usage:
+    python -m app.tools.migrate_collection start --rate 50      # shadow + copy (resumable)
+    python -m app.tools.migrate_collection resume --rate 50     # after an interruption
+    python -m app.tools.migrate_collection status
+    python -m app.tools.migrate_collection verify               # catch-up, counts, recall
+    python -m app.tools.migrate_collection flip                 # final catch-up + atomic alias switch
+    python -m app.tools.migrate_collection rollback             # alias back to the previous version
+    python -m app.tools.migrate_collection cleanup --keep 2     # drop old versions
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional
+
+from qdrant_client import QdrantClient
+
+from app.config import get_settings
+from app.services.collection_migration import (
+    MigrationError,
+    MigrationStore,
+    alias_target,
+    catch_up,
+    collection_versions,
+    flip_migration,
+    rollback_migration,
+    run_copy,
+    start_migration,
+    verify_migration,
+    versioned_name,
+)
+from app.services.provisioning import load_collection_spec, serving_alias
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class ProductReembedder:
+    """Re-embeds product payloads with the current model settings (batched CLIP passes)."""
+
+    def __init__(self):
+        from app.services.embedding_service import EmbeddingService
+        from app.services.image_embedding import get_image_embedding_service
+        self._text = EmbeddingService()
+        self._images = get_image_embedding_service()
+
+    def _load_image(self, payload: Dict[str, Any]):
+        try:
+            return self._text.get_image_from_url(payload["image_url"])
+        except Exception:
+            return None
+
+    def __call__(self, payloads: List[Dict[str, Any]]) -> List[Optional[List[float]]]:
+        vectors: List[Optional[List[float]]] = [None] * len(payloads)
+
+        image_rows, images = [], []
+        text_rows, texts = [], []
+        for row, payload in enumerate(payloads):
+            if payload.get("has_image"):
+                image = self._load_image(payload) if payload.get("image_url") else None
+                if image is not None:
+                    image_rows.append(row)
+                    images.append(image)
+            else:
+                text_rows.append(row)
+                texts.append(payload.get("full_text") or f"{payload.get('name', '')} {payload.get('description', '')}")
+
+        if images:
+            for row, vector in zip(image_rows, self._images.embed_images(images).tolist()):
+                vectors[row] = vector
+        if texts:
+            for row, vector in zip(text_rows, self._text.embed_texts(texts)):
+                vectors[row] = vector
+        return vectors
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Re-embed the products collection behind an alias")
+    parser.add_argument("command", choices=["start", "resume", "status", "verify", "flip", "rollback", "cleanup"])
+    parser.add_argument("--host", default=settings.qdrant_host, help="Qdrant host")
+    parser.add_argument("--port", type=int, default=settings.qdrant_port, help="Qdrant HTTP port")
+    parser.add_argument("--collection", default=settings.qdrant_collection_name,
+                        help="Collection name (the API uses its serving alias)")
+    parser.add_argument("--batch-size", type=int, default=64, help="Products re-embedded per batch")
+    parser.add_argument("--rate", type=float, default=0.0, help="Max products per second (0 = unthrottled)")
+    parser.add_argument("--sample", type=int, default=50, help="Products sampled by verify")
+    parser.add_argument("--min-recall", type=float, default=0.9, help="Recall@10 floor of verify")
+    parser.add_argument("--max-missing", type=int, default=None,
+                        help="Products allowed to be missing from the new version (default: the failed count)")
+    parser.add_argument("--force", action="store_true", help="Flip without a successful verify")
+    parser.add_argument("--keep", type=int, default=2, help="Versions kept by cleanup (the live one included)")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_arguments()
+    client = QdrantClient(host=args.host, port=args.port, timeout=60.0)
+    store = MigrationStore()
+    alias = serving_alias(args.collection)
+    state = store.load(alias)
+
+    try:
+        if args.command == "start":
+            state = start_migration(client, store, load_collection_spec(args.collection), get_settings().model_name)
+        if args.command in ("start", "resume"):
+            if state is None or state.status not in ("created", "copying"):
+                raise MigrationError(f"No copy to run for '{alias}'")
+            run_copy(client, store, state, ProductReembedder(), args.batch_size, args.rate)
+        elif args.command == "verify":
+            if state is None or state.status not in ("copied", "verified"):
+                raise MigrationError(f"No copied migration to verify for '{alias}'")
+            changes = catch_up(client, store, state, ProductReembedder(), args.batch_size)
+            max_missing = state.failed if args.max_missing is None else args.max_missing
+            report = verify_migration(client, store, state, args.sample, 10, args.min_recall, max_missing)
+            print(json.dumps({"catch_up": changes, **report}, indent=2))
+            return 0 if report["ok"] else 1
+        elif args.command == "flip":
+            if state is None:
+                raise MigrationError(f"No migration of '{alias}'")
+            flip_migration(client, store, state, ProductReembedder(), args.batch_size, args.force)
+        elif args.command == "rollback":
+            if state is None:
+                raise MigrationError(f"No migration of '{alias}'")
+            rollback_migration(client, state)
+        elif args.command == "cleanup":
+            live = alias_target(client, alias)
+            kept = {live} | ({state.target} if state is not None else set())
+            versions = [versioned_name(alias, version) for version in collection_versions(client, alias)]
+            for name in versions[:-max(1, args.keep)]:
+                if name not in kept:
+                    logger.info(f"Dropping old version {name}")
+                    client.delete_collection(name)
+    except MigrationError as e:
+        logger.error(str(e))
+        return 1
+
+    state = store.load(alias)
+    print(json.dumps({
+        "alias": alias,
+        "live": alias_target(client, alias),
+        "versions": collection_versions(client, alias),
+        "migration": asdict(state) if state is not None else None
+    }, indent=2, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
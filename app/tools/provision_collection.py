@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Provision a collection from its declarative spec (qdrant_config.yaml).
+
+Creates the collection if it is missing, adds missing payload indexes,
+reports drift between the spec and the live collection and, unless
+--check, applies the drift Qdrant can change in place (on-disk flags,
+HNSW, optimizers, quantization). Size/distance drift needs a migration
+to a new collection and is only reported. The collection is the one behind
+the serving alias (<collection>_live), which is created on first run.
+
+Usage:
+    python -m app.tools.provision_collection --check     # exit code 1 on drift
+    python -m app.tools.provision_collection [--collection products] [--spec qdrant_config.yaml]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+from qdrant_client import QdrantClient
+
+from app.config import get_settings
+from app.services.provisioning import (
+    alias_target,
+    detect_drift,
+    load_collection_spec,
+    provision_serving_collection,
+    serving_alias,
+)
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Create/reconcile a Qdrant collection from its spec")
+    parser.add_argument("--host", default=settings.qdrant_host, help="Qdrant host")
+    parser.add_argument("--port", type=int, default=settings.qdrant_port, help="Qdrant HTTP port")
+    parser.add_argument("--collection", default=settings.qdrant_collection_name, help="Collection name")
+    parser.add_argument("--spec", default=settings.qdrant_collection_spec, help="Collection spec file")
+    parser.add_argument("--check", action="store_true", help="Only report drift (no create/update)")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_arguments()
+    client = QdrantClient(host=args.host, port=args.port, timeout=60.0)
+    spec = load_collection_spec(args.collection, args.spec)
+
+    if args.check:
+        collection = alias_target(client, serving_alias(spec.name))
+        if collection is None:
+            print(json.dumps({"collection": spec.name, "exists": False}, indent=2))
+            return 1
+        drift = detect_drift(client.get_collection(collection), spec)
+        print(json.dumps({"collection": collection, "drift": [vars(item) for item in drift]}, indent=2, default=str))
+        return 1 if drift else 0
+
+    report = provision_serving_collection(client, spec, update=True)
+    print(json.dumps(report, indent=2, default=str))
+    unfixable = [item for item in report["drift"] if not item["fixable"]]
+    if unfixable:
+        logger.warning(f"{len(unfixable)} setting(s) need a migration to a new collection")
+    return 1 if unfixable else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
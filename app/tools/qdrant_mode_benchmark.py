@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Qdrant mode benchmark: embedded (local mode) vs remote server search latency.
+
+Loads the same random 512-d vectors into a scratch collection in each mode
+(memory, embedded on a temporary directory, remote server over HTTP) and
+runs the same queries one at a time, reporting p50/p95/p99 latency and
+throughput. Local mode scans vectors instead of walking an HNSW graph, so
+run it with the catalogue size you expect to choose QDRANT_MODE.
+
+Usage:
+    python -m app.tools.qdrant_mode_benchmark [--points 5000] [--queries 300]
+    python -m app.tools.qdrant_mode_benchmark --modes memory embedded --points 50000
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from app.config import get_settings
+from app.tools.qdrant_transport_benchmark import latency_report, random_queries
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SCRATCH_COLLECTION = "mode_benchmark"
+
+
+def load_points(client: QdrantClient, collection: str, vectors: List[List[float]], batch_size: int = 500) -> float:
+    """
+    (Re)create the scratch collection and upsert the vectors.
+
+    Args:
+        client: Qdrant client of the mode under test
+        collection: Scratch collection name
+        vectors: Vectors to store
+        batch_size: Points per upsert
+
+    Returns:
+        Load time in seconds
+    """
+    if client.collection_exists(collection):
+        client.delete_collection(collection)
+    client.create_collection(
+        collection_name=collection,
+        vectors_config=VectorParams(size=len(vectors[0]), distance=Distance.COSINE)
+    )
+
+    started = time.perf_counter()
+    for start in range(0, len(vectors), batch_size):
+        client.upsert(
+            collection_name=collection,
+            points=[
+                PointStruct(id=start + offset, vector=vector, payload={"product_id": str(start + offset), "price": float(offset)})
+                for offset, vector in enumerate(vectors[start:start + batch_size])
+            ],
+            wait=True
+        )
+    return time.perf_counter() - started
+
+
+def bench_mode(client: QdrantClient, collection: str, queries: List[List[float]], limit: int) -> Dict[str, Any]:
+    """Sequential searches (one request at a time, as a single-node API worker does)."""
+    for vector in queries[:10]:  # Warm-up
+        client.query_points(collection_name=collection, query=vector, limit=limit, with_payload=True)
+
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for vector in queries:
+        query_started = time.perf_counter()
+        client.query_points(collection_name=collection, query=vector, limit=limit, with_payload=True)
+        latencies.append((time.perf_counter() - query_started) * 1000)
+    return latency_report(latencies, time.perf_counter() - started)
+
+
+def run_benchmark(args) -> Dict[str, Any]:
+    vectors = random_queries(args.points, seed=1)
+    queries = random_queries(args.queries, seed=2)
+    results: Dict[str, Any] = {"points": args.points, "limit": args.limit}
+
+    for mode in args.modes:
+        logger.info(f"Benchmarking {mode}...")
+        with tempfile.TemporaryDirectory() as path:
+            if mode == "memory":
+                client = QdrantClient(location=":memory:")
+            elif mode == "embedded":
+                client = QdrantClient(path=path)
+            else:
+                client = QdrantClient(host=args.host, port=args.port, prefer_grpc=False, https=False, timeout=60.0)
+
+            try:
+                load_s = load_points(client, SCRATCH_COLLECTION, vectors)
+                results[mode] = bench_mode(client, SCRATCH_COLLECTION, queries, args.limit)
+                results[mode]["load_s"] = round(load_s, 2)
+                client.delete_collection(SCRATCH_COLLECTION)
+            except Exception as e:
+                logger.error(f"{mode} benchmark failed: {e}")
+                results[mode] = {"error": str(e)}
+            finally:
+                client.close()
+
+    return results
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Compare embedded (local mode) and remote Qdrant search latency")
+    parser.add_argument("--host", default=settings.qdrant_host, help="Qdrant host (remote mode)")
+    parser.add_argument("--port", type=int, default=settings.qdrant_port, help="Qdrant HTTP port (remote mode)")
+    parser.add_argument("--modes", nargs="+", default=["memory", "embedded", "remote"],
+                        choices=["memory", "embedded", "remote"], help="Modes to compare")
+    parser.add_argument("--points", type=int, default=5000, help="Vectors in the scratch collection")
+    parser.add_argument("--queries", type=int, default=300, help="Queries per mode")
+    parser.add_argument("--limit", type=int, default=50, help="Results per query")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_arguments()
+    print(json.dumps(run_benchmark(args), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
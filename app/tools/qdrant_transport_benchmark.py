@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Qdrant transport benchmark: search latency over sync HTTP, async HTTP and async gRPC.
+
+Runs the same random 512-d queries against the products collection with each
+transport at a given concurrency and reports p50/p95/p99 latency and
+throughput, so QDRANT_PREFER_GRPC / QDRANT_POOL_SIZE can be chosen on real
+hardware.
+
+Usage:
+    python -m app.tools.qdrant_transport_benchmark [--queries 500] [--concurrency 16]
+    python -m app.tools.qdrant_transport_benchmark --transports grpc http --pool-size 8
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+from app.config import get_settings
+from app.services.async_qdrant import create_async_client
+from app.services.provisioning import serving_alias
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def random_queries(count: int, dimension: int = 512, seed: int = 0) -> List[List[float]]:
+    """L2-normalized random query vectors (same set for every transport)."""
+    vectors = np.random.default_rng(seed).standard_normal((count, dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.tolist()
+
+
+def latency_report(latencies_ms: List[float], wall_s: float) -> Dict[str, Any]:
+    """Percentiles and throughput of one run."""
+    values = np.asarray(latencies_ms)
+    return {
+        "queries": len(values),
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+        "mean_ms": round(float(values.mean()), 2),
+        "qps": round(len(values) / wall_s, 1)
+    }
+
+
+async def bench_async(client, collection: str, queries: List[List[float]],
+                      concurrency: int, limit: int) -> Dict[str, Any]:
+    """Search with an AsyncQdrantClient, concurrency requests in flight."""
+    slots = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(vector):
+        async with slots:
+            started = time.perf_counter()
+            await client.query_points(collection_name=collection, query=vector, limit=limit, with_payload=True)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    # Warm the channel/connections up before measuring
+    await asyncio.gather(*(one(vector) for vector in queries[:concurrency]))
+    latencies.clear()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(vector) for vector in queries))
+    return latency_report(latencies, time.perf_counter() - started)
+
+
+async def bench_sync_http(client: QdrantClient, collection: str, queries: List[List[float]],
+                          concurrency: int, limit: int) -> Dict[str, Any]:
+    """Baseline: the synchronous client offloaded to threads (previous request path)."""
+    def one(vector) -> float:
+        started = time.perf_counter()
+        client.query_points(collection_name=collection, query=vector, limit=limit, with_payload=True)
+        return (time.perf_counter() - started) * 1000
+
+    slots = asyncio.Semaphore(concurrency)
+
+    async def run(vector) -> float:
+        async with slots:
+            return await asyncio.to_thread(one, vector)
+
+    await asyncio.gather(*(run(vector) for vector in queries[:concurrency]))
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(run(vector) for vector in queries))
+    return latency_report(list(latencies), time.perf_counter() - started)
+
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    queries = random_queries(args.queries)
+    results: Dict[str, Any] = {
+        "collection": args.collection,
+        "concurrency": args.concurrency,
+        "pool_size": args.pool_size,
+        "limit": args.limit
+    }
+
+    for transport in args.transports:
+        logger.info(f"Benchmarking {transport}...")
+        if transport == "sync-http":
+            client = QdrantClient(host=args.host, port=args.port, prefer_grpc=False, https=False, timeout=args.timeout)
+            try:
+                results[transport] = await bench_sync_http(client, args.collection, queries, args.concurrency, args.limit)
+            finally:
+                client.close()
+            continue
+
+        client = create_async_client(
+            args.host, args.port, args.grpc_port,
+            prefer_grpc=(transport == "grpc"),
+            pool_size=args.pool_size,
+            timeout=args.timeout
+        )
+        try:
+            results[transport] = await bench_async(client, args.collection, queries, args.concurrency, args.limit)
+        finally:
+            await client.close()
+
+    return results
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Compare Qdrant search latency across transports")
+    parser.add_argument("--host", default=settings.qdrant_host, help="Qdrant host")
+    parser.add_argument("--port", type=int, default=settings.qdrant_port, help="Qdrant HTTP port")
+    parser.add_argument("--grpc-port", type=int, default=settings.qdrant_grpc_port, help="Qdrant gRPC port")
+    parser.add_argument("--collection", default=serving_alias(settings.qdrant_collection_name),
+                        help="Collection or alias (default: the serving alias)")
+    parser.add_argument("--transports", nargs="+", default=["sync-http", "http", "grpc"],
+                        choices=["sync-http", "http", "grpc"], help="Transports to compare")
+    parser.add_argument("--queries", type=int, default=500, help="Queries per transport")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight")
+    parser.add_argument("--pool-size", type=int, default=settings.qdrant_pool_size, help="gRPC channels / HTTP connections")
+    parser.add_argument("--limit", type=int, default=50, help="Results per query")
+    parser.add_argument("--timeout", type=int, default=settings.qdrant_timeout, help="Request timeout (s)")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_arguments()
+    results = asyncio.run(run_benchmark(args))
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
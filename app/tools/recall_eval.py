@@ -0,0 +1,55 @@
+"""
+Recall evaluation helpers shared by the search tuning tools.
+
+Stored vectors are used as queries; an exact (brute force, unquantized)
+search gives the true neighbours, and any other search params are scored
+by recall@k against it.
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import SearchParams
+
+from app.services.search_params import build_search_params
+
+EXACT_SEARCH = build_search_params(exact=True)
+
+
+def sample_queries(client: QdrantClient, collection: str, count: int) -> List[Any]:
+    """Stored points used as queries (id + vector)."""
+    points, _ = client.scroll(collection_name=collection, limit=count, with_payload=False, with_vectors=True)
+    return points
+
+
+def neighbours(client: QdrantClient, collection: str, point, k: int,
+               params: Optional[SearchParams]) -> List[Any]:
+    """Top-k neighbours of a stored point, excluding the point itself."""
+    response = client.query_points(collection_name=collection, query=point.vector, limit=k + 1,
+                                   search_params=params, with_payload=False)
+    return [hit.id for hit in response.points if hit.id != point.id][:k]
+
+
+def exact_neighbours(client: QdrantClient, collection: str, queries: Sequence[Any], k: int) -> Dict[Any, List[Any]]:
+    """Ground truth: exact top-k of every query."""
+    return {point.id: neighbours(client, collection, point, k, EXACT_SEARCH) for point in queries}
+
+
+def measure(client: QdrantClient, collection: str, queries: Sequence[Any],
+            truth: Dict[Any, List[Any]], k: int, params: Optional[SearchParams]) -> Dict[str, float]:
+    """Recall@k against the exact neighbours, and latency percentiles."""
+    recalls, latencies = [], []
+    for point in queries:
+        started = time.perf_counter()
+        found = neighbours(client, collection, point, k, params)
+        latencies.append((time.perf_counter() - started) * 1000)
+        expected = truth[point.id]
+        if expected:
+            recalls.append(len(set(found) & set(expected)) / len(expected))
+    return {
+        f"recall@{k}": round(float(np.mean(recalls)) if recalls else 1.0, 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2)
+    }
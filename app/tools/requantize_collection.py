@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Re-quantize the products collection online, and report recall/latency per mode.
+
+Changing QDRANT_QUANTIZATION only affects newly created collections; this
+tool switches an existing collection between none / scalar / binary without
+re-indexing. Qdrant rebuilds the quantized vectors in the background and
+keeps serving searches meanwhile.
+
+The report samples stored vectors as queries, takes an exact float32 search
+as ground truth and, for each mode, measures recall@k and latency of the
+quantized search with and without rescoring. Run it against a staging copy:
+the collection is re-quantized for every mode, then left in --mode (default:
+QDRANT_QUANTIZATION).
+
+Usage:
+    python -m app.tools.requantize_collection --mode scalar
+    python -m app.tools.requantize_collection --report none scalar binary [--queries 200] [--k 10]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+from typing import Any, Dict, Sequence
+
+from qdrant_client import QdrantClient
+
+from app.config import get_settings
+from app.services.provisioning import resolve_collection, serving_alias
+from app.services.quantization import (
+    QUANTIZATION_MODES,
+    apply_quantization,
+    quantization_search_params,
+)
+from app.tools.recall_eval import EXACT_SEARCH, exact_neighbours, measure, sample_queries
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def quantization_report(client: QdrantClient, collection: str, modes: Sequence[str],
+                        num_queries: int = 200, k: int = 10) -> Dict[str, Any]:
+    """
+    Recall/latency of each quantization mode on the collection.
+
+    Args:
+        client: Qdrant client
+        collection: Collection name (re-quantized once per mode)
+        modes: Modes to measure
+        num_queries: Stored vectors used as queries
+        k: Neighbours compared per query
+
+    Returns:
+        Per mode: exact-search baseline, quantized without rescoring and
+        quantized with oversampling + rescoring
+    """
+    queries = sample_queries(client, collection, num_queries)
+    truth = exact_neighbours(client, collection, queries, k)
+
+    report: Dict[str, Any] = {"collection": collection, "queries": len(queries), "k": k}
+    report["exact"] = measure(client, collection, queries, truth, k, EXACT_SEARCH)
+
+    for mode in modes:
+        apply_quantization(client, collection, mode)
+        if mode == "none":
+            report[mode] = {"hnsw": measure(client, collection, queries, truth, k, None)}
+            continue
+        rescored = quantization_search_params(mode, rescore=True)
+        report[mode] = {
+            "no_rescore": measure(client, collection, queries, truth, k,
+                                  quantization_search_params(mode, oversampling=1.0, rescore=False)),
+            "rescore": {
+                "oversampling": rescored.quantization.oversampling,
+                **measure(client, collection, queries, truth, k, rescored)
+            }
+        }
+        logger.info(f"{mode}: {report[mode]}")
+
+    return report
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Re-quantize a Qdrant collection online")
+    parser.add_argument("--host", default=settings.qdrant_host, help="Qdrant host")
+    parser.add_argument("--port", type=int, default=settings.qdrant_port, help="Qdrant HTTP port")
+    parser.add_argument("--collection", default=serving_alias(settings.qdrant_collection_name),
+                        help="Collection or alias (default: the serving alias)")
+    parser.add_argument("--mode", choices=QUANTIZATION_MODES, default=settings.qdrant_quantization,
+                        help="Quantization to apply (and to leave after --report)")
+    parser.add_argument("--report", nargs="+", choices=QUANTIZATION_MODES, metavar="MODE",
+                        help="Measure recall/latency of these modes first")
+    parser.add_argument("--queries", type=int, default=200, help="Report: sampled queries")
+    parser.add_argument("--k", type=int, default=10, help="Report: neighbours per query")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_arguments()
+    client = QdrantClient(host=args.host, port=args.port, timeout=60.0)
+    collection = resolve_collection(client, args.collection)  # Collection settings are changed on the target
+
+    if args.report:
+        report = quantization_report(client, collection, args.report, args.queries, args.k)
+        print(json.dumps(report, indent=2))
+
+    apply_quantization(client, collection, args.mode)
+    logger.info(f"'{collection}' is now quantized with mode={args.mode}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+HNSW ef tuner: find the smallest ef that reaches a target recall@k.
+
+Samples stored vectors as queries, takes an exact search as ground truth
+and sweeps ef upwards (with the configured quantization rescoring) until
+recall@k reaches the target. The result is written to the env file as
+HNSW_EF (balanced tier); --fast-target / --precise-target tune the other
+tiers (HNSW_EF_FAST / HNSW_EF_PRECISE) the same way.
+
+Usage:
+    python -m app.tools.tune_hnsw_ef [--target 0.95] [--k 10] [--queries 200]
+    python -m app.tools.tune_hnsw_ef --fast-target 0.85 --precise-target 0.99 --env-file .env
+    python -m app.tools.tune_hnsw_ef --dry-run
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+from typing import Any, Dict, List, Optional, Sequence
+
+from qdrant_client import QdrantClient
+
+from app.config import get_settings
+from app.services.provisioning import serving_alias
+from app.services.search_params import build_search_params
+from app.tools.recall_eval import exact_neighbours, measure, sample_queries
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+EF_CANDIDATES = [16, 24, 32, 48, 64, 96, 128, 192, 256, 384, 512]
+
+
+def sweep_ef(client: QdrantClient, collection: str, queries: Sequence[Any], truth: Dict[Any, List[Any]],
+             k: int, candidates: Sequence[int] = EF_CANDIDATES, stop_at: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Recall/latency for increasing ef values.
+
+    Args:
+        client: Qdrant client
+        collection: Collection name
+        queries: Stored points used as queries
+        truth: Exact neighbours of each query
+        k: Neighbours compared per query
+        candidates: ef values, ascending
+        stop_at: Stop once recall@k reaches this value
+
+    Returns:
+        One row per measured ef
+    """
+    rows = []
+    for ef in candidates:
+        row = {"ef": ef, **measure(client, collection, queries, truth, k, build_search_params(hnsw_ef=ef))}
+        logger.info(f"ef={ef}: {row}")
+        rows.append(row)
+        if stop_at is not None and row[f"recall@{k}"] >= stop_at:
+            break
+    return rows
+
+
+def smallest_ef(rows: Sequence[Dict[str, Any]], k: int, target: float) -> Optional[int]:
+    """Smallest measured ef reaching the target recall (None if none does)."""
+    for row in rows:
+        if row[f"recall@{k}"] >= target:
+            return row["ef"]
+    return None
+
+
+def write_env_values(path: str, values: Dict[str, Any]) -> None:
+    """Set KEY=value lines in an env file (replaced in place, appended if missing)."""
+    lines = []
+    if os.path.exists(path):
+        with open(path) as f:
+            lines = f.read().splitlines()
+
+    for key, value in values.items():
+        pattern = re.compile(rf"^\s*{re.escape(key)}\s*=")
+        for i, line in enumerate(lines):
+            if pattern.match(line):
+                lines[i] = f"{key}={value}"
+                break
+        else:
+            lines.append(f"{key}={value}")
+
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Tune HNSW ef for a target recall@k")
+    parser.add_argument("--host", default=settings.qdrant_host, help="Qdrant host")
+    parser.add_argument("--port", type=int, default=settings.qdrant_port, help="Qdrant HTTP port")
+    parser.add_argument("--collection", default=serving_alias(settings.qdrant_collection_name),
+                        help="Collection or alias (default: the serving alias)")
+    parser.add_argument("--target", type=float, default=0.95, help="Target recall@k of the balanced tier")
+    parser.add_argument("--fast-target", type=float, help="Also tune the fast tier for this recall")
+    parser.add_argument("--precise-target", type=float, help="Also tune the precise tier for this recall")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per query")
+    parser.add_argument("--queries", type=int, default=200, help="Sampled queries")
+    parser.add_argument("--env-file", default=".env", help="Env file to update")
+    parser.add_argument("--dry-run", action="store_true", help="Print the result without writing it")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_arguments()
+    client = QdrantClient(host=args.host, port=args.port, timeout=60.0)
+
+    queries = sample_queries(client, args.collection, args.queries)
+    if not queries:
+        logger.error(f"Collection '{args.collection}' is empty, nothing to tune on")
+        return 1
+    truth = exact_neighbours(client, args.collection, queries, args.k)
+
+    targets = {"HNSW_EF": args.target, "HNSW_EF_FAST": args.fast_target, "HNSW_EF_PRECISE": args.precise_target}
+    targets = {key: target for key, target in targets.items() if target is not None}
+    rows = sweep_ef(client, args.collection, queries, truth, args.k, stop_at=max(targets.values()))
+
+    values = {}
+    for key, target in targets.items():
+        ef = smallest_ef(rows, args.k, target)
+        if ef is None:
+            logger.warning(f"{key}: no ef up to {EF_CANDIDATES[-1]} reaches recall@{args.k}={target}")
+            continue
+        values[key] = ef
+
+    print(json.dumps({"k": args.k, "targets": targets, "sweep": rows, "selected": values}, indent=2))
+
+    if values and not args.dry_run:
+        write_env_values(args.env_file, values)
+        logger.info(f"Wrote {values} to {args.env_file} (restart the API to apply)")
+    return 0 if len(values) == len(targets) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
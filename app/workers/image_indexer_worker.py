@@ -25,7 +25,7 @@ import os
 import sys
 import argparse
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 try:
     import redis
@@ -52,7 +52,8 @@ class AsyncImageIndexerWorker:
         worker_id: str,
         poll_interval: float = 1.0,
         batch_size: int = 1,
-        task_timeout: int = 300
+        task_timeout: int = 300,
+        model_idle_unload: float = 0
     ):
         """
         Initialize the async worker.
@@ -63,6 +64,7 @@ class AsyncImageIndexerWorker:
             poll_interval: Seconds between queue polls
             batch_size: Number of tasks to process per batch
             task_timeout: Task execution timeout in seconds
+            model_idle_unload: Unload CLIP after this many idle seconds (0 = keep loaded)
         """
         if aioredis is None:
             raise ImportError("redis is required. Install with: pip install redis")
@@ -72,6 +74,7 @@ class AsyncImageIndexerWorker:
         self.poll_interval = poll_interval
         self.batch_size = batch_size
         self.task_timeout = task_timeout
+        self.model_idle_unload = model_idle_unload
         self.redis: Optional[aioredis.Redis] = None
         self.running = False
         self.tasks_processed = 0
@@ -105,7 +108,8 @@ class AsyncImageIndexerWorker:
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=2, max=10)
     )
-    async def _process_image_task(self, task: Dict[str, Any]) -> bool:
+    async def _process_image_task(self, task: Dict[str, Any],
+                                  embedding: Optional[List[float]] = None) -> bool:
         """
         Process an image indexing task with CLIP embedding and Qdrant indexing.
         
@@ -116,6 +120,7 @@ class AsyncImageIndexerWorker:
                 - name: Product name
                 - description: Product description
                 - metadata: Product metadata
+            embedding: Precomputed CLIP embedding (from a batched forward pass)
             
         Returns:
             True if successful, False otherwise
@@ -132,20 +137,21 @@ class AsyncImageIndexerWorker:
                 logger.error(f"Task {task_id}: Missing image_path")
                 return False
             
-            # Load image from disk
-            try:
-                with open(image_path, 'rb') as f:
-                    image_data = f.read()
-            except Exception as e:
-                logger.error(f"Task {task_id}: Failed to read image: {e}")
-                return False
-            
-            # Step 1: Generate CLIP image embedding
+            # Step 1: Generate CLIP image embedding (unless computed with the batch)
             logger.debug(f"Task {task_id}: Generating CLIP embedding")
             try:
-                from app.services.image_embedding import get_image_embedding_service
-                image_service = get_image_embedding_service()
-                embedding = image_service.embed_image(image_data)
+                if embedding is None:
+                    # Load image from disk
+                    try:
+                        with open(image_path, 'rb') as f:
+                            image_data = f.read()
+                    except Exception as e:
+                        logger.error(f"Task {task_id}: Failed to read image: {e}")
+                        return False
+                    
+                    from app.services.image_embedding import get_image_embedding_service
+                    image_service = get_image_embedding_service()
+                    embedding = image_service.embed_image(image_data)
                 
                 if not embedding or len(embedding) == 0:
                     logger.error(f"Task {task_id}: Failed to generate embedding")
@@ -157,22 +163,23 @@ class AsyncImageIndexerWorker:
                 logger.error(f"Task {task_id}: Embedding error: {e}")
                 return False
             
-            # Step 2: Index in Qdrant
+            # Step 2: Queue for Qdrant (the batch's tasks share one upsert, sent by process_batch)
             logger.debug(f"Task {task_id}: Indexing in Qdrant")
             try:
-                from app.services.integrated_qdrant import get_qdrant_service
-                qdrant = get_qdrant_service()
+                from app.services.async_qdrant import get_async_qdrant_service
+                qdrant = get_async_qdrant_service()
                 
                 metadata = task.get("metadata", {})
                 metadata["has_image"] = True
                 metadata["indexed_at"] = datetime.now().isoformat()
                 
-                success, qdrant_id = qdrant.index_product(
+                success, qdrant_id = await qdrant.index_product(
                     product_id=product_id,
                     name=task.get("name", ""),
                     description=task.get("description", ""),
                     embedding=embedding,
-                    metadata=metadata
+                    metadata=metadata,
+                    wait=False
                 )
                 
                 if not success:
@@ -200,12 +207,14 @@ class AsyncImageIndexerWorker:
             except Exception as e:
                 logger.warning(f"Task {task_id}: Failed to clean up image: {e}")
 
-    async def process_task(self, task: Dict[str, Any]) -> bool:
+    async def process_task(self, task: Dict[str, Any],
+                           embedding: Optional[List[float]] = None) -> bool:
         """
         Process a single task with timeout and error handling.
         
         Args:
             task: Task data dictionary
+            embedding: Precomputed CLIP embedding, if any
             
         Returns:
             True if successful, False otherwise
@@ -221,7 +230,7 @@ class AsyncImageIndexerWorker:
             # Process with timeout
             try:
                 result = await asyncio.wait_for(
-                    self._process_image_task(task),
+                    self._process_image_task(task, embedding),
                     timeout=self.task_timeout
                 )
                 
@@ -291,17 +300,70 @@ class AsyncImageIndexerWorker:
 
         logger.info(f"Processing batch: {len(tasks)} tasks")
         
+        # One batched CLIP forward pass for the whole batch
+        embeddings = await self._embed_batch(tasks)
+        
+        from app.services.async_qdrant import get_async_qdrant_service
+        ingest = get_async_qdrant_service().ingest
+        failed_before = ingest.get_stats()["failed_points"]
+
         # Process tasks concurrently
         results = await asyncio.gather(
-            *[self.process_task(task) for task in tasks],
+            *[self.process_task(task, embedding) for task, embedding in zip(tasks, embeddings)],
             return_exceptions=False
         )
         
-        successful = sum(1 for r in results if r)
+        # Send the batch's points now instead of waiting out the ingest window
+        upsert_failed = (await ingest.flush())["failed_points"] - failed_before
+        if upsert_failed:
+            logger.error(f"Batch: {upsert_failed} point(s) failed to upsert (see ingest stats failed_ids)")
+            self.tasks_processed -= upsert_failed
+            self.tasks_failed += upsert_failed
+        
+        successful = sum(1 for r in results if r) - upsert_failed
         logger.info(f"Batch complete: {successful}/{len(tasks)} successful")
         
         return len(tasks)
 
+    async def _embed_batch(self, tasks: List[Dict[str, Any]]) -> List[Optional[List[float]]]:
+        """
+        Embed the images of a batch of tasks with one batched CLIP call.
+        
+        Tasks whose image cannot be read (or the whole batch, if embedding
+        fails) get None and fall back to per-task embedding with retries.
+        
+        Returns:
+            One embedding (or None) per task, in task order
+        """
+        embeddings: List[Optional[List[float]]] = [None] * len(tasks)
+        if len(tasks) < 2:
+            return embeddings
+        
+        images = []
+        positions = []
+        for i, task in enumerate(tasks):
+            try:
+                with open(task["image_path"], 'rb') as f:
+                    images.append(f.read())
+                positions.append(i)
+            except Exception as e:
+                logger.warning(f"Task {task.get('task_id', 'unknown')}: Could not pre-read image: {e}")
+        
+        if not images:
+            return embeddings
+        
+        try:
+            from app.services.image_embedding import get_image_embedding_service
+            image_service = get_image_embedding_service()
+            matrix = await asyncio.to_thread(image_service.embed_images, images)
+            for position, row in zip(positions, matrix):
+                embeddings[position] = row.tolist()
+            logger.debug(f"Batch embedding: {len(images)} images in one pass")
+        except Exception as e:
+            logger.warning(f"Batch embedding failed, falling back to per-task embedding: {e}")
+        
+        return embeddings
+
     async def report_status(self) -> None:
         """Report worker status to Redis with expiry"""
         try:
@@ -343,7 +405,8 @@ class AsyncImageIndexerWorker:
                     tasks_processed = await self.process_batch()
                     
                     if tasks_processed == 0:
-                        # No tasks, brief sleep before retry
+                        # No tasks: free idle model memory, brief sleep before retry
+                        await asyncio.to_thread(self._unload_idle_models)
                         await asyncio.sleep(self.poll_interval)
                         
                 except KeyboardInterrupt:
@@ -361,10 +424,24 @@ class AsyncImageIndexerWorker:
                 f"Failed: {self.tasks_failed}"
             )
 
+    def _unload_idle_models(self) -> None:
+        """Unload models unused for model_idle_unload seconds (reloaded on next task)."""
+        if self.model_idle_unload <= 0:
+            return
+        try:
+            from app.services.model_registry import get_model_registry
+            unloaded = get_model_registry().unload_idle(self.model_idle_unload)
+            if unloaded:
+                logger.info(f"Unloaded idle models: {', '.join(unloaded)}")
+        except Exception as e:
+            logger.warning(f"Could not unload idle models: {e}")
+
     async def shutdown(self) -> None:
         """Graceful shutdown"""
         logger.info(f"Shutting down worker {self.worker_id}...")
         self.running = False
+        from app.services.async_qdrant import get_async_qdrant_service
+        await get_async_qdrant_service().close()  # Sends buffered points
         await self.disconnect()
 
 
@@ -380,6 +457,7 @@ Environment variables:
   WORKER_POLL_INTERVAL   Seconds between queue polls (default: 1)
   WORKER_BATCH_SIZE      Tasks per batch (default: 1)
   TASK_TIMEOUT           Task timeout in seconds (default: 300)
+  MODEL_IDLE_UNLOAD_SECONDS  Unload CLIP after N idle seconds (default: 0 = never)
         """
     )
     parser.add_argument(
@@ -412,6 +490,12 @@ Environment variables:
         default=int(os.getenv("TASK_TIMEOUT", "300")),
         help="Task execution timeout in seconds"
     )
+    parser.add_argument(
+        "--model-idle-unload",
+        type=float,
+        default=float(os.getenv("MODEL_IDLE_UNLOAD_SECONDS", "0")),
+        help="Unload CLIP after this many idle seconds (0 = keep loaded)"
+    )
     return parser.parse_args()
 
 
@@ -428,7 +512,8 @@ async def main():
         worker_id=args.worker_id,
         poll_interval=args.poll_interval,
         batch_size=args.batch_size,
-        task_timeout=args.task_timeout
+        task_timeout=args.task_timeout,
+        model_idle_unload=args.model_idle_unload
     )
     
     try:
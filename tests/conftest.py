@@ -5,11 +5,146 @@ Pytest configuration and fixtures
 import pytest
 import os
 import sys
+from collections import Counter
 from pathlib import Path
 
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+class FakeRedis:
+    """
+    In-memory stand-in for the redis-py calls of the services (strings, hashes,
+    sets and sorted sets). calls counts commands by name and round_trips the
+    requests sent (a pipeline is one).
+    """
+    def __init__(self):
+        self.data = {}
+        self.calls = Counter()
+        self.round_trips = 0
+
+    def _call(self, command):
+        self.calls[command] += 1
+        self.round_trips += 1
+
+    # Keys
+    def delete(self, *keys):
+        self._call("delete")
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def exists(self, key):
+        self._call("exists")
+        return int(key in self.data)
+
+    def rename(self, source, destination):
+        self._call("rename")
+        self.data[destination] = self.data.pop(source)
+
+    # Strings
+    def get(self, key):
+        self._call("get")
+        return self.data.get(key)
+
+    def mget(self, keys):
+        self._call("mget")
+        return [self.data.get(key) for key in keys]
+
+    def set(self, key, value, ex=None):
+        self._call("set")
+        self.data[key] = value
+
+    # Hashes (non-string values are stored as text, like Redis)
+    def hget(self, key, field):
+        self._call("hget")
+        return self.data.get(key, {}).get(field)
+
+    def hmget(self, key, fields):
+        self._call("hmget")
+        return [self.data.get(key, {}).get(field) for field in fields]
+
+    def hgetall(self, key):
+        self._call("hgetall")
+        return dict(self.data.get(key, {}))
+
+    def hset(self, key, mapping):
+        self._call("hset")
+        self.data.setdefault(key, {}).update({
+            field: value if isinstance(value, (str, bytes)) else str(value) for field, value in mapping.items()
+        })
+
+    def hdel(self, key, *fields):
+        self._call("hdel")
+        for field in fields:
+            self.data.get(key, {}).pop(field, None)
+
+    def hlen(self, key):
+        self._call("hlen")
+        return len(self.data.get(key, {}))
+
+    # Sets
+    def sadd(self, key, *members):
+        self._call("sadd")
+        self.data.setdefault(key, set()).update(members)
+
+    def smembers(self, key):
+        self._call("smembers")
+        return set(self.data.get(key, set()))
+
+    def srem(self, key, *members):
+        self._call("srem")
+        self.data.get(key, set()).difference_update(members)
+
+    def scard(self, key):
+        self._call("scard")
+        return len(self.data.get(key, set()))
+
+    # Sorted sets
+    def zadd(self, key, mapping):
+        self._call("zadd")
+        self.data.setdefault(key, {}).update(mapping)
+
+    def zrangebyscore(self, key, low, high, withscores=False):
+        self._call("zrangebyscore")
+        members = sorted(self.data.get(key, {}).items(), key=lambda item: item[1])
+        members = [(member, score) for member, score in members if float(low) <= score <= float(high)]
+        return members if withscores else [member for member, _ in members]
+
+    def zmscore(self, key, members):
+        self._call("zmscore")
+        return [self.data.get(key, {}).get(member) for member in members]
+
+    def zrem(self, key, *members):
+        self._call("zrem")
+        for member in members:
+            self.data.get(key, {}).pop(member, None)
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    """Queues commands and sends them to the FakeRedis as one round trip"""
+    def __init__(self, client):
+        self._client = client
+        self._commands = []
+
+    def __getattr__(self, command):
+        def queue(*args, **kwargs):
+            self._commands.append((command, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        results = [getattr(self._client, command)(*args, **kwargs) for command, args, kwargs in self._commands]
+        self._client.round_trips -= len(self._commands) - 1
+        self._commands = []
+        return results
+
+
+@pytest.fixture
+def fake_redis():
+    """In-memory Redis client shared by the service tests"""
+    return FakeRedis()
+
 @pytest.fixture
 def test_config():
     """Test configuration"""
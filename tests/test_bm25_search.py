@@ -0,0 +1,58 @@
+import numpy as np
+from rank_bm25 import BM25Okapi
+
+from app.services.bm25_search import BM25Index, BM25SearchService, product_tokens
+
+
+def _corpus(count=400, vocabulary=300, seed=0):
+    """Random documents with a skewed (Zipf) term distribution"""
+    rng = np.random.default_rng(seed)
+    return [
+        [f"t{min(int(rng.zipf(1.4)), vocabulary)}" for _ in range(rng.integers(3, 25))]
+        for _ in range(count)
+    ]
+
+
+def _exhaustive(documents, query, limit, min_score):
+    scores = BM25Okapi(documents).get_scores(query)
+    ranked = sorted((i for i, score in enumerate(scores) if score >= min_score), key=lambda i: (-scores[i], i))
+    return ranked[:limit], [scores[i] for i in ranked[:limit]]
+
+
+class TestBM25Index:
+    def test_pruned_top_k_matches_exhaustive_scoring(self):
+        """Test MaxScore results equal scoring every document with BM25Okapi"""
+        documents = _corpus()
+        index = BM25Index.build(documents)
+        rng = np.random.default_rng(1)
+        for _ in range(50):
+            query = [documents[rng.integers(len(documents))][0], f"t{rng.integers(1, 40)}", "t1", "unknown"]
+            expected_ids, expected_scores = _exhaustive(documents, query, 10, 0.1)
+            doc_ids, scores = index.search(query, limit=10, min_score=0.1)
+            assert list(doc_ids) == expected_ids
+            assert np.allclose(scores, expected_scores, rtol=1e-5)
+
+    def test_rare_term_ranks_over_long_postings_list(self):
+        """Test a rare term's document wins with its common term added by probing"""
+        documents = [["common", "filler"] for _ in range(5000)] + [["rare", "common"]]
+        index = BM25Index.build(documents)
+        doc_ids, scores = index.search(["rare", "common"], limit=1)
+        assert list(doc_ids) == [5000]
+        assert np.isclose(scores[0], BM25Okapi(documents).get_scores(["rare", "common"])[5000], rtol=1e-5)
+
+
+class TestBM25SearchService:
+    def test_serves_persisted_build(self, tmp_path):
+        """Test a saved build is loaded and maps documents back to product IDs"""
+        products = [
+            {"id": "sku-1", "name": "Red running shoes", "category": "shoes", "description": "light"},
+            {"id": "sku-2", "name": "Blue shirt", "category": "clothing", "description": "cotton"},
+            {"id": "sku-3", "name": "Leather boots", "category": "shoes", "description": "warm"},
+        ]
+        index = BM25Index.build([product_tokens(product) for product in products])
+        index.save(str(tmp_path), [product["id"] for product in products], source="products")
+
+        service = BM25SearchService(index_path=str(tmp_path))
+        results = service.search("red shoes", limit=2, min_score=0.0)
+        assert [product_id for product_id, _ in results] == ["sku-1", "sku-3"]
+        assert BM25SearchService(index_path=str(tmp_path / "missing")).search("shoes") == []
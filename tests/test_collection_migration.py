@@ -0,0 +1,134 @@
+import json
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct
+
+from app.services.collection_migration import (
+    MigrationError,
+    MigrationStore,
+    alias_target,
+    catch_up,
+    copy_batch,
+    flip_migration,
+    rollback_migration,
+    run_copy,
+    start_migration,
+    verify_migration,
+)
+from app.services.point_ids import product_point_id
+from app.services.provisioning import CollectionSpec, provision_serving_collection
+
+
+def _vector(seed):
+    return np.random.default_rng(seed).standard_normal(8).tolist()
+
+
+def _embed(payloads):
+    """New 'model': deterministic vector per product, none for unembeddable ones"""
+    return [None if payload.get("broken") else _vector(int(payload["product_id"][1:]) + 1000) for payload in payloads]
+
+
+@pytest.fixture
+def migration(fake_redis):
+    client = QdrantClient(":memory:")
+    spec = CollectionSpec(name="products", size=8)
+    assert provision_serving_collection(client, spec)["alias"] == "products_live"
+    client.upsert("products_live", points=[
+        PointStruct(id=product_point_id(f"p{i}"), vector=_vector(i), payload={"product_id": f"p{i}", "name": f"Item {i}"})
+        for i in range(25)
+    ])
+    store = MigrationStore(fake_redis)
+    return client, store, spec
+
+
+class TestCollectionMigration:
+    def test_copy_resumes_from_checkpoint(self, migration):
+        """Test an interrupted copy continues from the saved offset without redoing batches"""
+        client, store, spec = migration
+        state = start_migration(client, store, spec)
+        assert state.alias == "products_live"
+        assert state.target == "products_v1" and state.source == "products"
+
+        copy_batch(client, store, state, _embed, batch_size=10)
+        resumed = store.load("products_live")
+        assert resumed.migrated == 10 and resumed.status == "copying"
+
+        embedded = []
+        run_copy(client, store, resumed, lambda payloads: embedded.extend(payloads) or _embed(payloads), batch_size=10)
+        assert len(embedded) == 15
+        assert store.load("products_live").status == "copied"
+        assert client.count("products_v1").count == 25
+        stored = client.retrieve("products_v1", [product_point_id("p3")], with_vectors=True)[0]
+        assert np.allclose(stored.vector, np.array(_vector(1003)) / np.linalg.norm(_vector(1003)), atol=1e-5)
+
+    def test_catch_up_verify_and_flip(self, migration):
+        """Test changes made during the copy are applied and the alias flips atomically"""
+        client, store, spec = migration
+        state = start_migration(client, store, spec)
+        with pytest.raises(MigrationError):
+            start_migration(client, store, spec)
+        run_copy(client, store, state, _embed, batch_size=10)
+
+        client.upsert("products_live", points=[PointStruct(id=product_point_id("p99"), vector=_vector(99),
+                                                           payload={"product_id": "p99"})])
+        client.delete("products_live", points_selector=[product_point_id("p0")])
+        store.mark_changed("products_live", ["p99", "p0"])
+        assert catch_up(client, store, state, _embed) == {"reembedded": 1, "deleted": 1}
+
+        report = verify_migration(client, store, state, sample_size=10, k=5)
+        assert report["ok"] and report["missing"] == 0
+
+        # Written between the verify and the flip
+        client.upsert("products_live", points=[PointStruct(id=product_point_id("p42"), vector=_vector(42),
+                                                           payload={"product_id": "p42"})])
+        store.mark_changed("products_live", ["p42"])
+
+        assert flip_migration(client, store, state, _embed) == "products"
+        assert alias_target(client, "products_live") == "products_v1"
+        assert client.count("products_live").count == 26
+        assert client.retrieve("products_v1", [product_point_id("p42")])
+        assert json.loads(store._redis.get("migration:products_live"))["status"] == "flipped"
+        assert store.changed_products("products_live") == {}
+
+    def test_first_migration_flip_and_rollback(self, migration):
+        """Test the first collection keeps serving until the flip and stays available for rollback"""
+        client, store, spec = migration
+        state = start_migration(client, store, spec)
+        run_copy(client, store, state, _embed)
+        with pytest.raises(MigrationError):
+            flip_migration(client, store, state, _embed)  # Not verified
+        assert verify_migration(client, store, state, sample_size=5, k=3)["ok"]
+
+        flip_migration(client, store, state, _embed)
+        assert alias_target(client, "products_live") == "products_v1"
+        assert client.count("products").count == 25
+
+        assert rollback_migration(client, state) == "products"
+        assert alias_target(client, "products_live") == "products"
+        with pytest.raises(MigrationError):
+            rollback_migration(client, state)  # Already rolled back
+
+        client.delete_collection("products_v1")
+        next_state = start_migration(client, store, spec)
+        assert next_state.source == "products" and next_state.target == "products_v1"
+
+    def test_start_adopts_collection_without_alias(self, fake_redis):
+        """Test a deployment provisioned before serving aliases gets one on its plain collection"""
+        client = QdrantClient(":memory:")
+        spec = CollectionSpec(name="products", size=8)
+        client.create_collection("products", vectors_config=spec.vectors_config())
+        state = start_migration(client, MigrationStore(fake_redis), spec)
+        assert alias_target(client, "products_live") == "products" and state.source == "products"
+
+    def test_verify_rejects_missing_products(self, migration):
+        """Test products that could not be re-embedded fail the count check"""
+        client, store, spec = migration
+        client.set_payload("products_live", payload={"broken": True}, points=[product_point_id("p1")])
+        state = start_migration(client, store, spec)
+        run_copy(client, store, state, _embed)
+        assert state.failed_ids == ["p1"]
+
+        assert not verify_migration(client, store, state, sample_size=5, k=3)["ok"]
+        assert verify_migration(client, store, state, sample_size=5, k=3, max_missing=1)["ok"]
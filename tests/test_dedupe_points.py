@@ -0,0 +1,54 @@
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+from app.services.point_ids import product_point_id
+from app.tools.dedupe_points import dedupe_collection
+
+
+def _client_with_duplicates():
+    """In-memory collection indexed with the old per-process hash IDs"""
+    client = QdrantClient(":memory:")
+    client.create_collection("products", vectors_config=VectorParams(size=2, distance=Distance.COSINE))
+    client.upsert("products", points=[
+        PointStruct(id=11, vector=[1.0, 0.0], payload={"product_id": "A", "name": "shoe"}),
+        PointStruct(id=12, vector=[1.0, 0.1], payload={"product_id": "A", "name": "shoe", "has_image": True}),
+        PointStruct(id=13, vector=[0.0, 1.0], payload={"product_id": "B"}),
+        PointStruct(id=product_point_id("C"), vector=[0.5, 0.5], payload={"product_id": "C"}),
+        PointStruct(id=14, vector=[0.5, 0.4], payload={"product_id": "C"}),
+    ])
+    return client
+
+
+class TestPointIds:
+    def test_point_id_is_stable(self):
+        """Test the same product always gets the same UUID"""
+        assert product_point_id("sku-1") == product_point_id("sku-1")
+        assert product_point_id("sku-1") != product_point_id("sku-2")
+
+
+class TestDedupePoints:
+    def test_collapses_duplicates_onto_stable_ids(self):
+        """Test one point per product remains, at its stable ID"""
+        client = _client_with_duplicates()
+        stats = dedupe_collection(client, "products", batch_size=2)
+
+        points, _ = client.scroll("products", limit=100, with_payload=True)
+        by_product = {p.payload["product_id"]: p for p in points}
+        assert len(points) == 3
+        assert all(str(p.id) == product_point_id(pid) for pid, p in by_product.items())
+        assert by_product["A"].payload.get("has_image") is True  # Richest payload kept
+        assert stats["duplicates_removed"] == 2
+        assert stats["points_moved"] == 2
+
+    def test_dry_run_writes_nothing(self):
+        """Test --dry-run only reports"""
+        client = _client_with_duplicates()
+        stats = dedupe_collection(client, "products", dry_run=True)
+        assert client.count("products").count == 5
+        assert stats["duplicates_removed"] == 2
+
+    def test_second_run_is_noop(self):
+        """Test the migration is idempotent"""
+        client = _client_with_duplicates()
+        dedupe_collection(client, "products")
+        stats = dedupe_collection(client, "products")
+        assert stats["points_moved"] == 0 and stats["points_deleted"] == 0
@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+from app.services.embedding_batcher import EmbeddingBatcher
+
+
+def _fake_batch_fn(calls):
+    """Embed each text as [len(text)] and record batch sizes"""
+    def batch_fn(items):
+        calls.append(len(items))
+        return [[float(len(item))] for item in items]
+    return batch_fn
+
+
+class TestEmbeddingBatcher:
+    def test_results_returned_in_caller_order(self):
+        """Test each caller gets its own row back"""
+        calls = []
+        batcher = EmbeddingBatcher(_fake_batch_fn(calls), max_batch_size=8, max_wait_ms=5)
+
+        async def run():
+            return await asyncio.gather(*[batcher.submit("x" * i) for i in range(20)])
+
+        results = asyncio.run(run())
+        assert [r[0] for r in results] == [float(i) for i in range(20)]
+        assert sum(calls) == 20
+        assert max(calls) <= 8
+
+    def test_concurrent_requests_share_batches(self):
+        """Test concurrent requests are grouped and fill is reported"""
+        calls = []
+        batcher = EmbeddingBatcher(_fake_batch_fn(calls), max_batch_size=4, max_wait_ms=20)
+
+        async def run():
+            await asyncio.gather(*[batcher.submit("abc") for _ in range(8)])
+
+        asyncio.run(run())
+        stats = batcher.get_stats()
+        assert calls == [4, 4]
+        assert stats["batches"] == 2
+        assert stats["avg_fill_ratio"] == 1.0
+
+    def test_batch_error_propagates_to_callers(self):
+        """Test a failing forward pass fails every waiting caller"""
+        def failing(items):
+            raise ValueError("model exploded")
+
+        batcher = EmbeddingBatcher(failing, max_batch_size=4, max_wait_ms=1)
+
+        async def run():
+            return await asyncio.gather(*[batcher.submit("a") for _ in range(3)], return_exceptions=True)
+
+        results = asyncio.run(run())
+        assert all(isinstance(r, ValueError) for r in results)
+
+    def test_submit_many_shares_one_batch(self):
+        """Test inputs submitted together go through one forward pass, in order"""
+        calls = []
+        batcher = EmbeddingBatcher(_fake_batch_fn(calls), max_batch_size=8, max_wait_ms=1)
+
+        results = asyncio.run(batcher.submit_many(["a", "bbb", "cc"]))
+        assert results == [[1.0], [3.0], [2.0]]
+        assert calls == [3]
@@ -0,0 +1,61 @@
+import time
+import numpy as np
+from app.services.embedding_cache import EmbeddingCache
+
+
+class TestEmbeddingCache:
+    def test_same_bytes_same_key(self):
+        """Test keys are content-addressed"""
+        cache = EmbeddingCache("emb:test", dimension=4, use_redis=False)
+        assert cache.key_for(b"photo") == cache.key_for(b"photo")
+        assert cache.key_for(b"photo") != cache.key_for(b"photo2")
+
+    def test_lru_evicts_least_recently_used(self):
+        """Test the in-process tier keeps max_entries vectors"""
+        cache = EmbeddingCache("emb:test", dimension=4, max_entries=2, use_redis=False)
+        for name in ("a", "b"):
+            cache.set(name, np.ones(4))
+        cache.get("a")
+        cache.set("c", np.ones(4))
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        stats = cache.get_stats()
+        assert stats["lru_hits"] == 2 and stats["misses"] == 1
+
+    def test_redis_tier_stores_compact_vectors(self, fake_redis):
+        """Test Redis entries are float16 bytes shared across instances"""
+        writer = EmbeddingCache("emb:test", dimension=4, redis_client=fake_redis)
+        writer.set("k", [0.1, 0.2, 0.3, 0.4])
+        assert len(fake_redis.get("k")) == 4 * 2
+
+        reader = EmbeddingCache("emb:test", dimension=4, redis_client=fake_redis)
+        embedding = reader.get("k")
+        assert np.allclose(embedding, [0.1, 0.2, 0.3, 0.4], atol=1e-3)
+        assert reader.get_stats()["redis_hits"] == 1
+
+    def test_batches_use_one_round_trip(self, fake_redis):
+        """Test get_many/set_many issue a single MGET / pipeline each"""
+        cache = EmbeddingCache("emb:test", dimension=2, max_entries=0, redis_client=fake_redis)
+        keys = [cache.key_for(f"text {i}") for i in range(10)]
+
+        cache.set_many({key: [1.0, 0.0] for key in keys[:5]})
+        results = cache.get_many(keys)
+
+        assert fake_redis.round_trips == 2
+        assert sum(r is not None for r in results) == 5
+
+    def test_model_version_changes_key_space(self, fake_redis):
+        """Test entries of another model version are not returned"""
+        old = EmbeddingCache("emb:test", dimension=2, version="a", redis_client=fake_redis)
+        new = EmbeddingCache("emb:test", dimension=2, version="b", redis_client=fake_redis)
+        old.set(old.key_for("shoes"), [1.0, 0.0])
+
+        assert new.get(new.key_for("shoes")) is None
+
+    def test_lru_entries_expire(self):
+        """Test the LRU tier honours its TTL"""
+        cache = EmbeddingCache("emb:test", dimension=2, lru_ttl_seconds=0.01, use_redis=False)
+        cache.set("k", [1.0, 0.0])
+        time.sleep(0.02)
+        assert cache.get("k") is None
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services.inference_executor import InferenceQueueFull, ModelExecutor
+
+
+class TestModelExecutor:
+    def test_rejects_calls_over_concurrency_and_queue(self):
+        """Test calls beyond max_concurrency + max_queue raise InferenceQueueFull"""
+        executor = ModelExecutor("clip_text", max_concurrency=1, max_queue=1)
+        release = threading.Event()
+
+        async def run():
+            calls = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            with pytest.raises(InferenceQueueFull):
+                await executor.run(release.wait)
+            stats = executor.get_stats()
+            release.set()
+            await asyncio.gather(*calls)
+            return stats
+
+        stats = asyncio.run(run())
+        executor.shutdown()
+        assert stats["in_flight"] == 1 and stats["queued"] == 1 and stats["rejected"] == 1
+        final = executor.get_stats()
+        assert final["in_flight"] == 0 and final["queued"] == 0 and final["completed"] == 2
+
+    def test_cancelled_caller_keeps_slot_until_thread_ends(self):
+        """Test a cancelled call still counts as in flight while its thread runs"""
+        executor = ModelExecutor("whisper", max_concurrency=1, max_queue=0)
+        started, release = threading.Event(), threading.Event()
+
+        def blocking():
+            started.set()
+            release.wait()
+
+        async def run():
+            call = asyncio.ensure_future(executor.run(blocking))
+            await asyncio.to_thread(started.wait)
+            call.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await call
+            in_flight = executor.get_stats()["in_flight"]
+            with pytest.raises(InferenceQueueFull):
+                await executor.run(blocking)
+            release.set()
+            await asyncio.to_thread(executor.shutdown, True)
+            return in_flight
+
+        assert asyncio.run(run()) == 1
+        stats = executor.get_stats()
+        assert stats["in_flight"] == 0 and stats["completed"] == 1
+
+    def test_failed_call_frees_its_slot(self):
+        """Test an exception is raised to the caller and counted as failed"""
+        executor = ModelExecutor("clip_image", max_concurrency=1, max_queue=0)
+
+        def failing():
+            raise RuntimeError("model crashed")
+
+        async def run():
+            with pytest.raises(RuntimeError):
+                await executor.run(failing)
+            return await executor.run(sum, [1, 2])
+
+        assert asyncio.run(run()) == 3
+        executor.shutdown()
+        stats = executor.get_stats()
+        assert stats["failed"] == 1 and stats["completed"] == 1 and stats["in_flight"] == 0
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from app.services.ingest_buffer import IngestBuffer
+
+
+def _recording_upsert(batches, delay=0.0):
+    """Record the points of each upsert"""
+    async def upsert(points):
+        await asyncio.sleep(delay)
+        batches.append(list(points))
+    return upsert
+
+
+class TestIngestBuffer:
+    def test_concurrent_submits_share_upserts(self):
+        """Test points from concurrent callers are sent as full batches"""
+        batches = []
+        buffer = IngestBuffer(_recording_upsert(batches), max_batch_size=4, max_wait_ms=50)
+
+        async def run():
+            await asyncio.gather(*[buffer.submit(i) for i in range(8)])
+
+        asyncio.run(run())
+        assert [len(batch) for batch in batches] == [4, 4]
+        assert sorted(point for batch in batches for point in batch) == list(range(8))
+        assert buffer.get_stats()["points"] == 8
+
+    def test_flush_sends_partial_batch_without_waiting(self):
+        """Test flush sends queued points right away and waits for every upsert"""
+        batches = []
+        buffer = IngestBuffer(_recording_upsert(batches, delay=0.01), max_batch_size=100,
+                              max_wait_ms=10000, streams=2)
+
+        async def run():
+            await buffer.submit_many(list(range(250)), wait=False)
+            started = asyncio.get_running_loop().time()
+            stats = await buffer.flush()
+            return stats, asyncio.get_running_loop().time() - started
+
+        stats, elapsed = asyncio.run(run())
+        assert elapsed < 5
+        assert sum(len(batch) for batch in batches) == 250
+        assert stats["batches"] == 3 and stats["pending"] == 0
+
+    def test_upsert_error_fails_waiting_callers(self):
+        """Test a failed batch raises in its callers and is counted"""
+        async def failing(points):
+            raise ConnectionError("qdrant down")
+
+        buffer = IngestBuffer(failing, max_batch_size=2, max_wait_ms=1)
+
+        async def run():
+            with pytest.raises(ConnectionError):
+                await buffer.submit("p1")
+            await buffer.submit("p2", wait=False)
+            return await buffer.flush()
+
+        stats = asyncio.run(run())
+        assert stats["failed_points"] == 2 and stats["last_error"] == "qdrant down"
+
+    def test_rejected_batch_isolates_bad_point(self):
+        """Test a batch rejected for one point is retried by halves and only that point fails"""
+        batches = []
+
+        async def upsert(points):
+            if "bad" in points:
+                raise ValueError("wrong vector size")
+            batches.append(list(points))
+
+        buffer = IngestBuffer(upsert, max_batch_size=8, max_wait_ms=50)
+
+        async def run():
+            await buffer.submit_many([f"p{i}" for i in range(7)] + ["bad"], wait=False)
+            return await buffer.flush()
+
+        stats = asyncio.run(run())
+        assert sorted(point for batch in batches for point in batch) == sorted(f"p{i}" for i in range(7))
+        assert stats["points"] == 7 and stats["failed_points"] == 1
+        assert stats["failed_ids"] == ["bad"]
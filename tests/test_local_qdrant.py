@@ -0,0 +1,37 @@
+import asyncio
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, VectorParams
+from app.services import async_qdrant
+from app.services.async_qdrant import AsyncIntegratedQdrantService
+from app.services.local_qdrant import LockedClient, ThreadedAsyncClient
+
+
+class TestThreadedAsyncClient:
+    def test_calls_run_off_the_event_loop(self):
+        """Test client methods become awaitables and attributes pass through"""
+        client = ThreadedAsyncClient(LockedClient(QdrantClient(":memory:")))
+
+        async def run():
+            await client.create_collection("items", vectors_config=VectorParams(size=2, distance=Distance.COSINE))
+            return await client.collection_exists("items")
+
+        assert asyncio.run(run()) is True
+        asyncio.run(client.close())  # Shared client is left open
+
+
+class TestAsyncServiceLocalMode:
+    def test_index_and_search_in_memory(self, monkeypatch):
+        """Test the async service works unchanged on the embedded client"""
+        local = LockedClient(QdrantClient(":memory:"))
+        monkeypatch.setattr(async_qdrant, "get_local_client", lambda: local)
+        service = AsyncIntegratedQdrantService("unused", 6333, 6334, "products", mode="memory")
+        vector = [1.0] + [0.0] * 511
+
+        async def run():
+            await service.index_product("p1", "Shoe", "Red shoe", vector, {"category": "Shoes", "price": 10.0})
+            return await service.search(vector, limit=5)
+
+        results = asyncio.run(run())
+        assert service.transport == "memory"
+        assert [result["id"] for result in results] == ["p1"]
@@ -0,0 +1,74 @@
+import threading
+import time
+
+from app.services.model_registry import ModelRegistry
+
+
+def _loader(loads):
+    """Loader returning a fresh model object and counting its calls"""
+    def load():
+        loads.append(1)
+        return object(), "processor", "cpu"
+    return load
+
+
+class TestModelRegistry:
+    def test_handles_share_one_load(self):
+        """Test two handles on the same name load the model once"""
+        loads = []
+        registry = ModelRegistry()
+        first = registry.acquire("clip", _loader(loads))
+        second = registry.acquire("clip", _loader(loads))
+        assert first.model is second.model
+        assert len(loads) == 1 and registry.get_stats()["clip"]["refcount"] == 2
+
+    def test_unload_skips_model_in_use(self):
+        """Test a model held by use() is not unloaded until the call exits"""
+        loads = []
+        registry = ModelRegistry()
+        handle = registry.acquire("clip", _loader(loads))
+
+        with handle.use() as (model, processor, device):
+            assert registry.unload_idle(0) == []
+            assert registry.unload("clip") is False
+            stats = registry.get_stats()["clip"]
+            assert stats["loaded"] and stats["in_use"] == 1
+            assert model is handle.model and processor == "processor" and device == "cpu"
+
+        assert registry.unload_idle(0) == ["clip"]
+        assert not registry.get_stats()["clip"]["loaded"]
+        with handle.use() as (model, _, _):
+            assert model is not None
+        assert len(loads) == 2
+
+    def test_unload_idle_keeps_recently_used(self):
+        """Test only models idle for max_idle_seconds are unloaded"""
+        registry = ModelRegistry()
+        handle = registry.acquire("clip", _loader([]))
+        with handle.use():
+            pass
+        assert registry.unload_idle(60) == []
+        assert registry.unload("clip", force=True) is True
+
+    def test_use_during_idle_unload_keeps_model(self):
+        """Test concurrent calls and idle unloads never hand out an unloaded model"""
+        registry = ModelRegistry()
+        handle = registry.acquire("clip", _loader([]))
+        stop = threading.Event()
+        seen = []
+
+        def call():
+            while not stop.is_set():
+                with handle.use() as (model, _, _):
+                    time.sleep(0.001)
+                    seen.append(model is not None and registry.get_stats()["clip"]["loaded"])
+
+        threads = [threading.Thread(target=call) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for _ in range(200):
+            registry.unload_idle(0)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        assert seen and all(seen)
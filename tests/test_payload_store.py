@@ -0,0 +1,35 @@
+import json
+
+from app.services import payload_store
+from app.services.payload_store import ProductPayloadStore, hydrate_results
+
+
+class TestProductPayloadStore:
+    def test_keeps_display_fields_and_serves_from_lru(self, fake_redis):
+        """Test stored payloads drop search-only fields and repeat reads skip Redis"""
+        store = ProductPayloadStore(fake_redis)
+        store.set_many({"p1": {"product_id": "p1", "name": "Shoe", "full_text": "Shoe red", "price": 10.0}})
+        assert json.loads(fake_redis.hget("payloads:products", "p1")) == {"name": "Shoe", "price": 10.0}
+
+        fresh = ProductPayloadStore(fake_redis)
+        assert fresh.get_many(["p1", "p2"]) == {"p1": {"name": "Shoe", "price": 10.0}}
+        assert fresh.get_many(["p1"]) == {"p1": {"name": "Shoe", "price": 10.0}}
+        assert fake_redis.calls["hmget"] == 1
+        assert fresh.stats == {"lru_hits": 1, "redis_hits": 1, "misses": 1}
+
+    def test_hydrates_misses_from_qdrant_and_writes_back(self, monkeypatch, fake_redis):
+        """Test only store misses are fetched, then stored for the next query"""
+        store = ProductPayloadStore(fake_redis)
+        store.set_many({"p1": {"name": "Shoe"}})
+        monkeypatch.setattr(payload_store, "_payload_store", store)
+        fetched = []
+
+        def fetch(product_ids):
+            fetched.extend(product_ids)
+            return {product_id: {"product_id": product_id, "name": "Bag"} for product_id in product_ids}
+
+        results = [{"id": "p1", "score": 0.9, "metadata": {"name": None}}, {"id": "p2", "score": 0.8, "metadata": {}}]
+        assert hydrate_results(results, fetch) > 0
+        assert [result["metadata"]["name"] for result in results] == ["Shoe", "Bag"]
+        assert fetched == ["p2"]
+        assert hydrate_results([{"id": "p2", "score": 0.8}], fetch) == 0
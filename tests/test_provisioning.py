@@ -0,0 +1,88 @@
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    CreateAlias,
+    CreateAliasOperation,
+    DeleteAlias,
+    DeleteAliasOperation,
+    Distance,
+    VectorParams,
+)
+from app.services.provisioning import (
+    CollectionSpec,
+    alias_target,
+    detect_drift,
+    load_collection_spec,
+    provision_collection,
+    provision_serving_collection,
+)
+
+
+def _spec(**overrides):
+    values = dict(name="products", size=4, on_disk=True, hnsw_config={"m": 32},
+                  payload_indexes=[("price", "float")])
+    values.update(overrides)
+    return CollectionSpec(**values)
+
+
+class TestLoadCollectionSpec:
+    def test_spec_file_over_settings(self, tmp_path):
+        """Test spec file values win and missing keys come from settings"""
+        spec_file = tmp_path / "spec.yaml"
+        spec_file.write_text(
+            "collections:\n"
+            "  default:\n"
+            "    vectors: {on_disk: true}\n"
+            "    hnsw_config: {m: 32, ef_construct: 200}\n"
+            "    payload_indexes: {sku: keyword}\n"
+        )
+        spec = load_collection_spec("products", str(spec_file))
+        assert spec.size == 512 and spec.distance == "Cosine"
+        assert spec.on_disk is True
+        assert spec.hnsw_config == {"m": 32, "ef_construct": 200}
+        assert [name for name, _ in spec.payload_indexes] == ["sku"]
+
+    def test_missing_file_uses_settings(self, tmp_path):
+        """Test provisioning still works without a spec file"""
+        spec = load_collection_spec("products", str(tmp_path / "absent.yaml"))
+        assert [name for name, _ in spec.payload_indexes] == ["category", "price", "product_id"]
+
+
+class TestProvisionCollection:
+    def test_creates_missing_collection(self):
+        """Test a missing collection is created with its payload indexes"""
+        client = QdrantClient(":memory:")
+        report = provision_collection(client, _spec())
+        assert report["created"] is True
+        assert report["payload_indexes_created"] == ["price"]
+        assert client.get_collection("products").config.params.vectors.size == 4
+
+    def test_reports_drift(self):
+        """Test differences with a live collection are reported, unfixable ones flagged"""
+        client = QdrantClient(":memory:")
+        client.create_collection("products", vectors_config=VectorParams(size=8, distance=Distance.COSINE))
+
+        drift = {item.setting: item for item in detect_drift(client.get_collection("products"), _spec())}
+        assert drift["vectors.size"].fixable is False
+        assert drift["vectors.on_disk"].expected is True and drift["vectors.on_disk"].fixable
+        assert drift["hnsw_config.m"].actual == 16
+
+        report = provision_collection(client, _spec())
+        assert report["created"] is False and report["updated"] == []
+        assert {item["setting"] for item in report["drift"]} >= {"vectors.size", "hnsw_config.m"}
+
+    def test_serving_alias_follows_its_target(self):
+        """Test the serving alias is created once, then its current target is reconciled"""
+        client = QdrantClient(":memory:")
+        report = provision_serving_collection(client, _spec())
+        assert report["created"] is True and report["alias"] == "products_live"
+        assert alias_target(client, "products_live") == "products"
+
+        client.create_collection("products_v1", vectors_config=VectorParams(size=4, distance=Distance.COSINE))
+        client.update_collection_aliases(change_aliases_operations=[
+            DeleteAliasOperation(delete_alias=DeleteAlias(alias_name="products_live")),
+            CreateAliasOperation(create_alias=CreateAlias(collection_name="products_v1", alias_name="products_live"))
+        ])
+        report = provision_serving_collection(client, _spec())
+        assert report["collection"] == "products_v1" and report["created"] is False
+        assert report["payload_indexes_created"] == ["price"]
+        assert alias_target(client, "products_live") == "products_v1"
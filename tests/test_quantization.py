@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.models import BinaryQuantization, Distance, PointStruct, ScalarQuantization, VectorParams
+from app.services.quantization import quantization_config, quantization_search_params
+from app.tools.requantize_collection import quantization_report
+
+
+class TestQuantizationConfig:
+    def test_modes(self):
+        """Test each mode maps to its collection config"""
+        assert quantization_config("none") is None
+        assert isinstance(quantization_config("scalar"), ScalarQuantization)
+        assert isinstance(quantization_config("binary"), BinaryQuantization)
+        with pytest.raises(ValueError):
+            quantization_config("product")
+
+    def test_search_params_oversample_and_rescore(self):
+        """Test quantized searches oversample and rescore by default"""
+        assert quantization_search_params("none") is None
+        params = quantization_search_params("binary").quantization
+        assert params.rescore is True and params.oversampling == 3.0
+        assert quantization_search_params("scalar", oversampling=1.5).quantization.oversampling == 1.5
+
+
+class TestQuantizationReport:
+    def test_report_per_mode(self):
+        """Test the report measures every requested mode against exact search"""
+        client = QdrantClient(":memory:")
+        client.create_collection("products", vectors_config=VectorParams(size=8, distance=Distance.COSINE))
+        vectors = np.random.default_rng(0).standard_normal((50, 8))
+        client.upsert("products", points=[PointStruct(id=i, vector=v.tolist()) for i, v in enumerate(vectors)])
+
+        report = quantization_report(client, "products", ["none", "scalar"], num_queries=10, k=5)
+        assert report["exact"]["recall@5"] == 1.0
+        assert set(report["scalar"]) == {"no_rescore", "rescore"}
+        assert 0.0 <= report["scalar"]["rescore"]["recall@5"] <= 1.0
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+from qdrant_client import QdrantClient
+from app.services import async_qdrant
+from app.services.async_qdrant import AsyncIntegratedQdrantService, ProductNotFound
+from app.services.local_qdrant import LockedClient
+from app.services.search_filters import InvalidSearchRequest
+
+# Two clusters: shoes along the first axis, bags along the second
+PRODUCTS = {
+    "shoe-1": [1.0, 0.0], "shoe-2": [0.95, 0.05], "shoe-3": [0.9, 0.2],
+    "bag-1": [0.0, 1.0], "bag-2": [0.1, 0.95], "bag-3": [0.2, 0.9],
+}
+
+
+@pytest.fixture
+def service(monkeypatch):
+    local = LockedClient(QdrantClient(":memory:"))
+    monkeypatch.setattr(async_qdrant, "get_local_client", lambda: local)
+    service = AsyncIntegratedQdrantService("unused", 6333, 6334, "products", mode="memory")
+
+    asyncio.run(service.index_products([
+        {"product_id": product_id, "name": product_id, "embedding": vector + [0.0] * 510}
+        for product_id, vector in PRODUCTS.items()
+    ], wait=True))
+    return service
+
+
+def _ids(results):
+    return [result["id"] for result in results]
+
+
+class TestRecommend:
+    def test_positive_and_negative_examples(self, service):
+        """Test results lean towards the positives, away from the negatives, examples excluded"""
+        results = asyncio.run(service.recommend(["shoe-1"], ["bag-1"], limit=2, score_threshold=None))
+        assert _ids(results) == ["shoe-2", "shoe-3"]
+
+    def test_best_score_with_negatives_only(self, service):
+        """Test best_score accepts negatives only and ranks the other cluster first"""
+        results = asyncio.run(service.recommend([], ["shoe-1"], limit=3, strategy="best_score"))
+        assert set(_ids(results)) == {"bag-1", "bag-2", "bag-3"}
+        with pytest.raises(InvalidSearchRequest):
+            asyncio.run(service.recommend([], ["shoe-1"]))  # average_vector needs a positive
+
+    def test_unknown_example_is_not_found(self, service):
+        """Test an example that is not indexed raises ProductNotFound (404 in the API)"""
+        with pytest.raises(ProductNotFound):
+            asyncio.run(service.recommend(["shoe-1", "missing"]))
+
+
+class TestDiscover:
+    def test_context_pairs_select_a_region(self, service):
+        """Test discovery around a target stays on the positive side of the context"""
+        results = asyncio.run(service.discover("shoe-3", [("bag-2", "shoe-1")], limit=2))
+        assert _ids(results) == ["bag-3", "bag-1"]  # Bags, the closest to the target first
+
+    def test_unknown_target_is_not_found(self, service):
+        """Test an unknown target raises ProductNotFound"""
+        with pytest.raises(ProductNotFound):
+            asyncio.run(service.discover("missing", [("bag-1", "shoe-1")]))
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+from app.services.resilience import (
+    CallGuard,
+    CircuitBreaker,
+    CircuitOpen,
+    DeadlineExceeded,
+    is_not_found,
+    request_deadline,
+)
+
+
+def _failing():
+    raise ConnectionError("qdrant restarting")
+
+
+class TestCircuitBreaker:
+    def test_opens_then_probes_half_open(self):
+        """Test consecutive failures open the breaker and one probe closes it"""
+        breaker = CircuitBreaker("qdrant", failure_threshold=2, reset_timeout=60)
+        guard = CallGuard(breaker)
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                guard.call_sync("search", _failing)
+        with pytest.raises(CircuitOpen):
+            guard.call_sync("search", lambda: "never called")
+
+        breaker.reset_timeout = 0  # Open period over: next call is the probe
+        assert breaker.allow() and not breaker.allow()  # A single probe at a time
+        breaker.record_success()
+        assert guard.call_sync("search", lambda: "ok") == "ok"
+        assert guard.metrics.snapshot()["search"] == {"error": 2, "rejected": 1, "ok": 1}
+
+    def test_client_errors_do_not_trip(self):
+        """Test bad requests leave the breaker closed"""
+        guard = CallGuard(CircuitBreaker("qdrant", failure_threshold=1))
+        with pytest.raises(ValueError):
+            guard.call_sync("search", lambda: int("x"))
+        assert guard.breaker.state == "closed"
+
+
+class TestCallGuard:
+    def test_deadline_from_request_budget(self):
+        """Test a call is cut at the request budget and counted as a timeout"""
+        guard = CallGuard(CircuitBreaker("qdrant"), call_timeout=10)
+
+        async def run():
+            with request_deadline(0.05):
+                await guard.call("search", lambda: asyncio.sleep(1))
+
+        with pytest.raises(DeadlineExceeded):
+            asyncio.run(run())
+        assert guard.metrics.snapshot()["search"] == {"timeout": 1}
+
+    def test_hedge_answers_when_first_call_is_slow(self):
+        """Test a slow read is re-issued and the hedge's answer wins"""
+        guard = CallGuard(CircuitBreaker("qdrant"), hedge_delay=0.02)
+        delays = iter([1.0, 0.0])
+
+        async def query():
+            delay = next(delays)
+            await asyncio.sleep(delay)
+            return delay
+
+        assert asyncio.run(guard.call("search", query, hedge=True)) == 0.0
+        assert guard.metrics.snapshot()["search"] == {"hedged": 1, "hedge_won": 1, "ok": 1}
+
+
+    def test_cancelled_probe_frees_half_open_slot(self):
+        """Test a cancelled half-open probe lets the next call through, without hedging it"""
+        breaker = CircuitBreaker("qdrant", failure_threshold=1, reset_timeout=0)
+        guard = CallGuard(breaker, hedge_delay=0.01)
+        calls = []
+
+        async def slow_query():
+            calls.append("probe")
+            await asyncio.sleep(1)
+
+        async def run():
+            with pytest.raises(ConnectionError):
+                guard.call_sync("search", _failing)
+            probe = asyncio.ensure_future(guard.call("search", slow_query, hedge=True))
+            await asyncio.sleep(0.05)
+            probe.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await probe
+            return await guard.call("search", lambda: asyncio.sleep(0, "ok"))
+
+        assert asyncio.run(run()) == "ok"
+        assert calls == ["probe"] and breaker.state == "closed"
+        assert guard.metrics.snapshot()["search"] == {"error": 1, "cancelled": 1, "ok": 1}
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+class TestIsNotFound:
+    def test_only_404_is_not_found(self):
+        """Test not found is read from the status, not from the message"""
+        assert is_not_found(_StatusError(404))
+        assert not is_not_found(_StatusError(400))
+        assert not is_not_found(ValueError("Collection not found"))
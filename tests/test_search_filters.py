@@ -0,0 +1,61 @@
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+from app.services.search_filters import InvalidSearchRequest, build_search_filter, payload_index_specs
+
+
+def _client_with_products():
+    """In-memory collection with a few priced, categorized products"""
+    client = QdrantClient(":memory:")
+    client.create_collection("products", vectors_config=VectorParams(size=2, distance=Distance.COSINE))
+    client.upsert("products", points=[
+        PointStruct(id=1, vector=[1.0, 0.0], payload={"category": "Sports Shoes", "price": 50.0, "brand": "x"}),
+        PointStruct(id=2, vector=[1.0, 0.1], payload={"category": "Shoes", "price": 150.0, "brand": "y"}),
+        PointStruct(id=3, vector=[0.9, 0.2], payload={"category": "Electronics", "price": 80.0, "brand": "x"}),
+    ])
+    return client
+
+
+def _search_ids(client, query_filter):
+    response = client.query_points("products", query=[1.0, 0.0], query_filter=query_filter, limit=10)
+    return sorted(point.id for point in response.points)
+
+
+class TestBuildSearchFilter:
+    def test_no_conditions_returns_none(self):
+        """Test an unfiltered search sends no filter"""
+        assert build_search_filter() is None
+        assert build_search_filter(category="  ") is None
+
+    def test_category_and_price_range(self):
+        """Test category and price bounds are combined"""
+        client = _client_with_products()
+        # Local mode has no full-text index (case-sensitive match); the server lowercases
+        assert _search_ids(client, build_search_filter(category="Shoes")) == [1, 2]
+        assert _search_ids(client, build_search_filter(category="Shoes", price_max=100)) == [1]
+        assert _search_ids(client, build_search_filter(price_min=60, price_max=150)) == [2, 3]
+
+    def test_metadata_fields(self):
+        """Test exact, any-of and range conditions on other fields"""
+        client = _client_with_products()
+        assert _search_ids(client, build_search_filter(fields={"brand": "x"})) == [1, 3]
+        assert _search_ids(client, build_search_filter(fields={"brand": ["y"]})) == [2]
+        assert _search_ids(client, build_search_filter(fields={"price": {"gt": 60}})) == [2, 3]
+
+    def test_invalid_filters_raise(self):
+        """Test bad ranges are rejected before reaching Qdrant"""
+        with pytest.raises(InvalidSearchRequest):
+            build_search_filter(price_min=10, price_max=5)
+        with pytest.raises(InvalidSearchRequest):
+            build_search_filter(fields={"price": {"between": 3}})
+        with pytest.raises(InvalidSearchRequest):
+            build_search_filter(fields={"price": {"gt": "cheap"}})
+
+
+class TestPayloadIndexSpecs:
+    def test_parses_field_types(self):
+        """Test the PAYLOAD_INDEXES format"""
+        specs = dict(payload_index_specs("category:text, price:float,sku"))
+        assert set(specs) == {"category", "price", "sku"}
+        with pytest.raises(ValueError):
+            payload_index_specs("price:decimal")
@@ -0,0 +1,43 @@
+import pytest
+from app.config import get_settings
+from app.services.search_filters import InvalidSearchRequest
+from app.services.search_params import build_search_params
+from app.tools.tune_hnsw_ef import smallest_ef, write_env_values
+
+
+class TestBuildSearchParams:
+    def test_tiers_set_ef(self):
+        """Test fast/precise tiers use their configured ef"""
+        assert build_search_params(tier="fast").hnsw_ef == 32
+        assert build_search_params(tier="precise").hnsw_ef == 256
+
+    def test_explicit_hints_win(self):
+        """Test hnsw_ef overrides the tier and exact bypasses HNSW and quantization"""
+        assert build_search_params(tier="fast", hnsw_ef=300).hnsw_ef == 300
+        params = build_search_params(tier="fast", exact=True)
+        assert params.exact is True and params.quantization.ignore is True
+
+    def test_invalid_hints_raise(self):
+        """Test bad hints are rejected (HTTP 400 in the API)"""
+        with pytest.raises(InvalidSearchRequest):
+            build_search_params(tier="turbo")
+        with pytest.raises(InvalidSearchRequest):
+            build_search_params(hnsw_ef=0)
+        with pytest.raises(InvalidSearchRequest):
+            build_search_params(hnsw_ef=get_settings().hnsw_ef_max + 1)
+        assert build_search_params(hnsw_ef=get_settings().hnsw_ef_max).hnsw_ef == get_settings().hnsw_ef_max
+
+
+class TestEfTuner:
+    def test_smallest_ef_reaching_target(self):
+        """Test the tuner keeps the first ef over the target"""
+        rows = [{"ef": 16, "recall@10": 0.8}, {"ef": 32, "recall@10": 0.96}, {"ef": 64, "recall@10": 0.99}]
+        assert smallest_ef(rows, 10, 0.95) == 32
+        assert smallest_ef(rows, 10, 0.999) is None
+
+    def test_write_env_values(self, tmp_path):
+        """Test existing keys are replaced and missing ones appended"""
+        env_file = tmp_path / ".env"
+        env_file.write_text("QDRANT_HOST=qdrant\nHNSW_EF=0\n")
+        write_env_values(str(env_file), {"HNSW_EF": 96, "HNSW_EF_FAST": 24})
+        assert env_file.read_text() == "QDRANT_HOST=qdrant\nHNSW_EF=96\nHNSW_EF_FAST=24\n"
@@ -0,0 +1,69 @@
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+from app.services.point_ids import product_point_id
+from app.services.similar_products import SimilarProductsStore
+from app.tools.build_similar_products import build_all, refresh_changed
+
+
+def _upsert(client, product_id, vector):
+    client.upsert("products", points=[
+        PointStruct(id=product_point_id(product_id), vector=vector, payload={"product_id": product_id})
+    ])
+
+
+def _client_with_products():
+    client = QdrantClient(":memory:")
+    client.create_collection("products", vectors_config=VectorParams(size=2, distance=Distance.COSINE))
+    for product_id, vector in {"a": [1.0, 0.0], "b": [0.9, 0.1], "c": [0.0, 1.0], "d": [0.1, 0.9]}.items():
+        _upsert(client, product_id, vector)
+    return client
+
+
+class TestSimilarProducts:
+    def test_full_build_stores_top_k(self, fake_redis):
+        """Test every product gets its nearest neighbours, itself excluded"""
+        client, store = _client_with_products(), SimilarProductsStore(fake_redis)
+        stats = build_all(client, "products", store, k=1, batch_size=3)
+
+        assert stats["products"] == 4
+        assert [n["id"] for n in store.get("a")] == ["b"]
+        assert [n["id"] for n in store.get("c")] == ["d"]
+        assert store.get("unknown") is None
+
+    def test_incremental_refresh_updates_affected_neighbourhoods(self, fake_redis):
+        """Test a new product enters the lists it now belongs to, and only changed ones are recomputed"""
+        client, store = _client_with_products(), SimilarProductsStore(fake_redis)
+        build_all(client, "products", store, k=1)
+
+        _upsert(client, "e", [1.0, 0.01])  # Closer to "a" than "b" is
+        store.mark_changed(["e"])
+        stats = refresh_changed(client, "products", store, k=1)
+
+        assert [n["id"] for n in store.get("e")] == ["a"]
+        assert [n["id"] for n in store.get("a")] == ["e"]
+        assert [n["id"] for n in store.get("c")] == ["d"]
+        assert stats["changed"] == 1 and stats["recomputed"] < 5
+        assert store.changed_products() == []
+
+    def test_deleted_product_is_dropped(self, fake_redis):
+        """Test a deleted product loses its entry and leaves its neighbours' lists"""
+        client, store = _client_with_products(), SimilarProductsStore(fake_redis)
+        build_all(client, "products", store, k=1)
+
+        client.delete("products", points_selector=[product_point_id("b")])
+        store.mark_changed(["b"])
+        refresh_changed(client, "products", store, k=1)
+
+        assert store.get("b") is None
+        assert [n["id"] for n in store.get("a")] == ["d"]
+
+    def test_full_build_drops_removed_products(self, fake_redis):
+        """Test a full rebuild replaces the table, so products gone since the last build lose their entry"""
+        client, store = _client_with_products(), SimilarProductsStore(fake_redis)
+        build_all(client, "products", store, k=1)
+
+        client.delete("products", points_selector=[product_point_id("d")])
+        build_all(client, "products", store, k=1)
+
+        assert store.get("d") is None
+        assert [n["id"] for n in store.get("c")] == ["b"]
@@ -0,0 +1,53 @@
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+from app.services.vector_index import LocalVectorIndex, build_vector_index, normalize_rows
+
+
+def _index(chunk_size=16384):
+    vectors = normalize_rows(np.random.default_rng(0).standard_normal((50, 8))).astype(np.float16)
+    payloads = [
+        {"product_id": f"p{row}", "category": "Running Shoes" if row % 2 else "Bags", "price": float(row)}
+        for row in range(50)
+    ]
+    return LocalVectorIndex(vectors, payloads, chunk_size=chunk_size)
+
+
+class TestLocalVectorIndex:
+    def test_matches_brute_force_across_chunks(self):
+        """Test chunked top-k equals a full sort of the scores"""
+        index = _index(chunk_size=7)
+        query = np.random.default_rng(1).standard_normal(8)
+        expected = np.argsort(-(index.vectors.astype(np.float32) @ (query / np.linalg.norm(query))))[:5]
+        assert [row for row, _ in index.search(query, limit=5)] == list(expected)
+
+    def test_category_and_price_filters(self):
+        """Test the category bitmap (case-insensitive words) and price range"""
+        index = _index()
+        rows = [row for row, _ in index.search(np.ones(8), limit=50, category="shoes", price_min=10, price_max=20)]
+        assert rows and all(row % 2 and 10 <= row <= 20 for row in rows)
+        assert index.search(np.ones(8), limit=5, category="hats") == []
+
+    def test_save_and_load_memory_maps(self, tmp_path):
+        """Test a saved build reloads as a float16 memmap with the same results"""
+        index = _index()
+        index.save(str(tmp_path))
+        loaded = LocalVectorIndex.load(str(tmp_path))
+        assert isinstance(loaded.vectors, np.memmap) and loaded.vectors.dtype == np.float16
+        assert loaded.search_results(np.ones(8), limit=3) == index.search_results(np.ones(8), limit=3)
+
+    def test_build_from_collection_agrees_with_qdrant(self):
+        """Test the snapshot returns Qdrant's exact top results"""
+        client = QdrantClient(":memory:")
+        client.create_collection("products", vectors_config=VectorParams(size=8, distance=Distance.COSINE))
+        vectors = np.random.default_rng(2).standard_normal((30, 8))
+        client.upsert("products", points=[
+            PointStruct(id=row, vector=vector.tolist(), payload={"product_id": f"p{row}", "name": f"item {row}"})
+            for row, vector in enumerate(vectors)
+        ])
+        index = build_vector_index(client, "products", batch_size=8)
+        query = np.random.default_rng(3).standard_normal(8).tolist()
+        hits = client.query_points("products", query=query, limit=5, with_payload=True).points
+        results = index.search_results(query, limit=5)
+        assert [result["id"] for result in results] == [hit.payload["product_id"] for hit in hits]
+        assert results[0]["metadata"]["name"] == hits[0].payload["name"]